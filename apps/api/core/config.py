@@ -23,15 +23,84 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    AUTH_TOKEN_CACHE_TTL_SECONDS: int = 300
+    AUTH_USER_CACHE_SIZE: int = 10000
+    AUTH_USER_CACHE_TTL_SECONDS: int = 30
+    METRICS_TOKEN: SecretStr | None = None  # Bearer token for /metrics; the route is hidden when unset
 
     # Database
     DATABASE_URL: PostgresDsn
     DATABASE_POOL_SIZE: int = 5
     DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT_SECONDS: float = 5.0
+    DATABASE_POOL_RECYCLE_SECONDS: int = 1800  # Below typical proxy/load balancer idle timeouts
+    DATABASE_POOL_PRE_PING: bool = True
+    DATABASE_POOL_USE_LIFO: bool = True  # Reuse warm connections so idle ones can expire
+    DATABASE_STATEMENT_CACHE_SIZE: int = 500  # Prepared statements per connection; 0 behind PgBouncer
+    DATABASE_READ_URL: PostgresDsn | None = None  # Read replica; reads use the primary when unset
+    WORKER_DATABASE_POOL_SIZE: int = 2  # Per worker thread; thread pools multiply it by their concurrency
 
     # Redis
     REDIS_URL: RedisDsn
     REDIS_POOL_SIZE: int = 10
+    REDIS_POOL_TIMEOUT_SECONDS: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL_SECONDS: int = 30
+
+    # Celery payloads
+    CELERY_SERIALIZER: str = "json"  # "msgpack" needs the msgpack package
+    CELERY_RESULT_EXPIRES_SECONDS: int = 24 * 3600
+    CELERY_RESULT_OFFLOAD_BYTES: int = 64 * 1024  # Larger results go to blob storage
+    CELERY_RESULT_STORAGE_BACKEND: str = "gcs"  # "local" writes to CELERY_RESULT_LOCAL_STORAGE_PATH
+    CELERY_RESULT_STORAGE_BUCKET: str = "alpha-me-task-results"
+    CELERY_RESULT_LOCAL_STORAGE_PATH: str = ".artifacts/task-results"
+
+    # Per-user task coalescing
+    COALESCE_WINDOW_SECONDS: int = 900  # A pending entry outliving this is assumed lost
+    COALESCE_LEASE_SECONDS: int = 3600  # Matches task_time_limit, so a live run never loses its lease
+    COALESCE_RETRY_SECONDS: int = 30
+
+    # Priority lanes and per-user fair share
+    LANE_INTERACTIVE_SLO_MS: int = 10_000  # Publish to finish, for work a member is waiting on
+    LANE_INCREMENTAL_SLO_MS: int = 900_000  # One ingestion period
+    LANE_BACKFILL_SLO_MS: int = 6 * 3600 * 1000
+    LANE_METRICS_WINDOW_SECONDS: int = 300  # Stats cover the current and previous window
+    FAIR_SHARE_SLOTS: int = 4  # Concurrent non-interactive tasks per member
+    FAIR_SHARE_SLOT_SECONDS: int = 3600  # Matches task_time_limit, so a lost slot frees itself
+    FAIR_SHARE_RETRY_SECONDS: int = 15
+
+    # Worker profiles
+    WORKER_PROFILE: str = "all"  # all, ingestion or ai; see apps/workers/profiles.py
+    WORKER_INGESTION_CONCURRENCY: int = 32
+    WORKER_AI_CONCURRENCY: int = 2
+    WORKER_HEALTH_PORT: int = 8080
+
+    # Health checks
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 2.0
+    HEALTH_CACHE_TTL_SECONDS: float = 5.0  # Readiness results are reused for this long
+
+    # Deltas feed
+    DELTAS_PAGE_SIZE: int = 100
+    DELTAS_MAX_PAGE_SIZE: int = 500
+    DELTAS_SSE_KEEPALIVE_SECONDS: float = 15.0  # Streams also re-read the table this often
+    DELTAS_SSE_RETRY_MS: int = 3000
+
+    # Ingestion
+    INGESTION_INSERT_BATCH_SIZE: int = 500  # Rows per multi-row INSERT when writing a page
+    INGESTION_RETRY_BACKOFF_SECONDS: int = 30
+    INGESTION_RETRY_BACKOFF_MAX_SECONDS: int = 900
+    INGESTION_INTERVAL_SECONDS: int = 900  # Beat period; every shard runs once per period
+    INGESTION_SHARDS: int = 16
+    INGESTION_BACKFILL_AFTER_SECONDS: int = 7 * 24 * 3600  # Providers this far behind sync in the backfill lane
+
+    # Outbound HTTP for connectors
+    HTTP_MAX_CONNECTIONS_PER_PROVIDER: int = 20
+    # Concurrency caps hold across every worker, through slots in Redis
+    HTTP_PROVIDER_CONCURRENCY: int = 16
+    HTTP_USER_CONCURRENCY: int = 4
+    HTTP_TIMEOUT_SECONDS: float = 30.0
+    HTTP_MAX_RETRIES: int = 3
+    HTTP_BACKOFF_MAX_SECONDS: float = 30.0  # Longer waits are handed back to Celery
 
     # Google Cloud
     GOOGLE_CLOUD_PROJECT: str
@@ -41,7 +110,19 @@ class Settings(BaseSettings):
     # OpenAI
     OPENAI_API_KEY: SecretStr
     OPENAI_MODEL: str = "gpt-4-turbo-preview"
+    LLM_BACKEND: str = "openai"  # "stub" answers locally without network access
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    LLM_CLAIM_SECONDS: float = 180.0  # Longer than a call with the client's own retries
+    LLM_BATCH_POLL_SECONDS: int = 600
     EMBEDDING_MODEL: str = "BAAI/bge-base-en"
+    EMBEDDING_DIMENSIONS: int = 768
+    EMBEDDING_DEVICE: str | None = None
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    EMBEDDING_USER_ACTIVITY_LIMIT: int = 200  # Recent activities averaged into a user embedding
+    EMBEDDING_TASK_BATCH_SIZE: int = 512  # Activity ids per process_activity_embeddings call
 
     # OAuth Providers
     GITHUB_CLIENT_ID: str
@@ -54,17 +135,49 @@ class Settings(BaseSettings):
     NARRATIVE_CLUSTER_MIN_SAMPLES: int = 2
     NARRATIVE_SIMILARITY_THRESHOLD: float = 0.75
     NARRATIVE_MAX_QUESTIONS: int = 3
+    CLARIFIER_MAX_ACTIVITIES: int = 20
+    NARRATIVE_SUMMARY_MAX_TOKENS: int = 250
+    NARRATIVE_SUMMARY_INPUT_TOKENS: int = 1500  # New activity text sent per summary update
+    NARRATIVE_SUMMARY_ACTIVITY_TOKENS: int = 200  # Longest excerpt taken from one activity
+    NARRATIVE_RECLUSTER_INTERVAL_DAYS: int = 28  # Full re-cluster to correct centroid drift
+    NARRATIVE_RESIDUE_WINDOW_DAYS: int = 90  # Unassigned activities retried on each run
+    NARRATIVE_MAX_ACTIVITIES: int = 5000  # Most recent activities in a full re-cluster
 
     # Newsletter
     NEWSLETTER_STORAGE_BUCKET: str = "alpha-me-newsletters"
     NEWSLETTER_BASE_URL: str = "https://alpha.me/u"
+    NEWSLETTER_STORAGE_BACKEND: str = "gcs"  # "local" writes to NEWSLETTER_LOCAL_STORAGE_PATH
+    NEWSLETTER_LOCAL_STORAGE_PATH: str = ".artifacts"
+    NEWSLETTER_ARTIFACT_BASE_URL: str = ""  # Public URL of stored artifacts, e.g. a CDN in front of the bucket
+    NEWSLETTER_ARTIFACT_MAX_AGE_SECONDS: int = 365 * 24 * 3600
+    NEWSLETTER_REDIRECT_MAX_AGE_SECONDS: int = 300
+    NEWSLETTER_MAX_NARRATIVES: int = 8
+    NEWSLETTER_PROMPT_TOKEN_BUDGET: int = 3000
+    NEWSLETTER_MAX_OUTPUT_TOKENS: int = 1200
 
     # Matchmaking
     MATCH_BATCH_SIZE: int = 100
     MATCH_MIN_SCORE: float = 0.6
     MATCH_MAX_RECOMMENDATIONS: int = 5
+    MATCH_ANN_BACKEND: str = "pgvector"  # pgvector or memory
+    MATCH_ANN_CANDIDATES: int = 100  # Shortlist size passed to exact re-scoring
+    MATCH_ANN_EF_SEARCH: int = 64  # HNSW search breadth; higher is slower with better recall
+    MATCH_ANN_PROBES: int = 10  # IVF lists scanned per query; higher is slower with better recall
+    MATCH_ANN_RECALL_SAMPLE_RATE: float = 0.01  # Share of searches also run exactly to measure recall
+    MATCH_WEIGHT_SIMILARITY: float = 1.0
+    MATCH_WEIGHT_TAG_OVERLAP: float = 0.15
+    MATCH_WEIGHT_FEEDBACK: float = 0.1
+    MATCH_PREFERENCE_WEIGHT: float = 0.3  # How far a member's learned preferences shift their query
+    MATCH_FEEDBACK_WINDOW_SECONDS: int = 60  # Ratings are applied in one batch per window
+    MATCH_FEEDBACK_BATCH_SIZE: int = 1000
+    MATCH_FEEDBACK_LOCK_SECONDS: int = 600  # Lease on applying a batch; must outlast one
+    MATCH_FEEDBACK_LEARNING_RATE: float = 0.05
+    MATCH_FEEDBACK_L2: float = 0.1
+    MATCH_PREFERENCE_LEARNING_RATE: float = 0.1
 
     # Observability
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_BATCH_SIZE: int = 512
     OTEL_EXPORTER_OTLP_ENDPOINT: str | None = None
     OTEL_SERVICE_NAME: str = "alpha-me-api"
 
@@ -1,26 +1,117 @@
-from typing import AsyncGenerator
+import time
+from collections.abc import AsyncGenerator
+from typing import Any
 
+from sqlalchemy import event, exc, text
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, ORMExecuteState, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from apps.api.core.config import settings
+from apps.api.core.metrics import Histogram
 
-# Create async engine
-engine = create_async_engine(
-    str(settings.DATABASE_URL),
-    pool_size=settings.DATABASE_POOL_SIZE,
-    max_overflow=settings.DATABASE_MAX_OVERFLOW,
-    echo=settings.DEBUG,
+
+class PoolMetrics:
+    """Connection acquisition counters for one engine's pool."""
+
+    def __init__(self) -> None:
+        self.wait_ms = Histogram()
+        self.timeouts = 0
+
+_pool_metrics: dict[str, PoolMetrics] = {}
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait for a connection.
+
+    Metrics are looked up by the pool's logging name, which survives
+    `Pool.recreate()` when an engine is disposed.
+    """
+
+    def _do_get(self):
+        metrics = _pool_metrics.setdefault(self._orig_logging_name or "default", PoolMetrics())
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.timeouts += 1
+            raise
+        finally:
+            metrics.wait_ms.observe((time.perf_counter() - started) * 1000)
+
+def engine_options(pool_size: int, max_overflow: int) -> dict[str, Any]:
+    """Pool and driver options shared by the API and worker engines."""
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+        "pool_use_lifo": settings.DATABASE_POOL_USE_LIFO,
+        "connect_args": {
+            # asyncpg's own statement cache and SQLAlchemy's prepared statement cache
+            "statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+        },
+        "echo": settings.DEBUG,
+    }
+
+def _create_engine(url: str, name: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedPool,
+        pool_logging_name=name,
+        **engine_options(settings.DATABASE_POOL_SIZE, settings.DATABASE_MAX_OVERFLOW),
+    )
+
+# Create async engines; without a replica, reads share the primary
+engine = _create_engine(str(settings.DATABASE_URL), "primary")
+read_engine = (
+    _create_engine(str(settings.DATABASE_READ_URL), "replica")
+    if settings.DATABASE_READ_URL
+    else engine
 )
 
-# Create async session factory
+class TrackedSession(Session):
+    """Session that records whether it has written since its last commit or rollback."""
+
+@event.listens_for(TrackedSession, "do_orm_execute")
+def _track_execute(state: ORMExecuteState) -> None:
+    # Anything that is not a SELECT, including textual SQL, counts as a write
+    if not state.is_select:
+        state.session.info["wrote"] = True
+
+@event.listens_for(TrackedSession, "after_flush")
+def _track_flush(session: Session, flush_context) -> None:
+    session.info["wrote"] = True
+
+@event.listens_for(TrackedSession, "after_commit")
+@event.listens_for(TrackedSession, "after_rollback")
+def _reset_tracking(session: Session) -> None:
+    session.info.pop("wrote", None)
+
+def has_writes(session: AsyncSession) -> bool:
+    """Whether committing the session would persist anything."""
+    return bool(session.info.get("wrote") or session.new or session.dirty or session.deleted)
+
+# Create async session factories
 async_session_factory = async_sessionmaker(
     engine,
     class_=AsyncSession,
+    sync_session_class=TrackedSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+# Transactions start with BEGIN READ ONLY, which costs no round trip over a plain
+# BEGIN, unlike a separate SET TRANSACTION READ ONLY
+read_session_factory = async_sessionmaker(
+    read_engine.execution_options(postgresql_readonly=True),
+    class_=AsyncSession,
     expire_on_commit=False,
     autocommit=False,
     autoflush=False,
@@ -31,22 +122,60 @@ class Base(DeclarativeBase):
     pass
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Dependency for getting async database sessions."""
+    """Dependency for getting async database sessions.
+
+    The session is only committed if it wrote something; otherwise closing it
+    ends the read transaction.
+    """
     async with async_session_factory() as session:
         try:
             yield session
-            await session.commit()
+            if has_writes(session):
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
-        finally:
-            await session.close()
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for read-only sessions; served by the replica when configured.
+
+    Writes are rejected by the database. Routes that only read should use this
+    with `ReadOnlyUser`, so one request shares one read-only connection with the
+    auth lookup.
+    """
+    async with read_session_factory() as session:
+        yield session
+
+def has_replica() -> bool:
+    return read_engine is not engine
+
+def pool_stats() -> dict[str, dict]:
+    """Return saturation and acquisition wait stats for each engine's pool."""
+    stats = {}
+    for name, db_engine in (("primary", engine), ("replica", read_engine)):
+        if name == "replica" and not has_replica():
+            continue
+        pool = db_engine.pool
+        metrics = _pool_metrics.get(name, PoolMetrics())
+        stats[name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+            "timeouts": metrics.timeouts,
+            "wait_ms": metrics.wait_ms.stats(),
+        }
+    return stats
 
 async def init_db() -> None:
     """Initialize database (create tables, etc.)."""
     async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
         await conn.run_sync(Base.metadata.create_all)
 
 async def close_db() -> None:
     """Close database connections."""
-    await engine.dispose() 
\ No newline at end of file
+    await engine.dispose()
+    if has_replica():
+        await read_engine.dispose()
@@ -0,0 +1,207 @@
+"""The per-member activity change feed.
+
+The feed is ordered by `Activity.change_xid`, the id of the transaction that
+last changed a row, then by row id. Transaction ids are handed out when a
+transaction first writes, not when it commits, so a read only returns rows
+whose transaction is older than every transaction still running
+(`pg_snapshot_xmin`). Anything committed later has a higher id than all
+rows already returned, so a cursor never skips a row. The cost is that rows
+stay hidden while any older transaction is still open.
+
+Writers publish a notification on the member's channel after committing;
+SSE streams treat it as a cue to read the table again.
+"""
+import asyncio
+import base64
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from uuid import UUID
+
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from structlog import get_logger
+
+from apps.api.models.activity import Activity
+from apps.api.schemas.deltas import ActivityDelta, DeltaPage
+
+logger = get_logger(__name__)
+
+DELTA_CHANNEL_PREFIX = "deltas:"
+
+# Oldest transaction still running as of the statement's snapshot
+SAFE_XID = text("pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+Position = tuple[int, UUID]
+
+def encode_cursor(change_xid: int, activity_id: UUID) -> str:
+    """Encode a feed position as an opaque, URL-safe cursor."""
+    raw = f"{change_xid}|{activity_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Position:
+    """Decode a cursor produced by `encode_cursor`.
+
+    Raises ValueError for malformed cursors.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        change_xid, activity_id = raw.split("|", 1)
+        return int(change_xid), UUID(activity_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def delta_channel(user_id: UUID) -> str:
+    """Return the pub/sub channel announcing a user's deltas."""
+    return f"{DELTA_CHANNEL_PREFIX}{user_id}"
+
+def to_delta(activity: Activity) -> ActivityDelta:
+    """Build the feed representation of an activity."""
+    return ActivityDelta(
+        id=activity.id,
+        provider=activity.provider,
+        kind=activity.kind,
+        title=activity.title,
+        content=activity.content,
+        url=activity.url,
+        is_private=activity.is_private,
+        occurred_at=activity.occurred_at,
+        updated_at=activity.updated_at,
+        cursor=encode_cursor(activity.change_xid, activity.id),
+    )
+
+async def fetch_deltas(
+    db: AsyncSession,
+    user_id: UUID,
+    after: Position | None,
+    limit: int,
+) -> DeltaPage:
+    """Return up to `limit` settled deltas after a position using keyset pagination."""
+    stmt = select(Activity).where(Activity.user_id == user_id, Activity.change_xid < SAFE_XID)
+    if after is not None:
+        position = tuple_(*after, types=[Activity.change_xid.type, Activity.id.type])
+        stmt = stmt.where(tuple_(Activity.change_xid, Activity.id) > position)
+    stmt = stmt.order_by(Activity.change_xid, Activity.id).limit(limit + 1)
+
+    activities = (await db.execute(stmt)).scalars().all()
+    items = [to_delta(activity) for activity in activities[:limit]]
+    if items:
+        next_cursor = items[-1].cursor
+    elif after is not None:
+        next_cursor = encode_cursor(*after)
+    else:
+        next_cursor = None
+
+    return DeltaPage(
+        items=items,
+        next_cursor=next_cursor,
+        has_more=len(activities) > limit,
+    )
+
+async def notify_deltas(redis: Redis, user_id: UUID) -> None:
+    """Tell the user's streams to read new deltas; call after committing them."""
+    await redis.publish(delta_channel(user_id), b"")
+
+class DeltaHub:
+    """Fans Redis pub/sub delta notifications out to in-process SSE subscribers.
+
+    All streams in a process share one pub/sub connection; channels are subscribed
+    while at least one local client is listening for that user. Each subscriber
+    holds at most one pending wake-up, since one read of the table catches up
+    on any number of notifications.
+    """
+
+    def __init__(self) -> None:
+        self._subscribers: dict[str, set[asyncio.Queue[None]]] = {}
+        self._pubsub: PubSub | None = None
+        self._listener: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    async def start(self, redis: Redis) -> None:
+        """Open the shared pub/sub connection."""
+        if self._pubsub is None:
+            self._pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Cancel the listener and close the pub/sub connection."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        self._pubsub = None
+        self._listener = None
+        self._subscribers.clear()
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: UUID) -> AsyncIterator[asyncio.Queue[None]]:
+        """Yield a queue that receives a wake-up when the user has new deltas."""
+        if self._pubsub is None:
+            raise RuntimeError("DeltaHub is not started")
+
+        channel = delta_channel(user_id)
+        queue: asyncio.Queue[None] = asyncio.Queue(1)
+        async with self._lock:
+            subscribers = self._subscribers.setdefault(channel, set())
+            if not subscribers:
+                await self._pubsub.subscribe(channel)
+            subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            async with self._lock:
+                subscribers = self._subscribers.get(channel, set())
+                subscribers.discard(queue)
+                if not subscribers:
+                    self._subscribers.pop(channel, None)
+                    if self._pubsub is not None:
+                        await self._pubsub.unsubscribe(channel)
+
+    def stats(self) -> dict:
+        """Return subscription counts."""
+        return {
+            "channels": len(self._subscribers),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+        }
+
+    async def _listen(self) -> None:
+        assert self._pubsub is not None
+        while True:
+            if not self._pubsub.subscribed:
+                # get_message() needs a subscribed connection
+                await asyncio.sleep(0.1)
+                continue
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("delta_hub_listen_failed", error=str(e))
+                await asyncio.sleep(1.0)
+                # Notifications may have been missed; have every stream re-read
+                for queues in self._subscribers.values():
+                    for queue in queues:
+                        _wake(queue)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            for queue in self._subscribers.get(channel, ()):
+                _wake(queue)
+
+def _wake(queue: asyncio.Queue[None]) -> None:
+    """Queue a wake-up unless one is already pending."""
+    try:
+        queue.put_nowait(None)
+    except asyncio.QueueFull:
+        pass
+
+delta_hub = DeltaHub()
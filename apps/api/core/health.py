@@ -0,0 +1,56 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+from structlog import get_logger
+
+logger = get_logger(__name__)
+
+Probe = Callable[[], Awaitable[object]]
+
+async def _run_probe(name: str, probe: Probe, timeout: float) -> str:
+    try:
+        await asyncio.wait_for(probe(), timeout)
+    except TimeoutError:
+        logger.error("health_check_timed_out", service=name, timeout=timeout)
+        return "timeout"
+    except Exception as e:
+        logger.error("health_check_failed", service=name, error=str(e))
+        return "unhealthy"
+    return "healthy"
+
+class ReadinessCheck:
+    """Dependency probes run concurrently, with the outcome cached for a few seconds.
+
+    Concurrent callers share one in-flight probe run, so a burst of health
+    checks costs at most one query per dependency per TTL.
+    """
+
+    def __init__(self, probes: dict[str, Probe], timeout: float, ttl: float) -> None:
+        self.probes = probes
+        self.timeout = timeout
+        self.ttl = ttl
+        self._result: dict[str, str] | None = None
+        self._expires_at = 0.0
+        self._inflight: asyncio.Future | None = None
+
+    async def _probe_all(self) -> dict[str, str]:
+        names = list(self.probes)
+        outcomes = await asyncio.gather(
+            *(_run_probe(name, self.probes[name], self.timeout) for name in names)
+        )
+        self._result = dict(zip(names, outcomes, strict=True))
+        self._expires_at = time.monotonic() + self.ttl
+        return self._result
+
+    async def services(self) -> dict[str, str]:
+        """Return each dependency's status, probing only when the cached result expired."""
+        if self._result is not None and time.monotonic() < self._expires_at:
+            return self._result
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._probe_all())
+        # Shielded so a disconnecting caller does not cancel the shared run
+        return await asyncio.shield(self._inflight)
+
+    def invalidate(self) -> None:
+        self._result = None
@@ -1,16 +1,182 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import re
 import sys
+import threading
+import time
 import uuid
-from typing import Any
+from datetime import UTC, datetime
+from functools import cache
+from typing import Any, BinaryIO
 
 import structlog
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from apps.api.core.config import settings
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the stdlib encoder
+    orjson = None
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Caller-supplied IDs are echoed into logs and headers, so keep them short and plain
+_REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+def _dumps(event_dict: Any, **kwargs: Any) -> bytes:
+    """Serialize a log event to JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(event_dict, default=str)
+    return json.dumps(event_dict, default=str).encode()
+
+class QueueLogSink:
+    """Bounded queue of rendered log lines written to a stream by a background thread.
+
+    Callers never block on I/O: when the queue is full the line is dropped and counted.
+    The writer thread drains whatever has accumulated and writes it in one call.
+    """
+
+    def __init__(self, stream: BinaryIO, maxsize: int, batch_size: int) -> None:
+        self.stream = stream
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.written = 0
+        self.dropped = 0
+        self._queue: queue.Queue[bytes | None] = queue.Queue(maxsize)
+        self._thread: threading.Thread | None = None
+        # Threads do not survive fork (Celery prefork, gunicorn), so restart in children
+        os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self.close)
+
+    def start(self) -> None:
+        """Start the writer thread if it is not running."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def put(self, line: bytes) -> None:
+        """Enqueue a rendered line without blocking."""
+        try:
+            self._queue.put_nowait(line)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Flush pending lines and stop the writer thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        """Return queue depth and write/drop counters."""
+        return {
+            "queued": self._queue.qsize(),
+            "maxsize": self.maxsize,
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            lines = [line for line in batch if line is not None]
+            if lines:
+                self._write(lines)
+            if stop:
+                return
+
+    def _write(self, lines: list[bytes]) -> None:
+        try:
+            self.stream.write(b"\n".join(lines) + b"\n")
+            self.stream.flush()
+            self.written += len(lines)
+        except Exception:
+            self.dropped += len(lines)
+
+    def _after_fork(self) -> None:
+        self._queue = queue.Queue(self.maxsize)
+        self._thread = None
+        self.start()
+
+class QueueLogger:
+    """structlog logger that hands rendered events to a `QueueLogSink`."""
+
+    def __init__(self, sink: QueueLogSink) -> None:
+        self._sink = sink
+
+    def msg(self, message: bytes) -> None:
+        self._sink.put(message)
+
+    log = debug = info = warn = warning = error = critical = exception = fatal = msg
+
+class QueueLoggerFactory:
+    """Logger factory returning loggers bound to a shared sink."""
+
+    def __init__(self, sink: QueueLogSink) -> None:
+        self._sink = sink
+
+    def __call__(self, *args: Any) -> QueueLogger:
+        return QueueLogger(self._sink)
+
+class QueueSinkHandler(logging.Handler):
+    """Routes standard library log records (uvicorn, celery, ...) into the sink."""
+
+    def __init__(self, sink: QueueLogSink) -> None:
+        super().__init__()
+        self._sink = sink
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            event = {
+                "event": record.getMessage(),
+                "logger": record.name,
+                "level": record.levelname.lower(),
+                "timestamp": datetime.fromtimestamp(record.created, UTC).isoformat(),
+            }
+            if record.exc_info:
+                event["exception"] = self.formatException(record.exc_info)
+            self._sink.put(_dumps(event))
+        except Exception:
+            self.handleError(record)
+
+@cache
+def _create_log_sink() -> QueueLogSink:
+    return QueueLogSink(
+        sys.stdout.buffer,
+        maxsize=settings.LOG_QUEUE_SIZE,
+        batch_size=settings.LOG_BATCH_SIZE,
+    )
+
+def get_log_sink() -> QueueLogSink:
+    """Return the process-wide log sink, creating and starting it on first use."""
+    sink = _create_log_sink()
+    sink.start()
+    return sink
+
 def configure_logging() -> None:
-    """Configure structured logging with structlog."""
+    """Configure structured logging with structlog.
+
+    Used by both the API and the Celery workers. Log lines are rendered on the
+    calling thread and written to stdout in batches by a background thread.
+    """
+    sink = get_log_sink()
+
     # Remove existing handlers
     root_logger = logging.getLogger()
     root_logger.handlers.clear()
@@ -24,20 +190,17 @@ def configure_logging() -> None:
             structlog.processors.StackInfoRenderer(),
             structlog.processors.format_exc_info,
             structlog.processors.UnicodeDecoder(),
-            structlog.processors.JSONRenderer(),
+            structlog.processors.JSONRenderer(serializer=_dumps),
         ],
         wrapper_class=structlog.make_filtering_bound_logger(logging.INFO),
         context_class=dict,
-        logger_factory=structlog.PrintLoggerFactory(),
+        logger_factory=QueueLoggerFactory(sink),
         cache_logger_on_first_use=True,
     )
 
     # Configure standard library logging
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=logging.INFO if not settings.DEBUG else logging.DEBUG,
-    )
+    root_logger.addHandler(QueueSinkHandler(sink))
+    root_logger.setLevel(logging.INFO if not settings.DEBUG else logging.DEBUG)
 
     # Set third-party loggers to WARNING
     logging.getLogger("uvicorn").setLevel(logging.WARNING)
@@ -49,17 +212,61 @@ def get_logger(name: str | None = None) -> structlog.BoundLogger:
     """Get a structured logger instance."""
     return structlog.get_logger(name)
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    """Middleware that adds a request ID to each request."""
-    
-    async def dispatch(self, request: Request, call_next):
-        request_id = str(uuid.uuid4())
+class RequestIDMiddleware:
+    """ASGI middleware that tags each request with an ID and writes an access log.
+
+    Implemented as plain ASGI rather than `BaseHTTPMiddleware` so response bodies,
+    including streaming and SSE responses, pass through without being buffered.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.logger = get_logger("apps.api.access")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _incoming_request_id(scope) or str(uuid.uuid4())
         structlog.contextvars.clear_contextvars()
         structlog.contextvars.bind_contextvars(request_id=request_id)
-        
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
-        return response
+
+        start = time.perf_counter()
+        status_code = 500
+        response_bytes = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(REQUEST_ID_HEADER, request_id)
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.logger.info(
+                "request_completed",
+                method=scope["method"],
+                path=scope["path"],
+                status_code=status_code,
+                duration_ms=round((time.perf_counter() - start) * 1000, 3),
+                response_bytes=response_bytes,
+            )
+
+def _incoming_request_id(scope: Scope) -> str | None:
+    """Return a well-formed request ID supplied by the caller, if any."""
+    for name, value in scope["headers"]:
+        if name == b"x-request-id":
+            request_id = value.decode("latin-1")
+            if _REQUEST_ID_PATTERN.fullmatch(request_id):
+                return request_id
+            return None
+    return None
 
 def log_exception(logger: structlog.BoundLogger, exc: Exception, level: str = "error") -> None:
     """Log an exception with context."""
@@ -0,0 +1,42 @@
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from apps.api.core.config import settings
+
+
+class _SharedClient:
+    """The pool and client set up by init_redis() and torn down by close_redis()."""
+    pool: BlockingConnectionPool | None = None
+    client: Redis | None = None
+
+_shared = _SharedClient()
+
+async def init_redis() -> Redis:
+    """Create the application-wide Redis connection pool."""
+    if _shared.client is None:
+        _shared.pool = BlockingConnectionPool.from_url(
+            str(settings.REDIS_URL),
+            max_connections=settings.REDIS_POOL_SIZE,
+            timeout=settings.REDIS_POOL_TIMEOUT_SECONDS,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL_SECONDS,
+        )
+        _shared.client = Redis(connection_pool=_shared.pool)
+    return _shared.client
+
+async def close_redis() -> None:
+    """Close the shared client and disconnect all pooled connections."""
+    if _shared.client is not None:
+        await _shared.client.aclose()
+    if _shared.pool is not None:
+        await _shared.pool.disconnect()
+    _shared.pool = None
+    _shared.client = None
+
+def get_redis_client() -> Redis:
+    """Return the shared Redis client for code running outside a request."""
+    if _shared.client is None:
+        raise RuntimeError("Redis pool is not initialized; call init_redis() on startup")
+    return _shared.client
+
+async def get_redis() -> Redis:
+    """Dependency for getting the shared Redis client."""
+    return get_redis_client()
@@ -0,0 +1,18 @@
+from functools import lru_cache
+
+from apps.api.core.config import settings
+from libs.storage.blobs import BlobStore, GCSBlobStore, LocalBlobStore
+
+# Where the API serves the local store's files; see `create_application`
+LOCAL_ARTIFACTS_PATH = "/artifacts"
+
+@lru_cache
+def get_blob_store() -> BlobStore:
+    """Return the configured artifact store; the local one stands in for GCS in development."""
+    if settings.NEWSLETTER_STORAGE_BACKEND == "local":
+        # Without a public URL, redirects point at the API's own mount
+        return LocalBlobStore(
+            settings.NEWSLETTER_LOCAL_STORAGE_PATH,
+            settings.NEWSLETTER_ARTIFACT_BASE_URL or LOCAL_ARTIFACTS_PATH,
+        )
+    return GCSBlobStore(settings.NEWSLETTER_STORAGE_BUCKET, settings.NEWSLETTER_ARTIFACT_BASE_URL or None)
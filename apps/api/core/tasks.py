@@ -0,0 +1,39 @@
+"""Enqueue worker tasks from the API without importing the worker code."""
+import time
+from typing import Any
+
+from celery import Celery
+from starlette.concurrency import run_in_threadpool
+
+from apps.api.core.config import settings
+from apps.workers.scheduling import BROKER_TRANSPORT_OPTIONS, LANES, PUBLISHED_AT_HEADER
+from apps.workers.serialization import register_serializers
+
+# Producer-only client; tasks are referenced by name so numpy, models and
+# connectors are never imported into the API process
+register_serializers()
+task_client = Celery("alpha_me", broker=str(settings.REDIS_URL), backend=str(settings.REDIS_URL))
+task_client.conf.update(
+    task_serializer=f"task-{settings.CELERY_SERIALIZER}",
+    accept_content=["json", f"task-{settings.CELERY_SERIALIZER}"],
+    result_serializer="json",
+    broker_transport_options=BROKER_TRANSPORT_OPTIONS,
+)
+
+async def enqueue(name: str, *args: Any, queue: str, lane: str = "interactive", **kwargs: Any) -> str:
+    """Send a task by name without blocking the event loop; returns the task id.
+
+    Requests made by a member default to the interactive lane.
+    """
+    # The publish signal receiver is only connected in the workers, so the API
+    # stamps the header itself
+    result = await run_in_threadpool(
+        task_client.send_task,
+        name,
+        args=args,
+        kwargs=kwargs,
+        queue=queue,
+        priority=LANES[lane],
+        headers={PUBLISHED_AT_HEADER: time.time()},
+    )
+    return result.id
@@ -1,23 +1,231 @@
-from typing import Annotated, AsyncGenerator
+import asyncio
+import hmac
+from collections.abc import Iterable
+from copy import copy
+from datetime import UTC, datetime
+from typing import Annotated, Any
+from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
-from sqlalchemy import select
+from redis.asyncio import Redis
+from redis.asyncio.client import PubSub
+from redis.exceptions import RedisError
+from sqlalchemy import event, inspect, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from structlog import get_logger
 
+from apps.api.core.cache import TTLCache
 from apps.api.core.config import settings
-from apps.api.core.database import get_db
+from apps.api.core.database import (
+    TrackedSession,
+    async_session_factory,
+    get_db,
+    get_read_db,
+    has_replica,
+)
 from apps.api.models.user import User
 from apps.api.schemas.auth import TokenPayload
 
+logger = get_logger(__name__)
+
 security = HTTPBearer()
+metrics_security = HTTPBearer(auto_error=False)
 
-async def get_current_user(
-    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
-    db: Annotated[AsyncSession, Depends(get_db)],
-) -> User:
-    """Get the current authenticated user from JWT token."""
+USER_INVALIDATION_CHANNEL = "auth:user_invalidated"
+
+# Verified tokens keyed by jti; the raw token is kept to reject forged tokens reusing a jti
+token_cache: TTLCache[tuple[str, TokenPayload]] = TTLCache(
+    "auth_tokens",
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=settings.AUTH_TOKEN_CACHE_TTL_SECONDS,
+)
+
+# Column snapshots of recently loaded users keyed by user id
+user_cache: TTLCache[dict[str, Any]] = TTLCache(
+    "auth_users",
+    maxsize=settings.AUTH_USER_CACHE_SIZE,
+    ttl=settings.AUTH_USER_CACHE_TTL_SECONDS,
+)
+
+# Deferred columns (the embeddings) are never loaded for a request, so the
+# snapshot leaves them out
+_user_columns = [prop.key for prop in inspect(User).column_attrs if not prop.deferred]
+
+class UserInvalidations:
+    """Relays user snapshot invalidations between API processes over Redis pub/sub.
+
+    Each process drops its own snapshot from the ORM event; committed changes
+    are then published so other processes drop theirs before the TTL expires.
+    """
+
+    def __init__(self) -> None:
+        self._redis: Redis | None = None
+        self._pubsub: PubSub | None = None
+        self._listener: asyncio.Task | None = None
+        self._publishing: set[asyncio.Task] = set()
+
+    async def start(self, redis: Redis) -> None:
+        """Subscribe to the invalidation channel."""
+        if self._pubsub is None:
+            self._redis = redis
+            self._pubsub = redis.pubsub(ignore_subscribe_messages=True)
+            await self._pubsub.subscribe(USER_INVALIDATION_CHANNEL)
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Cancel the listener and close the pub/sub connection."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+        self._redis = None
+        self._pubsub = None
+        self._listener = None
+
+    def publish(self, user_ids: Iterable[UUID]) -> None:
+        """Announce changed users without blocking the commit that changed them."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._redis is None:
+            return
+        task = loop.create_task(self._publish(list(user_ids)))
+        self._publishing.add(task)
+        task.add_done_callback(self._publishing.discard)
+
+    async def _publish(self, user_ids: list[UUID]) -> None:
+        assert self._redis is not None
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    pipe.publish(USER_INVALIDATION_CHANNEL, str(user_id))
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning("user_invalidation_publish_failed", error=str(e))
+
+    async def _listen(self) -> None:
+        assert self._pubsub is not None
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("user_invalidation_listen_failed", error=str(e))
+                # Invalidations may have been missed while disconnected
+                user_cache.clear()
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+
+            data = message["data"]
+            if isinstance(data, bytes):
+                data = data.decode()
+            try:
+                user_cache.pop(UUID(data))
+            except ValueError:
+                continue
+
+user_invalidations = UserInvalidations()
+
+_CHANGED_USERS = "changed_users"
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user_snapshot(mapper, connection, target: User) -> None:
+    """Drop the cached snapshot and remember the user for publishing on commit."""
+    user_cache.pop(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_USERS, set()).add(target.id)
+
+@event.listens_for(TrackedSession, "after_commit")
+def _publish_user_invalidations(session: Session) -> None:
+    user_ids = session.info.pop(_CHANGED_USERS, None)
+    if user_ids:
+        user_invalidations.publish(user_ids)
+
+@event.listens_for(TrackedSession, "after_rollback")
+def _discard_user_invalidations(session: Session) -> None:
+    session.info.pop(_CHANGED_USERS, None)
+
+def _decode_token(token: str) -> TokenPayload:
+    """Verify a JWT, reusing a previous verification of the same token."""
+    claims = jwt.get_unverified_claims(token)
+    jti = claims.get("jti")
+    if not isinstance(jti, str):
+        # Malformed jtis are left for full verification to reject
+        jti = None
+
+    cached = token_cache.get(jti) if jti else None
+    if cached is not None:
+        cached_token, token_data = cached
+        if hmac.compare_digest(cached_token, token):
+            if token_data.exp > datetime.now(UTC):
+                return token_data
+            token_cache.pop(jti)
+            raise JWTError("Signature has expired.")
+
+    payload = jwt.decode(
+        token,
+        settings.CLERK_SECRET_KEY.get_secret_value(),
+        algorithms=[settings.JWT_ALGORITHM],
+    )
+    token_data = TokenPayload(**payload)
+
+    remaining = (token_data.exp - datetime.now(UTC)).total_seconds()
+    token_cache.set(token_data.jti, (token, token_data), ttl=remaining)
+    return token_data
+
+async def _load_user(db: AsyncSession, user_id: UUID, replica: bool = False) -> User | None:
+    """Load a user, attaching a cached snapshot to the session when available."""
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        db.add(user)
+        return user
+
+    result = await db.execute(
+        select(User).where(User.id == user_id)
+    )
+    user = result.scalar_one_or_none()
+
+    if user is None and replica and has_replica():
+        # A member who just signed up may not have reached the replica yet
+        async with async_session_factory() as primary:
+            user = await primary.scalar(select(User).where(User.id == user_id))
+
+    if user is not None:
+        user_cache.set(user_id, {key: copy(getattr(user, key)) for key in _user_columns})
+    return user
+
+async def require_metrics_token(
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(metrics_security)],
+) -> None:
+    """Admit internal callers presenting METRICS_TOKEN; without one configured the route is hidden."""
+    if settings.METRICS_TOKEN is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    expected = settings.METRICS_TOKEN.get_secret_value().encode()
+    if credentials is None or not hmac.compare_digest(credentials.credentials.encode(), expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+async def _authenticate(token: str, db: AsyncSession, replica: bool = False) -> User:
+    """Resolve a bearer token to an active user attached to `db`."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -26,47 +234,56 @@ async def get_current_user(
 
     try:
         # Verify JWT token
-        token = credentials.credentials
-        payload = jwt.decode(
-            token,
-            settings.CLERK_SECRET_KEY.get_secret_value(),
-            algorithms=[settings.JWT_ALGORITHM],
-        )
-        token_data = TokenPayload(**payload)
+        token_data = _decode_token(token)
+    except (JWTError, ValueError):
+        raise credentials_exception
+
+    # Get user from cache or database
+    user = await _load_user(db, token_data.sub, replica)
+
+    if user is None:
+        raise credentials_exception
 
-        # Get user from database
-        result = await db.execute(
-            select(User).where(User.id == token_data.sub)
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Inactive user",
         )
-        user = result.scalar_one_or_none()
 
-        if user is None:
-            raise credentials_exception
+    return user
 
-        if not user.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Inactive user",
-            )
+async def get_current_user(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> User:
+    """Get the current authenticated user from JWT token, on the request's session."""
+    return await _authenticate(credentials.credentials, db)
 
-        return user
+async def get_current_reader(
+    credentials: Annotated[HTTPAuthorizationCredentials, Depends(security)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+) -> User:
+    """Get the current user for routes that only read through `get_read_db`.
 
-    except JWTError:
-        raise credentials_exception
+    The user shares the route's read-only session, possibly on the replica, so
+    one connection serves the request; routes that modify the user or write
+    anything must use `ActiveUser` with `get_db` instead.
+    """
+    return await _authenticate(credentials.credentials, db, replica=True)
 
-# Type alias for dependency injection
+# Type aliases for dependency injection
 CurrentUser = Annotated[User, Depends(get_current_user)]
+ReadOnlyUser = Annotated[User, Depends(get_current_reader)]
 
 async def get_current_active_user(
     current_user: CurrentUser,
-) -> AsyncGenerator[User, None]:
-    """Get the current active user."""
-    if not current_user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Inactive user",
-        )
-    yield current_user
+) -> User:
+    """Get the current active user.
+
+    `get_current_user` already rejects inactive users, so this only exists to keep
+    the `ActiveUser` alias stable for routers.
+    """
+    return current_user
 
 # Type alias for dependency injection
-ActiveUser = Annotated[User, Depends(get_current_active_user)] 
\ No newline at end of file
+ActiveUser = Annotated[User, Depends(get_current_active_user)]
@@ -1,9 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 from structlog import get_logger
 
 from apps.api.core.config import settings
+from apps.api.core.deltas import delta_hub
 from apps.api.core.logging import RequestIDMiddleware, configure_logging
+from apps.api.core.redis import close_redis, init_redis
+from apps.api.core.storage import LOCAL_ARTIFACTS_PATH
+from apps.api.deps.auth import user_invalidations
 from apps.api.routers import auth, deltas, match, newsletter, system
 
 logger = get_logger()
@@ -40,13 +45,27 @@ def create_application() -> FastAPI:
     app.include_router(newsletter.router, prefix="/v1", tags=["newsletter"])
     app.include_router(system.router, prefix="/v1", tags=["system"])
 
+    # Serve locally stored artifacts in development; deployments redirect to GCS
+    if settings.NEWSLETTER_STORAGE_BACKEND == "local":
+        app.mount(
+            LOCAL_ARTIFACTS_PATH,
+            StaticFiles(directory=settings.NEWSLETTER_LOCAL_STORAGE_PATH, check_dir=False),
+            name="artifacts",
+        )
+
     @app.on_event("startup")
     async def startup_event():
         logger.info("Starting up alpha.me API", version=settings.API_VERSION)
+        redis = await init_redis()
+        await delta_hub.start(redis)
+        await user_invalidations.start(redis)
 
     @app.on_event("shutdown")
     async def shutdown_event():
         logger.info("Shutting down alpha.me API")
+        await user_invalidations.stop()
+        await delta_hub.stop()
+        await close_redis()
 
     return app
 
@@ -0,0 +1,23 @@
+"""Database models.
+
+Importing any model module imports this package first, so every mapped class is
+registered before relationships between them are configured.
+"""
+
+from apps.api.models.activity import Activity
+from apps.api.models.ingestion import IngestionWatermark
+from apps.api.models.match import Match
+from apps.api.models.narrative import Narrative, NarrativeClusterState
+from apps.api.models.newsletter import Newsletter
+from apps.api.models.user import User, user_integrations
+
+__all__ = [
+    "Activity",
+    "IngestionWatermark",
+    "Match",
+    "Narrative",
+    "NarrativeClusterState",
+    "Newsletter",
+    "User",
+    "user_integrations",
+]
@@ -0,0 +1,70 @@
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Index,
+    String,
+    UniqueConstraint,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from apps.api.core.config import settings
+from apps.api.core.database import Base
+from apps.api.models.types import Vector
+
+# Id of the writing transaction as a bigint; xid8 values stay far below 2**63
+CURRENT_XID = text("pg_current_xact_id()::text::bigint")
+
+class Activity(Base):
+    """A single item ingested from a connected provider (email, event, tweet, ...)."""
+    __tablename__ = "activities"
+    __table_args__ = (
+        UniqueConstraint("user_id", "provider", "external_id"),
+        # Keyset pagination for the delta feed walks (change_xid, id) per user
+        Index("ix_activities_user_change_id", "user_id", "change_xid", "id"),
+    )
+
+    id: Mapped[UUID] = mapped_column(PGUUID, primary_key=True, default=uuid4)
+    user_id: Mapped[UUID] = mapped_column(PGUUID, ForeignKey("users.id"), nullable=False)
+    provider: Mapped[str] = mapped_column(String, nullable=False)
+    external_id: Mapped[str] = mapped_column(String, nullable=False)
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    title: Mapped[str | None] = mapped_column(String)
+    content: Mapped[str | None] = mapped_column(String)
+    url: Mapped[str | None] = mapped_column(String)
+    is_private: Mapped[bool] = mapped_column(Boolean, default=False)
+    extra: Mapped[dict] = mapped_column("metadata", JSONB, default=dict)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    # Embedding of title and content; content_hash lets identical text reuse it
+    content_hash: Mapped[str | None] = mapped_column(String, index=True)
+    embedding: Mapped[list[float] | None] = mapped_column(Vector(settings.EMBEDDING_DIMENSIONS))
+    embedded_at: Mapped[datetime | None] = mapped_column(DateTime)
+    narrative_id: Mapped[UUID | None] = mapped_column(
+        PGUUID, ForeignKey("narratives.id", ondelete="SET NULL"), index=True
+    )
+    # Compared with the narrative's summarized_at to find activities its summary lacks
+    narrative_assigned_at: Mapped[datetime | None] = mapped_column(DateTime)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
+    # Transaction that last changed what members see; orders the delta feed, so
+    # writes to derived columns leave it alone
+    change_xid: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=CURRENT_XID)
+
+    # Relationships
+    user = relationship("User", back_populates="activities")
+
+    def __repr__(self) -> str:
+        return f"<Activity {self.provider}:{self.external_id}>"
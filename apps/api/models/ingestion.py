@@ -0,0 +1,26 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import DateTime, ForeignKey, String
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from apps.api.core.database import Base
+
+
+class IngestionWatermark(Base):
+    """Resume point of incremental ingestion for a user and provider."""
+    __tablename__ = "ingestion_watermarks"
+
+    user_id: Mapped[UUID] = mapped_column(PGUUID, ForeignKey("users.id"), primary_key=True)
+    provider: Mapped[str] = mapped_column(String, primary_key=True)
+    cursor: Mapped[str | None] = mapped_column(String)
+    since: Mapped[datetime | None] = mapped_column(DateTime)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
+
+    def __repr__(self) -> str:
+        return f"<IngestionWatermark {self.user_id}:{self.provider}>"
@@ -0,0 +1,41 @@
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from apps.api.core.database import Base
+
+
+class Match(Base):
+    """A recommended pairing of two members and the feedback it received."""
+    __tablename__ = "matches"
+    __table_args__ = (
+        UniqueConstraint("user_id", "matched_user_id"),
+        Index("ix_matches_user_rank", "user_id", "rank"),
+    )
+
+    id: Mapped[UUID] = mapped_column(PGUUID, primary_key=True, default=uuid4)
+    user_id: Mapped[UUID] = mapped_column(PGUUID, ForeignKey("users.id"), nullable=False)
+    matched_user_id: Mapped[UUID] = mapped_column(PGUUID, ForeignKey("users.id"), nullable=False)
+    score: Mapped[float] = mapped_column(Float, nullable=False)
+    rank: Mapped[int | None] = mapped_column(Integer)
+    status: Mapped[str] = mapped_column(String, default="proposed")  # proposed, accepted, declined
+    rating: Mapped[int | None] = mapped_column(Integer)
+    notes: Mapped[str | None] = mapped_column(String)
+    reasons: Mapped[dict] = mapped_column(JSONB, default=dict)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
+
+    # Relationships
+    user = relationship("User", foreign_keys=[user_id], back_populates="matches")
+    matched_user = relationship("User", foreign_keys=[matched_user_id], back_populates="matched_by")
+
+    def __repr__(self) -> str:
+        return f"<Match {self.user_id} -> {self.matched_user_id}>"
@@ -0,0 +1,58 @@
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from apps.api.core.config import settings
+from apps.api.core.database import Base
+from apps.api.models.types import Vector
+
+
+class Narrative(Base):
+    """A thread of related activities that newsletters are written from."""
+    __tablename__ = "narratives"
+
+    id: Mapped[UUID] = mapped_column(PGUUID, primary_key=True, default=uuid4)
+    user_id: Mapped[UUID] = mapped_column(
+        PGUUID, ForeignKey("users.id"), index=True, nullable=False
+    )
+    title: Mapped[str | None] = mapped_column(String)
+    summary: Mapped[str | None] = mapped_column(String)
+    # Rolling summary covers activities assigned up to this point
+    summarized_at: Mapped[datetime | None] = mapped_column(DateTime)
+
+    # Cluster state; a narrative with no centroid no longer receives activities
+    centroid: Mapped[list[float] | None] = mapped_column(Vector(settings.EMBEDDING_DIMENSIONS))
+    size: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
+
+    # Relationships
+    user = relationship("User", back_populates="narratives")
+
+    def __repr__(self) -> str:
+        return f"<Narrative {self.id}>"
+
+class NarrativeClusterState(Base):
+    """Per-user progress of incremental narrative clustering."""
+    __tablename__ = "narrative_cluster_states"
+
+    user_id: Mapped[UUID] = mapped_column(PGUUID, ForeignKey("users.id"), primary_key=True)
+    # Latest activity embedded_at already considered for assignment
+    watermark: Mapped[datetime | None] = mapped_column(DateTime)
+    reclustered_at: Mapped[datetime | None] = mapped_column(DateTime)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
+
+    def __repr__(self) -> str:
+        return f"<NarrativeClusterState {self.user_id}>"
@@ -0,0 +1,35 @@
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from sqlalchemy import DateTime, ForeignKey, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from apps.api.core.database import Base
+
+
+class Newsletter(Base):
+    """A generated newsletter issue for a member."""
+    __tablename__ = "newsletters"
+
+    id: Mapped[UUID] = mapped_column(PGUUID, primary_key=True, default=uuid4)
+    user_id: Mapped[UUID] = mapped_column(
+        PGUUID, ForeignKey("users.id"), index=True, nullable=False
+    )
+    title: Mapped[str | None] = mapped_column(String)
+    content: Mapped[str | None] = mapped_column(String)
+    published_at: Mapped[datetime | None] = mapped_column(DateTime)
+
+    # Rendered page in blob storage; compressed variants add a suffix per encoding
+    artifact_key: Mapped[str | None] = mapped_column(String)
+    etag: Mapped[str | None] = mapped_column(String)
+    encodings: Mapped[list[str]] = mapped_column(ARRAY(String), default=list)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    # Relationships
+    user = relationship("User", back_populates="newsletters")
+
+    def __repr__(self) -> str:
+        return f"<Newsletter {self.id}>"
@@ -0,0 +1,28 @@
+from typing import Any
+
+from sqlalchemy.types import UserDefinedType
+
+
+class Vector(UserDefinedType):
+    """pgvector `vector(n)` column, exchanged with the driver as text."""
+    cache_ok = True
+
+    def __init__(self, dimensions: int) -> None:
+        self.dimensions = dimensions
+
+    def get_col_spec(self, **kw: Any) -> str:
+        return f"vector({self.dimensions})"
+
+    def bind_processor(self, dialect: Any) -> Any:
+        def process(value: Any) -> str | None:
+            if value is None or isinstance(value, str):
+                return value
+            return "[" + ",".join(f"{float(v):.7g}" for v in value) + "]"
+        return process
+
+    def result_processor(self, dialect: Any, coltype: Any) -> Any:
+        def process(value: Any) -> list[float] | None:
+            if value is None or isinstance(value, list):
+                return value
+            return [float(v) for v in value.strip("[]").split(",") if v]
+        return process
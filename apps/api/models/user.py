@@ -1,12 +1,13 @@
 from datetime import datetime
-from typing import List
 from uuid import UUID, uuid4
 
-from sqlalchemy import Boolean, Column, DateTime, ForeignKey, String, Table
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Index, String, Table
 from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from apps.api.core.config import settings
 from apps.api.core.database import Base
+from apps.api.models.types import Vector
 
 # Association table for user integrations
 user_integrations = Table(
@@ -25,6 +26,16 @@ user_integrations = Table(
 class User(Base):
     """User model for authentication and profile data."""
     __tablename__ = "users"
+    __table_args__ = (
+        # ANN index used for match candidate generation
+        Index(
+            "ix_users_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
 
     id: Mapped[UUID] = mapped_column(PGUUID, primary_key=True, default=uuid4)
     email: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
@@ -44,7 +55,19 @@ class User(Base):
     location: Mapped[str | None] = mapped_column(String)
     website: Mapped[str | None] = mapped_column(String)
     avatar_url: Mapped[str | None] = mapped_column(String)
-    tags: Mapped[List[str]] = mapped_column(ARRAY(String), default=list)
+    tags: Mapped[list[str]] = mapped_column(ARRAY(String), default=list)
+
+    # Mission embedding aggregated from recent activities. Both vectors are
+    # deferred: matching selects them by column, and loading a user for a
+    # request has no use for them
+    embedding: Mapped[list[float] | None] = mapped_column(
+        Vector(settings.EMBEDDING_DIMENSIONS), deferred=True
+    )
+    embedding_updated_at: Mapped[datetime | None] = mapped_column(DateTime)
+    # Learned online from match ratings; shifts the query used for matching
+    preference_embedding: Mapped[list[float] | None] = mapped_column(
+        Vector(settings.EMBEDDING_DIMENSIONS), deferred=True
+    )
 
     # Relationships
     activities = relationship("Activity", back_populates="user")
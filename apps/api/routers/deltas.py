@@ -1,6 +1,87 @@
-from fastapi import APIRouter
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.api.core.config import settings
+from apps.api.core.database import get_read_db, read_session_factory
+from apps.api.core.deltas import Position, decode_cursor, delta_hub, fetch_deltas
+from apps.api.deps.auth import ReadOnlyUser
+from apps.api.schemas.deltas import DeltaPage
 
 router = APIRouter()
 
-# TODO: Implement deltas router endpoints
-# This is a placeholder router for future implementation 
\ No newline at end of file
+def _parse_cursor(cursor: str | None) -> Position | None:
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        ) from e
+
+@router.get("/deltas", response_model=DeltaPage)
+async def list_deltas(
+    current_user: ReadOnlyUser,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=settings.DELTAS_MAX_PAGE_SIZE)] = settings.DELTAS_PAGE_SIZE,
+) -> DeltaPage:
+    """List activity changes after a cursor, oldest first."""
+    return await fetch_deltas(db, current_user.id, _parse_cursor(cursor), limit)
+
+@router.get("/deltas/stream")
+async def stream_deltas(
+    current_user: ReadOnlyUser,
+    cursor: str | None = None,
+    last_event_id: Annotated[str | None, Header()] = None,
+) -> StreamingResponse:
+    """Stream activity changes as Server-Sent Events.
+
+    Each event's `id` is its cursor, so a reconnecting client sending
+    `Last-Event-ID` resumes exactly after the last event it received.
+    """
+    position = _parse_cursor(last_event_id or cursor)
+    return StreamingResponse(
+        _event_stream(current_user.id, position),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+def _format_event(cursor: str, data: str) -> str:
+    return f"id: {cursor}\nevent: delta\ndata: {data}\n\n"
+
+async def _read_page(user_id: UUID, position: Position | None) -> DeltaPage:
+    # A short-lived session per page, so idle streams hold no connection
+    async with read_session_factory() as db:
+        return await fetch_deltas(db, user_id, position, settings.DELTAS_PAGE_SIZE)
+
+async def _event_stream(user_id: UUID, position: Position | None) -> AsyncIterator[str]:
+    # Subscribe before reading so a notification sent in between still wakes us
+    async with delta_hub.subscribe(user_id) as wakeups:
+        yield f"retry: {settings.DELTAS_SSE_RETRY_MS}\n\n"
+
+        while True:
+            page = await _read_page(user_id, position)
+            for delta in page.items:
+                yield _format_event(delta.cursor, delta.model_dump_json())
+            if page.next_cursor is not None:
+                position = decode_cursor(page.next_cursor)
+            if page.has_more:
+                continue
+
+            try:
+                await asyncio.wait_for(wakeups.get(), timeout=settings.DELTAS_SSE_KEEPALIVE_SECONDS)
+            except TimeoutError:
+                # Rows held back by another transaction are not announced again,
+                # so the table is also re-read on every keep-alive
+                yield ": keep-alive\n\n"
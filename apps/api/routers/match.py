@@ -1,6 +1,63 @@
-from fastapi import APIRouter
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.api.core.database import get_read_db
+from apps.api.core.tasks import enqueue
+from apps.api.deps.auth import ReadOnlyUser
+from apps.api.models.match import Match
+from apps.api.models.user import User
+from apps.api.schemas.match import MatchFeedback, MatchList, MatchOut
 
 router = APIRouter()
 
-# TODO: Implement match router endpoints
-# This is a placeholder router for future implementation 
\ No newline at end of file
+@router.get("", response_model=MatchList)
+async def list_matches(
+    current_user: ReadOnlyUser,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+) -> MatchList:
+    """Return the member's precomputed recommendations, best first."""
+    # Served from the ix_matches_user_rank index; nothing is scored on the request path
+    result = await db.execute(
+        select(
+            Match.id,
+            Match.matched_user_id,
+            User.display_name,
+            User.avatar_url,
+            Match.score,
+            Match.rank,
+            Match.status,
+            Match.reasons,
+            Match.created_at,
+        )
+        .join(User, User.id == Match.matched_user_id)
+        .where(Match.user_id == current_user.id, Match.rank.is_not(None))
+        .order_by(Match.rank)
+    )
+    return MatchList(items=[MatchOut(**row._mapping) for row in result.all()])
+
+@router.post("/{match_id}/feedback", status_code=status.HTTP_202_ACCEPTED)
+async def submit_feedback(
+    match_id: UUID,
+    feedback: MatchFeedback,
+    current_user: ReadOnlyUser,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+) -> dict:
+    """Queue a rating for one of the member's recommendations."""
+    owner = await db.scalar(select(Match.user_id).where(Match.id == match_id))
+    if owner != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Match not found",
+        )
+    task_id = await enqueue(
+        "apps.workers.tasks.ai.process_match_feedback",
+        str(match_id),
+        feedback.rating,
+        feedback.notes,
+        queue="ai",
+    )
+    return {"status": "queued", "task_id": task_id}
@@ -1,6 +1,97 @@
-from fastapi import APIRouter
+from typing import Annotated, NamedTuple
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.api.core.cache import TTLCache
+from apps.api.core.config import settings
+from apps.api.core.database import get_read_db
+from apps.api.core.storage import get_blob_store
+from apps.api.models.newsletter import Newsletter
 
 router = APIRouter()
 
-# TODO: Implement newsletter router endpoints
-# This is a placeholder router for future implementation 
\ No newline at end of file
+class NewsletterArtifact(NamedTuple):
+    key: str
+    etag: str
+    encodings: tuple[str, ...]
+
+# Published artifacts never change, so their location can be cached for as long as memory allows
+artifact_cache: TTLCache[NewsletterArtifact] = TTLCache(
+    "newsletter_artifacts",
+    maxsize=10000,
+    ttl=settings.NEWSLETTER_ARTIFACT_MAX_AGE_SECONDS,
+)
+
+# Preferred first
+_ENCODING_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+
+def _accepts(accept_encoding: str | None, encoding: str) -> bool:
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() == encoding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+async def _load_artifact(db: AsyncSession, newsletter_id: UUID) -> NewsletterArtifact:
+    artifact = artifact_cache.get(newsletter_id)
+    if artifact is None:
+        result = await db.execute(
+            select(Newsletter.artifact_key, Newsletter.etag, Newsletter.encodings).where(
+                Newsletter.id == newsletter_id,
+                Newsletter.published_at.is_not(None),
+            )
+        )
+        row = result.one_or_none()
+        if row is None or row.artifact_key is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Newsletter not found",
+            )
+        artifact = NewsletterArtifact(row.artifact_key, row.etag, tuple(row.encodings or ()))
+        artifact_cache.set(newsletter_id, artifact)
+    return artifact
+
+@router.get(
+    "/newsletters/{newsletter_id}",
+    status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+    responses={304: {"description": "Not modified"}, 404: {"description": "Not found"}},
+)
+async def get_newsletter(
+    newsletter_id: UUID,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    if_none_match: Annotated[str | None, Header()] = None,
+    accept_encoding: Annotated[str | None, Header()] = None,
+) -> Response:
+    """Redirect to a published newsletter's pre-rendered page in storage.
+
+    The body is never rendered or streamed here; clients that already hold the
+    current version get a 304.
+    """
+    artifact = await _load_artifact(db, newsletter_id)
+    etag = f'"{artifact.etag}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.NEWSLETTER_REDIRECT_MAX_AGE_SECONDS}",
+        "Vary": "Accept-Encoding",
+    }
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    store = get_blob_store()
+    key = artifact.key
+    if store.serves_content_encoding:
+        for encoding, suffix in _ENCODING_SUFFIXES:
+            if encoding in artifact.encodings and _accepts(accept_encoding, encoding):
+                key += suffix
+                break
+    headers["Location"] = store.url(key)
+    return Response(status_code=status.HTTP_307_TEMPORARY_REDIRECT, headers=headers)
@@ -1,61 +1,68 @@
-from typing import Annotated
-
 from fastapi import APIRouter, Depends, HTTPException, status
-from redis.asyncio import Redis, from_url
 from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession
 from structlog import get_logger
 
+from apps.api.core.cache import cache_stats
 from apps.api.core.config import settings
-from apps.api.core.database import get_db
+from apps.api.core.database import engine, pool_stats
+from apps.api.core.deltas import delta_hub
+from apps.api.core.health import ReadinessCheck
+from apps.api.core.logging import get_log_sink
+from apps.api.core.redis import get_redis_client
+from apps.api.deps.auth import require_metrics_token
 
 logger = get_logger(__name__)
 router = APIRouter()
 
-async def get_redis() -> Redis:
-    """Get Redis connection."""
-    redis = from_url(str(settings.REDIS_URL))
-    try:
-        yield redis
-    finally:
-        await redis.close()
+async def _probe_database() -> None:
+    # A bare connection: no session, transaction bookkeeping or commit
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+async def _probe_redis() -> None:
+    await get_redis_client().ping()
+
+readiness = ReadinessCheck(
+    {"database": _probe_database, "redis": _probe_redis},
+    timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS,
+    ttl=settings.HEALTH_CACHE_TTL_SECONDS,
+)
+
+@router.get("/health/live")
+async def liveness_check() -> dict:
+    """Liveness probe; answers without touching any dependency."""
+    return {"status": "alive", "version": settings.API_VERSION}
 
+@router.get("/health/ready")
 @router.get("/health")
-async def health_check(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    redis: Annotated[Redis, Depends(get_redis)],
-) -> dict:
-    """Health check endpoint that verifies database and Redis connectivity."""
-    status = {
-        "status": "healthy",
+async def health_check() -> dict:
+    """Readiness probe that verifies database and Redis connectivity.
+
+    Both are probed concurrently with a timeout, and results are cached for
+    HEALTH_CACHE_TTL_SECONDS so frequent probes do not reach either service.
+    """
+    services = await readiness.services()
+    report = {
+        "status": "healthy" if all(state == "healthy" for state in services.values()) else "degraded",
         "version": settings.API_VERSION,
         "environment": settings.ENVIRONMENT,
-        "services": {
-            "database": "healthy",
-            "redis": "healthy",
-        },
+        "services": services,
     }
 
-    try:
-        # Test database connection
-        await db.execute(text("SELECT 1"))
-    except Exception as e:
-        logger.error("database_health_check_failed", error=str(e))
-        status["services"]["database"] = "unhealthy"
-        status["status"] = "degraded"
-
-    try:
-        # Test Redis connection
-        await redis.ping()
-    except Exception as e:
-        logger.error("redis_health_check_failed", error=str(e))
-        status["services"]["redis"] = "unhealthy"
-        status["status"] = "degraded"
-
-    if status["status"] == "degraded":
+    if report["status"] == "degraded":
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail=status,
+            detail=report,
         )
 
-    return status 
\ No newline at end of file
+    return report
+
+@router.get("/metrics", dependencies=[Depends(require_metrics_token)], include_in_schema=False)
+async def metrics() -> dict:
+    """In-process counters used to size caches and the log pipeline; internal callers only."""
+    return {
+        "caches": cache_stats(),
+        "database": pool_stats(),
+        "logging": get_log_sink().stats(),
+        "deltas": delta_hub.stats(),
+    }
@@ -0,0 +1,24 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class ActivityDelta(BaseModel):
+    """An activity that was created or changed after a cursor."""
+    id: UUID
+    provider: str
+    kind: str
+    title: str | None = None
+    content: str | None = None
+    url: str | None = None
+    is_private: bool = False
+    occurred_at: datetime
+    updated_at: datetime
+    cursor: str  # Opaque position of this delta in the feed
+
+class DeltaPage(BaseModel):
+    """A page of deltas in feed order."""
+    items: list[ActivityDelta] = Field(default_factory=list)
+    next_cursor: str | None = None  # Pass back to resume after the last item
+    has_more: bool = False
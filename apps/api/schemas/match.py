@@ -0,0 +1,26 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
+
+class MatchOut(BaseModel):
+    """A precomputed recommendation."""
+    id: UUID
+    matched_user_id: UUID
+    display_name: str | None = None
+    avatar_url: str | None = None
+    score: float
+    rank: int
+    status: str
+    reasons: dict = Field(default_factory=dict)
+    created_at: datetime
+
+class MatchList(BaseModel):
+    """A member's current recommendations, best first."""
+    items: list[MatchOut] = Field(default_factory=list)
+
+class MatchFeedback(BaseModel):
+    """A member's rating of a recommendation."""
+    rating: int = Field(ge=1, le=5)
+    notes: str | None = Field(default=None, max_length=2000)
@@ -1,23 +1,35 @@
 from celery import Celery
+from celery.signals import setup_logging
 import structlog
 
 from apps.api.core.config import settings
+from apps.api.core.logging import configure_logging
+from apps.workers.scheduling import BROKER_TRANSPORT_OPTIONS
+from apps.workers.serialization import accepted, register_serializers
 
 logger = structlog.get_logger()
 
+register_serializers()
+
 # Create Celery app
 celery_app = Celery(
     "alpha_me",
     broker=str(settings.REDIS_URL),
     backend=str(settings.REDIS_URL),
     include=["apps.workers.tasks"],
+    # Every task resolves its priority lane when it sends a message
+    task_cls="apps.workers.scheduling:LanedTask",
 )
 
 # Configure Celery
 celery_app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
+    task_serializer=f"task-{settings.CELERY_SERIALIZER}",
+    result_serializer=f"result-{settings.CELERY_SERIALIZER}",
+    accept_content=accepted("task"),
+    result_accept_content=accepted("result"),
+    result_expires=settings.CELERY_RESULT_EXPIRES_SECONDS,
+    # Only tasks whose results are read (chord headers) store them
+    task_ignore_result=True,
     timezone="UTC",
     enable_utc=True,
     task_track_started=True,
@@ -27,6 +39,18 @@ celery_app.conf.update(
     task_acks_late=True,
     task_reject_on_worker_lost=True,
     task_default_queue="default",
+    # Each queue is split into one Redis list per priority lane
+    broker_transport_options=BROKER_TRANSPORT_OPTIONS,
+    beat_schedule={
+        "schedule-ingestion": {
+            "task": "apps.workers.tasks.orchestration.schedule_ingestion",
+            "schedule": settings.INGESTION_INTERVAL_SECONDS,
+        },
+        "purge-offloaded-results": {
+            "task": "apps.workers.tasks.orchestration.purge_offloaded_results",
+            "schedule": 3600,
+        },
+    },
     task_queues={
         "default": {
             "exchange": "default",
@@ -43,5 +67,13 @@ celery_app.conf.update(
     },
 )
 
+@setup_logging.connect
+def setup_worker_logging(**kwargs) -> None:
+    """Use the same non-blocking structured logging pipeline as the API."""
+    configure_logging()
+
+# Queue lag and runtime reporting
+import apps.workers.monitoring  # noqa: E402,F401
+
 # Import tasks
 from apps.workers.tasks import * 
\ No newline at end of file
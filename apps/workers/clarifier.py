@@ -0,0 +1,60 @@
+"""Clarifying questions for narratives."""
+import json
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from structlog import get_logger
+
+from apps.api.core.config import settings
+from apps.api.models.activity import Activity
+from apps.api.models.narrative import Narrative
+from libs.ai.llm import ChatRequest, ChatResponse
+
+logger = get_logger(__name__)
+
+SYSTEM_PROMPT = (
+    "You help members of a professional network describe what they are working on. "
+    "Given a thread of their recent activity, ask short, specific questions whose answers "
+    "would make a newsletter about it accurate and interesting. Never ask about private details. "
+    'Reply with JSON of the form {"questions": ["..."]}.'
+)
+
+async def build_clarifier_request(session: AsyncSession, narrative_id: UUID) -> ChatRequest | None:
+    """Build the prompt for a narrative, or None if the narrative does not exist."""
+    narrative = await session.get(Narrative, narrative_id)
+    if narrative is None:
+        return None
+    result = await session.execute(
+        select(Activity.provider, Activity.kind, Activity.title)
+        .where(Activity.narrative_id == narrative_id, Activity.is_private.is_(False))
+        .order_by(Activity.occurred_at.desc())
+        .limit(settings.CLARIFIER_MAX_ACTIVITIES)
+    )
+    lines = [f"- [{row.provider}/{row.kind}] {row.title}" for row in result.all() if row.title]
+    prompt = "\n".join(
+        [
+            f"Narrative: {narrative.title or 'untitled'}",
+            *([f"Summary: {narrative.summary}"] if narrative.summary else []),
+            "Recent activity:",
+            *lines,
+            f"Ask at most {settings.NARRATIVE_MAX_QUESTIONS} questions.",
+        ]
+    )
+    return ChatRequest.build(
+        settings.OPENAI_MODEL,
+        system=SYSTEM_PROMPT,
+        user=prompt,
+        temperature=0.0,  # Deterministic prompts keep regenerations on the cache
+        json_output=True,
+    )
+
+def parse_questions(response: ChatResponse) -> list[dict]:
+    """Extract the questions from a completion, dropping anything malformed."""
+    try:
+        questions = json.loads(response.content).get("questions", [])
+    except (ValueError, AttributeError):
+        logger.warning("clarifier_response_invalid", content=response.content[:200])
+        return []
+    questions = [q.strip() for q in questions if isinstance(q, str) and q.strip()]
+    return [{"question": question} for question in questions[: settings.NARRATIVE_MAX_QUESTIONS]]
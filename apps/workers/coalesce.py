@@ -0,0 +1,130 @@
+"""Coalescing of duplicate per-user task invocations.
+
+While an invocation for a (task, user) pair is still queued, further calls
+are folded into it instead of being sent: the caller gets the queued task's
+result handle, and a `since` argument is widened to the earliest requested.
+When the task starts it takes the pending entry, so calls arriving after that
+queue a new run. A lease lock keeps two runs for the same user from executing
+at once; a run that finds the lease taken is retried later rather than
+dropped, and keeps absorbing duplicate calls while it waits.
+"""
+from datetime import UTC, datetime
+from typing import Any
+from uuid import uuid4
+
+from celery import Task
+from structlog import get_logger
+
+from apps.api.core.config import settings
+from apps.workers.redis import get_redis
+from apps.workers.scheduling import defer
+
+logger = get_logger(__name__)
+
+# Calls carrying these options are part of a workflow and are always sent
+_WORKFLOW_OPTIONS = ("link", "link_error", "chain", "chord", "group_id")
+
+# Empty since means the full history, which covers any other range. A call
+# carrying the pending task's own id is that task being retried, so it is sent.
+_MERGE = """
+local current = redis.call('HGET', KEYS[1], 'task_id')
+if current == ARGV[1] then
+    redis.call('EXPIRE', KEYS[1], ARGV[3])
+    return false
+end
+if current then
+    local since = redis.call('HGET', KEYS[1], 'since')
+    if since ~= '' and (ARGV[2] == '' or ARGV[2] < since) then
+        redis.call('HSET', KEYS[1], 'since', ARGV[2])
+    end
+    return current
+end
+redis.call('HSET', KEYS[1], 'task_id', ARGV[1], 'since', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return false
+"""
+
+_TAKE = """
+local values = redis.call('HMGET', KEYS[1], 'task_id', 'since')
+if values[1] == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return values[2]
+end
+return false
+"""
+
+_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+def _since_key(since: datetime | str | None) -> str:
+    """Encode since as fixed-width naive UTC so Redis can compare it as a string."""
+    if since is None:
+        return ""
+    if isinstance(since, str):
+        since = datetime.fromisoformat(since)
+    if since.tzinfo is not None:
+        since = since.astimezone(UTC).replace(tzinfo=None)
+    return since.strftime("%Y-%m-%dT%H:%M:%S.%f")
+
+class CoalescingTask(Task):
+    """Base task whose first argument is a user id; see the module docstring."""
+    abstract = True
+    # Name of the argument holding the start of the range to process, if any
+    coalesce_since_arg: str | None = None
+
+    def _user_and_since(self, args: tuple, kwargs: dict) -> tuple[str | None, Any]:
+        user_id = args[0] if args else kwargs.get("user_id")
+        since = None
+        if self.coalesce_since_arg:
+            since = args[1] if len(args) > 1 else kwargs.get(self.coalesce_since_arg)
+        return (str(user_id) if user_id is not None else None), since
+
+    def _keys(self, user_id: str) -> tuple[str, str]:
+        return f"coalesce:pending:{self.name}:{user_id}", f"coalesce:lease:{self.name}:{user_id}"
+
+    def apply_async(self, args=None, kwargs=None, task_id=None, **options):
+        args, kwargs = tuple(args or ()), dict(kwargs or {})
+        user_id, since = self._user_and_since(args, kwargs)
+        if user_id is None or any(options.get(name) for name in _WORKFLOW_OPTIONS):
+            return super().apply_async(args, kwargs, task_id=task_id, **options)
+
+        pending, _ = self._keys(user_id)
+        task_id = task_id or str(uuid4())
+        existing = get_redis().eval(
+            _MERGE, 1, pending, task_id, _since_key(since), settings.COALESCE_WINDOW_SECONDS
+        )
+        if existing:
+            logger.debug("task_coalesced", task_name=self.name, user_id=user_id)
+            return self.AsyncResult(existing.decode())
+        return super().apply_async(args, kwargs, task_id=task_id, **options)
+
+    def __call__(self, *args, **kwargs):
+        user_id, since = self._user_and_since(args, kwargs)
+        if user_id is None:
+            return super().__call__(*args, **kwargs)
+
+        redis = get_redis()
+        pending, lease = self._keys(user_id)
+        token = self.request.id or str(uuid4())
+        if not redis.set(lease, token, nx=True, ex=settings.COALESCE_LEASE_SECONDS):
+            # The re-sent message keeps this task id, so the pending entry still points at it
+            logger.info("task_deferred_lease_held", task_name=self.name, user_id=user_id)
+            raise defer(self, settings.COALESCE_RETRY_SECONDS)
+
+        # Take this run's pending entry, which carries any widened since
+        merged = redis.eval(_TAKE, 1, pending, token)
+        if merged is not None and self.coalesce_since_arg:
+            since = merged.decode() or None
+            if len(args) > 1:
+                args = (args[0], since, *args[2:])
+            else:
+                kwargs[self.coalesce_since_arg] = since
+
+        try:
+            return super().__call__(*args, **kwargs)
+        finally:
+            redis.eval(_RELEASE, 1, lease, token)
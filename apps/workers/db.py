@@ -0,0 +1,53 @@
+"""Async database access for synchronous Celery tasks.
+
+Each worker thread gets its own event loop and engine, so pooled connections
+are always used from the loop that created them. State is reset after fork so
+prefork children never reuse a parent's connections.
+"""
+import asyncio
+import os
+import threading
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from apps.api.core.config import settings
+from apps.api.core.database import engine_options
+
+T = TypeVar("T")
+
+_local = threading.local()
+
+def _reset_after_fork() -> None:
+    # Only the forking thread survives, so clearing its state resets the child
+    _local.__dict__.clear()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def _state() -> threading.local:
+    if getattr(_local, "loop", None) is None:
+        _local.loop = asyncio.new_event_loop()
+        _local.engine = create_async_engine(
+            str(settings.DATABASE_URL),
+            **engine_options(settings.WORKER_DATABASE_POOL_SIZE, max_overflow=0),
+        )
+        _local.session_factory = async_sessionmaker(
+            _local.engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autoflush=False,
+        )
+    return _local
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion on this thread's worker event loop."""
+    return _state().loop.run_until_complete(coro)
+
+def worker_session() -> AsyncSession:
+    """Create a session bound to this thread's worker engine."""
+    return _state().session_factory()
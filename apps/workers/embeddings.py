@@ -0,0 +1,128 @@
+"""Activity and user embedding updates used by the embedding tasks."""
+from collections.abc import Sequence
+from datetime import datetime
+from uuid import UUID
+
+import numpy as np
+from redis import Redis
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from structlog import get_logger
+
+from apps.api.core.config import settings
+from apps.api.models.activity import Activity
+from apps.api.models.user import User
+from libs.ai.ann import normalize
+from libs.ai.embeddings import EmbeddingService, RedisEmbeddingCache, content_hash
+
+logger = get_logger(__name__)
+
+class _SharedService:
+    service: EmbeddingService | None = None
+
+_shared = _SharedService()
+
+def get_embedding_service() -> EmbeddingService:
+    """Return this process's embedding service, creating it on first use."""
+    if _shared.service is None:
+        _shared.service = EmbeddingService(
+            settings.EMBEDDING_MODEL,
+            cache=RedisEmbeddingCache(
+                Redis.from_url(str(settings.REDIS_URL)),
+                prefix=f"emb:{settings.EMBEDDING_MODEL}:",
+                ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+            ),
+            max_batch_size=settings.EMBEDDING_BATCH_SIZE,
+            device=settings.EMBEDDING_DEVICE,
+        )
+    return _shared.service
+
+async def embed_activities(session: AsyncSession, activity_ids: Sequence[UUID]) -> int:
+    """Embed activities that do not have an embedding yet.
+
+    Text already embedded for another activity is copied from Postgres; the rest
+    goes through the embedding service, which checks the Redis cache first.
+    Returns the number of activities updated.
+    """
+    result = await session.execute(
+        select(Activity.id, Activity.title, Activity.content).where(
+            Activity.id.in_(activity_ids),
+            Activity.embedding.is_(None),
+        )
+    )
+    rows = result.all()
+    if not rows:
+        return 0
+
+    service = get_embedding_service()
+    texts = {row.id: "\n".join(part for part in (row.title, row.content) if part) for row in rows}
+    hashes = {id_: content_hash(text, service.model_name) for id_, text in texts.items()}
+
+    stored = await session.execute(
+        select(Activity.content_hash, Activity.embedding)
+        .where(
+            Activity.content_hash.in_(set(hashes.values())),
+            Activity.embedding.is_not(None),
+        )
+        .distinct(Activity.content_hash)
+    )
+    vectors = {row[0]: np.asarray(row[1], dtype=np.float32) for row in stored.all()}
+    reused = sum(h in vectors for h in hashes.values())
+
+    missing = {h: texts[id_] for id_, h in hashes.items() if h not in vectors}
+    if missing:
+        encoded = service.embed(list(missing.values()))
+        vectors.update(zip(missing, encoded, strict=True))
+
+    now = datetime.utcnow()
+    activities = Activity.__table__
+    # Derived columns only: updated_at is what members see as the item's last change
+    await session.execute(
+        update(activities)
+        .where(activities.c.id == bindparam("activity_id"))
+        .values(
+            content_hash=bindparam("content_hash"),
+            embedding=bindparam("embedding"),
+            embedded_at=bindparam("embedded_at"),
+            updated_at=activities.c.updated_at,
+        ),
+        [
+            {
+                "activity_id": id_,
+                "content_hash": h,
+                "embedding": vectors[h].tolist(),
+                "embedded_at": now,
+            }
+            for id_, h in hashes.items()
+        ],
+    )
+    await session.commit()
+
+    logger.info(
+        "activity_embeddings_updated",
+        activity_count=len(rows),
+        reused_from_database=reused,
+        **service.stats.as_dict(),
+    )
+    return len(rows)
+
+async def refresh_user_embedding(session: AsyncSession, user_id: UUID) -> bool:
+    """Set a user's embedding to the mean of their recent activity embeddings."""
+    result = await session.execute(
+        select(Activity.embedding)
+        .where(Activity.user_id == user_id, Activity.embedding.is_not(None))
+        .order_by(Activity.occurred_at.desc())
+        .limit(settings.EMBEDDING_USER_ACTIVITY_LIMIT)
+    )
+    embeddings: list[list[float]] = list(result.scalars().all())
+    if not embeddings:
+        return False
+
+    embedding = normalize(np.mean(normalize(np.array(embeddings)), axis=0))
+    await session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(embedding=embedding.tolist(), embedding_updated_at=datetime.utcnow())
+    )
+    await session.commit()
+    return True
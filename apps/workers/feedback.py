@@ -0,0 +1,224 @@
+"""Apply match ratings to the ranking models in periodic batches.
+
+Ratings are queued in Redis as they arrive and applied together once per
+window: the global score weights and the raters' preference vectors get one
+incremental update each, and only the affected members' stored
+recommendations are re-scored. No model is retrained from scratch.
+
+One worker at a time applies a batch, under a lease, and queued ratings are
+only removed once their batch is committed, so a failed batch is applied again
+by the next flush rather than lost.
+"""
+import json
+from collections import defaultdict
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager, suppress
+from dataclasses import asdict
+from datetime import datetime
+from uuid import UUID
+
+import numpy as np
+from redis.exceptions import LockError
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from structlog import get_logger
+
+from apps.api.core.config import settings
+from apps.api.models.match import Match
+from apps.api.models.user import User
+from apps.workers.matching import (
+    default_weights,
+    feedback_bias,
+    query_vectors,
+    scoring_weights,
+    store_weights,
+)
+from apps.workers.redis import get_redis
+from libs.ai.feedback import (
+    array_to_weights,
+    pair_components,
+    reward,
+    update_preference,
+    update_weights,
+    weights_to_array,
+)
+from libs.ai.scoring import ScoringWeights, tag_matrix
+
+logger = get_logger(__name__)
+
+PENDING_KEY = "match:feedback:pending"
+# Set while a flush is scheduled, so each window schedules one
+FLUSH_KEY = "match:feedback:flush"
+# Held while a batch is applied; serializes the weights' read-modify-write
+APPLY_LOCK_KEY = "match:feedback:apply"
+
+def claim_flush() -> bool:
+    """Returns True if no flush is scheduled yet and the caller should schedule one."""
+    return bool(get_redis().set(FLUSH_KEY, 1, nx=True, ex=settings.MATCH_FEEDBACK_WINDOW_SECONDS * 2))
+
+def queue_feedback(match_id: UUID, rating: int) -> bool:
+    """Queue a rating; returns True if the caller should schedule a flush."""
+    get_redis().rpush(PENDING_KEY, json.dumps({"match_id": str(match_id), "rating": rating}))
+    return claim_flush()
+
+def peek_pending(limit: int) -> list[dict]:
+    """Return up to `limit` of the oldest queued ratings without removing them."""
+    return [json.loads(item) for item in get_redis().lrange(PENDING_KEY, 0, limit - 1)]
+
+def ack_pending(count: int) -> None:
+    """Remove the `count` oldest queued ratings once they are applied.
+
+    Only the lease holder removes ratings and new ones are appended at the
+    tail, so these are the ones its last `peek_pending` returned.
+    """
+    if count:
+        get_redis().ltrim(PENDING_KEY, count, -1)
+
+@contextmanager
+def applying() -> Iterator[bool]:
+    """Hold the lease on applying ratings; yields False if another worker holds it."""
+    lock = get_redis().lock(APPLY_LOCK_KEY, timeout=settings.MATCH_FEEDBACK_LOCK_SECONDS)
+    if not lock.acquire(blocking=False):
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        # An expired lease has nothing left to release
+        with suppress(LockError):
+            lock.release()
+
+def has_pending() -> bool:
+    return get_redis().llen(PENDING_KEY) > 0
+
+def release_flush() -> None:
+    get_redis().delete(FLUSH_KEY)
+
+async def _user_rows(session: AsyncSession, user_ids: Sequence[UUID]) -> dict[UUID, tuple]:
+    rows = (
+        await session.execute(
+            select(User.id, User.embedding, User.tags, User.preference_embedding).where(
+                User.id.in_(list(user_ids)),
+                User.embedding.is_not(None),
+            )
+        )
+    ).all()
+    return {row[0]: row for row in rows}
+
+async def rerank_users(session: AsyncSession, user_ids: Sequence[UUID], weights: ScoringWeights) -> int:
+    """Re-score and re-order the stored ranked recommendations of the given users."""
+    matches = (
+        await session.execute(
+            select(Match.id, Match.user_id, Match.matched_user_id).where(
+                Match.user_id.in_(list(user_ids)),
+                Match.rank.is_not(None),
+            )
+        )
+    ).all()
+    if not matches:
+        return 0
+    users = await _user_rows(session, {m.user_id for m in matches} | {m.matched_user_id for m in matches})
+    matches = [m for m in matches if m.user_id in users and m.matched_user_id in users]
+    if not matches:
+        return 0
+
+    raters = list(dict.fromkeys(m.user_id for m in matches))
+    queries = dict(zip(raters, query_vectors([users[id_] for id_ in raters]), strict=True))
+    candidates = [m.matched_user_id for m in matches]
+    tags, _ = tag_matrix(
+        [users[m.user_id][2] or [] for m in matches] + [users[id_][2] or [] for id_ in candidates]
+    )
+    components = pair_components(
+        np.array([queries[m.user_id] for m in matches]),
+        np.array([users[id_][1] for id_ in candidates], dtype=np.float32),
+        tags[: len(matches)],
+        tags[len(matches):],
+        await feedback_bias(session, candidates),
+    )
+    scores = components @ weights_to_array(weights)
+
+    by_user: dict[UUID, list[int]] = defaultdict(list)
+    for i, match in enumerate(matches):
+        by_user[match.user_id].append(i)
+    now = datetime.utcnow()
+    rows = []
+    for indices in by_user.values():
+        ordered = sorted(indices, key=lambda i: -scores[i])
+        rows.extend(
+            {"id": matches[i].id, "score": float(scores[i]), "rank": rank, "updated_at": now}
+            for rank, i in enumerate(ordered, start=1)
+        )
+    await session.execute(update(Match), rows)
+    return len(rows)
+
+async def apply_feedback(session: AsyncSession, events: Sequence[dict]) -> dict:
+    """Update weights and preferences from a batch of ratings, then re-rank the raters."""
+    ratings = {UUID(event["match_id"]): event["rating"] for event in events}
+    if not ratings:
+        return {"ratings": 0}
+    matches = (
+        await session.execute(
+            select(Match.id, Match.user_id, Match.matched_user_id).where(Match.id.in_(list(ratings)))
+        )
+    ).all()
+    users = await _user_rows(session, {m.user_id for m in matches} | {m.matched_user_id for m in matches})
+    matches = [m for m in matches if m.user_id in users and m.matched_user_id in users]
+    if not matches:
+        return {"ratings": len(ratings), "applied": 0}
+
+    candidates = [m.matched_user_id for m in matches]
+    candidate_vectors = np.array([users[id_][1] for id_ in candidates], dtype=np.float32)
+    rewards = np.array([reward(ratings[m.id]) for m in matches], dtype=np.float32)
+    tags, _ = tag_matrix(
+        [users[m.user_id][2] or [] for m in matches] + [users[id_][2] or [] for id_ in candidates]
+    )
+    components = pair_components(
+        query_vectors([users[m.user_id] for m in matches]),
+        candidate_vectors,
+        tags[: len(matches)],
+        tags[len(matches):],
+        await feedback_bias(session, candidates),
+    )
+    weights = array_to_weights(
+        update_weights(
+            weights_to_array(scoring_weights()),
+            components,
+            rewards,
+            prior=weights_to_array(default_weights()),
+            learning_rate=settings.MATCH_FEEDBACK_LEARNING_RATE,
+            l2=settings.MATCH_FEEDBACK_L2,
+        )
+    )
+
+    by_user: dict[UUID, list[int]] = defaultdict(list)
+    for i, match in enumerate(matches):
+        by_user[match.user_id].append(i)
+    await session.execute(
+        update(User),
+        [
+            {
+                "id": user_id,
+                "preference_embedding": update_preference(
+                    users[user_id][3],
+                    candidate_vectors[indices],
+                    rewards[indices],
+                    settings.MATCH_PREFERENCE_LEARNING_RATE,
+                ).tolist(),
+            }
+            for user_id, indices in by_user.items()
+        ],
+    )
+    reranked = await rerank_users(session, list(by_user), weights)
+    await session.commit()
+    # Published only once committed, so a failed batch leaves them unchanged
+    store_weights(weights)
+
+    logger.info(
+        "match_feedback_applied",
+        ratings=len(ratings),
+        applied=len(matches),
+        users=len(by_user),
+        reranked=reranked,
+        weights=asdict(weights),
+    )
+    return {"ratings": len(ratings), "applied": len(matches), "users": len(by_user), "reranked": reranked}
@@ -0,0 +1,235 @@
+"""Per-thread fetch engine used by connectors in worker tasks.
+
+Like the database engine in `apps.workers.db`, pooled HTTP connections belong
+to the event loop that opened them, so each worker thread gets its own engine
+and the state is reset after fork.
+
+Provider quotas are not per thread, though: token buckets and concurrency
+slots live in Redis, so every thread of every worker instance draws from the
+same budget.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections.abc import Hashable
+from http import HTTPStatus
+from uuid import uuid4
+
+from redis.asyncio import Redis as AsyncRedis
+
+from apps.api.core.config import settings
+from apps.workers.redis import ACQUIRE_LEASE, get_async_redis
+from libs.connectors.http import FetchEngine, ProviderLimits, RateLimit, RetryableFetchError
+
+# Published quotas; Google, Twitter and GitHub meter per user token, Exa per API key
+PROVIDER_LIMITS = {
+    "gmail": dict(base_url="https://gmail.googleapis.com/gmail/v1", rate_per_second=40.0, burst=50),
+    "calendar": dict(base_url="https://www.googleapis.com/calendar/v3", rate_per_second=10.0, burst=20),
+    "twitter": dict(base_url="https://api.twitter.com/2", rate_per_second=1.0, burst=5),
+    "github": dict(base_url="https://api.github.com", rate_per_second=1.4, burst=30),
+    "web": dict(base_url="https://api.exa.ai", rate_per_second=5.0, burst=10, per_user_rate=False),
+}
+
+# Idle buckets are dropped after this; a new one starts full, as in memory
+_BUCKET_TTL_SECONDS = 3600
+_SLOT_POLL_SECONDS = 0.05
+
+# Same arithmetic as TokenBucket.acquire; returns '0' once a token is taken,
+# else the seconds to wait before asking again
+_TAKE_TOKEN = """
+local now = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated', 'rate', 'paused_until')
+local rate = tonumber(state[3]) or tonumber(ARGV[2])
+local paused_until = tonumber(state[4]) or 0
+if now < paused_until then
+    return tostring(paused_until - now)
+end
+local tokens = tonumber(state[1]) or capacity
+tokens = math.min(capacity, tokens + math.max(0, now - (tonumber(state[2]) or now)) * rate)
+local delay = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    delay = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now, 'rate', rate)
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return tostring(delay)
+"""
+
+# Same arithmetic as TokenBucket.observe; empty arguments are unreported
+_OBSERVE = """
+local now = tonumber(ARGV[1])
+local max_rate = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[3])
+local retry_after = tonumber(ARGV[4])
+local remaining = tonumber(ARGV[5])
+local reset_after = tonumber(ARGV[6])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated', 'rate', 'paused_until')
+local rate = tonumber(state[3]) or max_rate
+local paused_until = tonumber(state[4]) or 0
+local tokens = tonumber(state[1]) or capacity
+tokens = math.min(capacity, tokens + math.max(0, now - (tonumber(state[2]) or now)) * rate)
+if retry_after then
+    paused_until = math.max(paused_until, now + retry_after)
+end
+if remaining then
+    tokens = math.min(tokens, remaining)
+    if reset_after then
+        if remaining <= 0 then
+            paused_until = math.max(paused_until, now + reset_after)
+            rate = max_rate
+        elseif reset_after > 0 then
+            rate = math.min(max_rate, remaining / reset_after)
+        else
+            rate = max_rate
+        end
+    end
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now, 'rate', rate, 'paused_until', paused_until)
+redis.call('EXPIRE', KEYS[1], ARGV[7])
+"""
+
+_local = threading.local()
+
+def _reset_after_fork() -> None:
+    # Only the forking thread survives, so clearing its state resets the child
+    _local.__dict__.clear()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def _arg(value: float | None) -> float | str:
+    return "" if value is None else value
+
+class RedisTokenBucket:
+    """Token bucket kept in a Redis hash; a drop-in for `TokenBucket`."""
+
+    def __init__(self, redis: AsyncRedis, key: str, rate: float, capacity: int, provider: str = "") -> None:
+        self.redis = redis
+        self.key = key
+        self.max_rate = rate
+        self.capacity = capacity
+        self.provider = provider
+
+    async def acquire(self, max_wait: float | None = None) -> float:
+        """Take one token, waiting as needed; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            delay = float(await self.redis.eval(
+                _TAKE_TOKEN, 1, self.key, time.time(), self.max_rate, self.capacity, _BUCKET_TTL_SECONDS
+            ))
+            if delay <= 0:
+                return waited
+            if max_wait is not None and delay > max_wait:
+                raise RetryableFetchError(self.provider, HTTPStatus.TOO_MANY_REQUESTS, delay)
+            await asyncio.sleep(delay)
+            waited += delay
+
+    async def observe(self, limit: RateLimit) -> None:
+        """Align the bucket with the rate-limit state from a response."""
+        await self.redis.eval(
+            _OBSERVE,
+            1,
+            self.key,
+            time.time(),
+            self.max_rate,
+            self.capacity,
+            _arg(limit.retry_after),
+            _arg(limit.remaining),
+            _arg(limit.reset_after),
+            _BUCKET_TTL_SECONDS,
+        )
+
+class RedisSlots:
+    """Async context manager holding one of `limit` leases in a Redis sorted set.
+
+    The lease expires after `lease_seconds`, so a worker that dies mid-request
+    does not keep its slot.
+    """
+
+    def __init__(self, redis: AsyncRedis, key: str, limit: int, lease_seconds: float) -> None:
+        self.redis = redis
+        self.key = key
+        self.limit = limit
+        self.lease_seconds = lease_seconds
+        self.holder = uuid4().hex
+
+    async def __aenter__(self) -> "RedisSlots":
+        while True:
+            now = time.time()
+            acquired = await self.redis.eval(
+                ACQUIRE_LEASE,
+                1,
+                self.key,
+                now,
+                self.holder,
+                self.limit,
+                now + self.lease_seconds,
+                int(self.lease_seconds) + 1,
+            )
+            if acquired:
+                return self
+            await asyncio.sleep(_SLOT_POLL_SECONDS)
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.redis.zrem(self.key, self.holder)
+
+class SharedFetchEngine(FetchEngine):
+    """Fetch engine whose buckets and concurrency slots are kept in Redis."""
+
+    def __init__(self, providers, *, redis: AsyncRedis, **options) -> None:
+        super().__init__(providers, **options)
+        self.redis = redis
+
+    def _lease_seconds(self, provider: str, attempts: int = 1) -> float:
+        # Longest a live holder keeps a slot: each attempt's request and backoff
+        return attempts * (self.limits(provider).timeout_seconds + self.backoff_max)
+
+    def provider_slot(self, provider: str) -> RedisSlots:
+        return RedisSlots(
+            self.redis,
+            f"http:slots:{provider}",
+            self.limits(provider).concurrency,
+            self._lease_seconds(provider),
+        )
+
+    def user_slot(self, provider: str, user_id: Hashable) -> RedisSlots:
+        # Held across every attempt of a request
+        return RedisSlots(
+            self.redis,
+            f"http:slots:{provider}:{user_id}",
+            self.limits(provider).per_user_concurrency,
+            self._lease_seconds(provider, self.max_retries + 1),
+        )
+
+    def bucket(self, provider: str, user_id: Hashable = None) -> RedisTokenBucket:
+        limits = self.limits(provider)
+        key = f"http:bucket:{provider}:{user_id}" if limits.per_user_rate else f"http:bucket:{provider}"
+        return RedisTokenBucket(self.redis, key, limits.rate_per_second, limits.burst, provider)
+
+def provider_limits() -> dict[str, ProviderLimits]:
+    """Build the limits for every provider from the published quotas and settings."""
+    return {
+        provider: ProviderLimits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS_PER_PROVIDER,
+            concurrency=settings.HTTP_PROVIDER_CONCURRENCY,
+            per_user_concurrency=settings.HTTP_USER_CONCURRENCY,
+            timeout_seconds=settings.HTTP_TIMEOUT_SECONDS,
+            **limits,
+        )
+        for provider, limits in PROVIDER_LIMITS.items()
+    }
+
+def get_fetch_engine() -> FetchEngine:
+    """Return this thread's fetch engine, creating it on first use."""
+    engine = getattr(_local, "engine", None)
+    if engine is None:
+        engine = _local.engine = SharedFetchEngine(
+            provider_limits(),
+            redis=get_async_redis(),
+            max_retries=settings.HTTP_MAX_RETRIES,
+            backoff_max=settings.HTTP_BACKOFF_MAX_SECONDS,
+        )
+    return engine
@@ -0,0 +1,166 @@
+"""Postgres sink and runner for streaming connector ingestion."""
+from collections.abc import Callable, Iterator, Sequence
+from datetime import datetime
+from typing import Any, TypeVar
+from uuid import UUID, uuid4
+
+from redis.asyncio import Redis
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from structlog import get_logger
+
+from apps.api.core.config import settings
+from apps.api.core.deltas import notify_deltas
+from apps.api.models.activity import CURRENT_XID, Activity
+from apps.api.models.ingestion import IngestionWatermark
+from apps.api.models.user import user_integrations
+from apps.workers.http import get_fetch_engine
+from apps.workers.redis import get_async_redis
+from libs.connectors.base import (
+    IngestionResult,
+    Page,
+    Watermark,
+    get_connector,
+    stream_ingest,
+)
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Columns refreshed when a provider reports a changed item
+_UPDATABLE = ("kind", "title", "content", "url", "is_private", "metadata", "occurred_at")
+
+def _chunks(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+class PostgresActivitySink:
+    """Upserts pages into `activities` and advances the watermark in one transaction.
+
+    Rows are written with multi-row `INSERT ... ON CONFLICT` statements, so
+    re-ingested items are skipped unless their content changed, and changed items
+    have their embedding cleared for re-processing.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        redis: Redis | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.redis = redis
+
+    async def load_watermark(self, user_id: UUID, provider: str) -> Watermark:
+        async with self.session_factory() as session:
+            row = await session.get(IngestionWatermark, (user_id, provider))
+            if row is None:
+                return Watermark()
+            return Watermark(cursor=row.cursor, since=row.since)
+
+    async def write(self, user_id: UUID, provider: str, page: Page, watermark: Watermark) -> int:
+        now = datetime.utcnow()
+        changed = 0
+        # One statement cannot upsert the same row twice, and providers can
+        # repeat an item within a page; the last copy is the newest
+        records = list({record.external_id: record for record in page.activities}.values())
+        async with self.session_factory() as session:
+            for chunk in _chunks(records, settings.INGESTION_INSERT_BATCH_SIZE):
+                stmt = insert(Activity).values(
+                    [
+                        {
+                            "id": uuid4(),
+                            "user_id": user_id,
+                            "provider": provider,
+                            "external_id": record.external_id,
+                            "kind": record.kind,
+                            "title": record.title,
+                            "content": record.content,
+                            "url": record.url,
+                            "is_private": record.is_private,
+                            "extra": record.metadata,
+                            "occurred_at": record.occurred_at,
+                            "created_at": now,
+                            "updated_at": now,
+                        }
+                        for record in chunk
+                    ]
+                )
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["user_id", "provider", "external_id"],
+                    set_={
+                        **{name: stmt.excluded[name] for name in _UPDATABLE},
+                        "updated_at": stmt.excluded.updated_at,
+                        "change_xid": CURRENT_XID,
+                        "content_hash": None,
+                        "embedding": None,
+                        "embedded_at": None,
+                    },
+                    where=or_(
+                        *(
+                            Activity.__table__.c[name].is_distinct_from(stmt.excluded[name])
+                            for name in _UPDATABLE
+                        )
+                    ),
+                ).returning(Activity.id)
+                changed += len((await session.execute(stmt)).all())
+
+            stmt = insert(IngestionWatermark).values(
+                user_id=user_id,
+                provider=provider,
+                cursor=watermark.cursor,
+                since=watermark.since,
+                updated_at=now,
+            )
+            await session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=["user_id", "provider"],
+                    set_={
+                        "cursor": stmt.excluded.cursor,
+                        "since": stmt.excluded.since,
+                        "updated_at": stmt.excluded.updated_at,
+                    },
+                )
+            )
+            await session.commit()
+
+        if self.redis is not None and changed:
+            await notify_deltas(self.redis, user_id)
+        return changed
+
+async def load_credentials(session: AsyncSession, user_id: UUID, provider: str) -> dict[str, Any] | None:
+    """Return the stored integration for a provider, or None when not connected."""
+    result = await session.execute(
+        select(user_integrations).where(
+            user_integrations.c.user_id == user_id,
+            user_integrations.c.provider == provider,
+        )
+    )
+    row = result.mappings().one_or_none()
+    return dict(row) if row is not None else None
+
+async def run_ingestion(
+    provider: str,
+    user_id: UUID,
+    since: datetime | None,
+    session_factory: Callable[[], AsyncSession],
+) -> IngestionResult:
+    """Stream one provider's new activities for a user into Postgres."""
+    connector_class = get_connector(provider)
+    credentials: dict[str, Any] | None = {}
+    if connector_class.requires_integration:
+        async with session_factory() as session:
+            credentials = await load_credentials(session, user_id, provider)
+    if credentials is None:
+        logger.info("ingestion_skipped_not_connected", user_id=user_id, provider=provider)
+        return IngestionResult(provider=provider)
+
+    result = await stream_ingest(
+        connector_class(user_id, credentials, http=get_fetch_engine()),
+        PostgresActivitySink(session_factory, get_async_redis()),
+        since=since,
+    )
+
+    logger.info("ingestion_completed", user_id=user_id, **result.as_dict())
+    return result
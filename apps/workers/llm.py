@@ -0,0 +1,45 @@
+"""Per-thread LLM gateway used by generation tasks.
+
+The async OpenAI client and Redis connection belong to the event loop that
+opened them, so, as with `apps.workers.http`, each worker thread gets its own
+gateway and the state is reset after fork. The response cache itself lives in
+Redis and is shared by every worker, and so are the claims that keep identical
+prompts from being sent upstream by more than one of them at a time.
+"""
+import os
+import threading
+
+from redis.asyncio import Redis
+
+from apps.api.core.config import settings
+from libs.ai.llm import LLMGateway, OpenAIBackend, RedisLLMCache, StubBackend
+
+_local = threading.local()
+
+def _reset_after_fork() -> None:
+    # Only the forking thread survives, so clearing its state resets the child
+    _local.__dict__.clear()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def get_llm_gateway() -> LLMGateway:
+    """Return this thread's gateway, creating it on first use."""
+    gateway = getattr(_local, "gateway", None)
+    if gateway is None:
+        if settings.LLM_BACKEND == "stub":
+            backend = StubBackend()
+        else:
+            backend = OpenAIBackend(
+                settings.OPENAI_API_KEY.get_secret_value(),
+                timeout=settings.LLM_TIMEOUT_SECONDS,
+            )
+        gateway = _local.gateway = LLMGateway(
+            backend,
+            cache=RedisLLMCache(
+                Redis.from_url(str(settings.REDIS_URL)),
+                ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                claim_seconds=settings.LLM_CLAIM_SECONDS,
+            ),
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        )
+    return gateway
@@ -0,0 +1,284 @@
+"""Match candidate generation and scoring used by the matchmaking tasks."""
+import random
+import time
+from collections.abc import Sequence
+from dataclasses import asdict
+from datetime import datetime
+from uuid import UUID, uuid4
+
+import numpy as np
+from sqlalchemy import func, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from structlog import get_logger
+
+from apps.api.core.config import settings
+from apps.api.models.match import Match
+from apps.api.models.user import User
+from apps.workers.redis import get_redis
+from libs.ai.ann import (
+    Candidate,
+    InMemoryIndex,
+    PgVectorIndex,
+    SearchReport,
+    timed_search,
+)
+from libs.ai.feedback import FEATURES, personalize
+from libs.ai.scoring import ScoringWeights, exclusion_mask, score_batch, tag_matrix
+
+logger = get_logger(__name__)
+
+# Built in-process indexes are reused across tasks for a short while
+_MEMORY_INDEX_TTL_SECONDS = 300
+
+class _MemoryIndexCache:
+    built_at = 0.0
+    index: InMemoryIndex | None = None
+
+_memory_index = _MemoryIndexCache()
+
+# Score component weights learned from ratings, as a hash of FEATURES
+WEIGHTS_KEY = "match:weights"
+
+# Ratings are 1-5; the midpoint maps to no feedback adjustment
+_RATING_MIDPOINT = 3.0
+_RATING_HALF_RANGE = 2.0
+
+async def _build_memory_index(session: AsyncSession) -> InMemoryIndex:
+    cached = _memory_index
+    if cached.index is not None and time.monotonic() - cached.built_at < _MEMORY_INDEX_TTL_SECONDS:
+        return cached.index
+
+    rows = (
+        await session.execute(
+            select(User.id, User.embedding).where(
+                User.is_active.is_(True),
+                User.embedding.is_not(None),
+            )
+        )
+    ).all()
+    index = InMemoryIndex(n_probe=settings.MATCH_ANN_PROBES)
+    if rows:
+        index.build([row[0] for row in rows], np.array([row[1] for row in rows]))
+    cached.built_at, cached.index = time.monotonic(), index
+    return index
+
+async def matched_user_ids(session: AsyncSession, user_ids: Sequence[UUID]) -> dict[UUID, set[UUID]]:
+    """Return, per user, the members they already acted on.
+
+    Open proposals are not excluded, so every run re-ranks them with the rest.
+    """
+    result = await session.execute(
+        select(Match.user_id, Match.matched_user_id).where(
+            Match.user_id.in_(user_ids),
+            or_(Match.status != "proposed", Match.rating.is_not(None)),
+        )
+    )
+    matched: dict[UUID, set[UUID]] = {user_id: set() for user_id in user_ids}
+    for user_id, matched_user_id in result.all():
+        matched[user_id].add(matched_user_id)
+    return matched
+
+async def generate_candidates(
+    session: AsyncSession,
+    user_id: UUID,
+    embedding: np.ndarray,
+    exclude: set[UUID],
+) -> tuple[list[Candidate], SearchReport]:
+    """Shortlist members above `MATCH_MIN_SCORE` using the configured ANN backend."""
+    index: InMemoryIndex | PgVectorIndex
+    if settings.MATCH_ANN_BACKEND == "memory":
+        index = await _build_memory_index(session)
+    else:
+        index = PgVectorIndex(
+            session,
+            id_column=User.id,
+            embedding_column=User.embedding,
+            filters=[User.is_active.is_(True)],
+            ef_search=settings.MATCH_ANN_EF_SEARCH,
+            probes=settings.MATCH_ANN_PROBES,
+        )
+
+    candidates, report = await timed_search(
+        index,
+        embedding,
+        k=settings.MATCH_ANN_CANDIDATES,
+        min_score=settings.MATCH_MIN_SCORE,
+        exclude=exclude | {user_id},
+        measure_recall=random.random() < settings.MATCH_ANN_RECALL_SAMPLE_RATE,
+    )
+    logger.info("match_candidates_generated", user_id=user_id, **asdict(report))
+    return candidates, report
+
+async def feedback_bias(session: AsyncSession, candidate_ids: Sequence[UUID]) -> np.ndarray:
+    """Per-candidate adjustment in [-1, 1] from the ratings they have received."""
+    result = await session.execute(
+        select(Match.matched_user_id, func.avg(Match.rating))
+        .where(Match.matched_user_id.in_(candidate_ids), Match.rating.is_not(None))
+        .group_by(Match.matched_user_id)
+    )
+    averages = {row[0]: float(row[1]) for row in result.all()}
+    bias = np.array(
+        [averages.get(id_, _RATING_MIDPOINT) for id_ in candidate_ids],
+        dtype=np.float32,
+    )
+    return np.clip((bias - _RATING_MIDPOINT) / _RATING_HALF_RANGE, -1.0, 1.0)
+
+def default_weights() -> ScoringWeights:
+    """Score component weights from settings; the prior for learned weights."""
+    return ScoringWeights(
+        similarity=settings.MATCH_WEIGHT_SIMILARITY,
+        tag_overlap=settings.MATCH_WEIGHT_TAG_OVERLAP,
+        feedback=settings.MATCH_WEIGHT_FEEDBACK,
+    )
+
+def scoring_weights() -> ScoringWeights:
+    """Score component weights learned from feedback, or the defaults before any."""
+    defaults = default_weights()
+    stored = get_redis().hgetall(WEIGHTS_KEY)
+    if not stored:
+        return defaults
+    return ScoringWeights(
+        **{
+            name: float(stored.get(name.encode(), getattr(defaults, name)))
+            for name in FEATURES
+        }
+    )
+
+def store_weights(weights: ScoringWeights) -> None:
+    get_redis().hset(WEIGHTS_KEY, mapping={name: getattr(weights, name) for name in FEATURES})
+
+def query_vectors(rows: Sequence) -> np.ndarray:
+    """Members' embeddings shifted by their learned preferences, from (id, embedding, tags, preference) rows."""
+    embeddings = np.array([row[1] for row in rows], dtype=np.float32)
+    preferences = np.array(
+        [row[3] if row[3] is not None else np.zeros(embeddings.shape[1]) for row in rows],
+        dtype=np.float32,
+    )
+    return personalize(embeddings, preferences, settings.MATCH_PREFERENCE_WEIGHT)
+
+async def find_batch_matches(
+    session: AsyncSession,
+    user_ids: Sequence[UUID],
+) -> dict[UUID, list[dict]]:
+    """Return top recommendations for a batch of users.
+
+    Each user's ANN shortlist is merged into one candidate pool, which is then
+    scored for the whole batch at once with matrix operations.
+    """
+    rows = (
+        await session.execute(
+            select(User.id, User.embedding, User.tags, User.preference_embedding).where(
+                User.id.in_(user_ids),
+                User.embedding.is_not(None),
+            )
+        )
+    ).all()
+    results: dict[UUID, list[dict]] = {user_id: [] for user_id in user_ids}
+    if not rows:
+        return results
+
+    batch_ids = [row[0] for row in rows]
+    queries = query_vectors(rows)
+    excluded = await matched_user_ids(session, batch_ids)
+
+    pool: dict[UUID, None] = {}
+    for user_id, query in zip(batch_ids, queries, strict=True):
+        candidates, _ = await generate_candidates(session, user_id, query, excluded[user_id])
+        pool.update(dict.fromkeys(candidate.id for candidate in candidates))
+    if not pool:
+        return results
+
+    pool_ids = list(pool)
+    pool_rows = (
+        await session.execute(
+            select(User.id, User.embedding, User.tags).where(User.id.in_(pool_ids))
+        )
+    ).all()
+    by_id = {row[0]: row for row in pool_rows}
+    pool_ids = [id_ for id_ in pool_ids if id_ in by_id]
+
+    tags, _ = tag_matrix([row[2] or [] for row in rows] + [by_id[id_][2] or [] for id_ in pool_ids])
+    scored = score_batch(
+        queries,
+        np.array([by_id[id_][1] for id_ in pool_ids]),
+        k=settings.MATCH_MAX_RECOMMENDATIONS,
+        min_score=settings.MATCH_MIN_SCORE,
+        user_tags=tags[: len(rows)],
+        candidate_tags=tags[len(rows):],
+        candidate_bias=await feedback_bias(session, pool_ids),
+        mask=exclusion_mask(batch_ids, pool_ids, [excluded[user_id] for user_id in batch_ids]),
+        weights=scoring_weights(),
+    )
+
+    for user_id, matches in zip(batch_ids, scored.rows(), strict=True):
+        results[user_id] = [
+            {"user_id": str(pool_ids[column]), "score": score}
+            for column, score in matches
+        ]
+    return results
+
+async def store_recommendations(session: AsyncSession, results: dict[UUID, list[dict]]) -> int:
+    """Replace each user's ranked recommendations with freshly scored ones.
+
+    Previous proposals that are not proposed again lose their rank but keep
+    their row, so feedback on them still resolves; the read path only serves
+    ranked rows. Both writes commit together, so readers never see a list
+    that mixes old and new ranks.
+    """
+    if not results:
+        return 0
+    now = datetime.utcnow()
+    proposed = [
+        (user_id, UUID(match["user_id"]))
+        for user_id, matches in results.items()
+        for match in matches
+    ]
+    stale = update(Match).where(
+        Match.user_id.in_(list(results)),
+        Match.status == "proposed",
+        Match.rank.is_not(None),
+    )
+    if proposed:
+        # Re-proposed rows get their new rank from the upsert below
+        stale = stale.where(tuple_(Match.user_id, Match.matched_user_id).not_in(proposed))
+    await session.execute(stale.values(rank=None, updated_at=now))
+    rows = [
+        {
+            "id": uuid4(),
+            "user_id": user_id,
+            "matched_user_id": UUID(match["user_id"]),
+            "score": match["score"],
+            "rank": rank,
+            "status": "proposed",
+            "reasons": {},
+            "created_at": now,
+            "updated_at": now,
+        }
+        for user_id, matches in results.items()
+        for rank, match in enumerate(matches, start=1)
+    ]
+    if rows:
+        stmt = insert(Match).values(rows)
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["user_id", "matched_user_id"],
+                set_={
+                    "score": stmt.excluded.score,
+                    "rank": stmt.excluded.rank,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+        )
+    await session.commit()
+    return len(rows)
+
+async def record_feedback(session: AsyncSession, match_id: UUID, rating: int, notes: str | None) -> bool:
+    """Store a member's rating of a recommendation; returns False if the match is gone."""
+    result = await session.execute(
+        update(Match)
+        .where(Match.id == match_id)
+        .values(rating=rating, notes=notes, updated_at=datetime.utcnow())
+    )
+    await session.commit()
+    return result.rowcount > 0
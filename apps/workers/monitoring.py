@@ -0,0 +1,174 @@
+"""Queue lag and runtime reporting for Celery tasks.
+
+A publish timestamp is stamped into every message's headers; when a worker
+starts the task the time since then, or since its ETA for deferred messages,
+is logged as queue lag, and the task's own runtime is logged when it finishes.
+
+Lag and end-to-end latency are also counted per priority lane in Redis, so
+every worker process and pool type feeds the same per-lane SLO figures.
+"""
+import bisect
+import time
+from datetime import UTC, datetime
+
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from redis.exceptions import RedisError
+from structlog import get_logger
+
+from apps.api.core.config import settings
+from apps.api.core.metrics import Histogram
+from apps.workers.redis import get_redis
+from apps.workers.scheduling import LANES, PUBLISHED_AT_HEADER, current_lane, lane_slo_ms
+
+logger = get_logger(__name__)
+
+# Upper bounds in milliseconds, from interactive work up to long backfills
+LANE_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 300000, 900000, 3600000, 21600000)
+
+_RECORD = """
+redis.call('HINCRBY', KEYS[1], ARGV[1], 1)
+redis.call('HINCRBY', KEYS[1], 'count', 1)
+redis.call('HINCRBYFLOAT', KEYS[1], 'total', ARGV[2])
+redis.call('HINCRBY', KEYS[1], 'breaches', ARGV[3])
+if tonumber(redis.call('HGET', KEYS[1], 'max') or '0') < tonumber(ARGV[2]) then
+    redis.call('HSET', KEYS[1], 'max', ARGV[2])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+"""
+
+_started: dict[str, tuple[float, float | None]] = {}
+
+@before_task_publish.connect
+def stamp_published_at(headers: dict | None = None, **kwargs) -> None:
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+def _published_at(task) -> float | None:
+    request = task.request
+    value = getattr(request, PUBLISHED_AT_HEADER, None)
+    if value is None and request.headers:
+        value = request.headers.get(PUBLISHED_AT_HEADER)
+    return float(value) if value is not None else None
+
+def _due_at(task) -> float | None:
+    """Timestamp a deferred message (countdown or ETA) became runnable."""
+    eta = task.request.eta
+    if not eta:
+        return None
+    if isinstance(eta, str):
+        eta = datetime.fromisoformat(eta)
+    if eta.tzinfo is None:
+        eta = eta.replace(tzinfo=UTC)
+    return eta.timestamp()
+
+def _lane_key(metric: str, lane: str, window: int) -> str:
+    return f"lanes:{metric}:{lane}:{window}"
+
+def _bucket(value: float) -> str:
+    # Same bucketing as Histogram.observe
+    return f"b{bisect.bisect_left(LANE_BUCKETS_MS, value)}"
+
+def record_lane_timing(lane: str, queue_lag_ms: float, latency_ms: float) -> bool:
+    """Count one finished task in its lane's current window; returns whether it met the SLO."""
+    within_slo = latency_ms <= lane_slo_ms(lane)
+    window_seconds = settings.LANE_METRICS_WINDOW_SECONDS
+    window = int(time.time() // window_seconds)
+    pipeline = get_redis().pipeline(transaction=False)
+    for metric, value in (("queue_lag", queue_lag_ms), ("latency", latency_ms)):
+        key = _lane_key(metric, lane, window)
+        pipeline.eval(_RECORD, 1, key, _bucket(value), value, int(not within_slo), 2 * window_seconds)
+    pipeline.execute()
+    return within_slo
+
+def lane_stats() -> dict[str, dict]:
+    """Per-lane queue lag, latency and SLO attainment over the current and previous window."""
+    window = int(time.time() // settings.LANE_METRICS_WINDOW_SECONDS)
+    pipeline = get_redis().pipeline(transaction=False)
+    keys = [
+        (lane, metric, _lane_key(metric, lane, w))
+        for lane in LANES
+        for metric in ("queue_lag", "latency")
+        for w in (window - 1, window)
+    ]
+    for _, _, key in keys:
+        pipeline.hgetall(key)
+
+    histograms: dict[tuple[str, str], Histogram] = {}
+    breaches = dict.fromkeys(LANES, 0)
+    for (lane, metric, _), raw in zip(keys, pipeline.execute(), strict=True):
+        histogram = histograms.setdefault((lane, metric), Histogram(LANE_BUCKETS_MS))
+        values = {field.decode(): value for field, value in raw.items()}
+        for index in range(len(histogram.counts)):
+            histogram.counts[index] += int(values.get(f"b{index}", 0))
+        histogram.count += int(values.get("count", 0))
+        histogram.total += float(values.get("total", 0))
+        histogram.max = max(histogram.max, float(values.get("max", 0)))
+        if metric == "latency":
+            breaches[lane] += int(values.get("breaches", 0))
+
+    stats = {}
+    for lane in LANES:
+        latency = histograms[lane, "latency"]
+        stats[lane] = {
+            "slo_ms": lane_slo_ms(lane),
+            "within_slo": 1 - breaches[lane] / latency.count if latency.count else 1.0,
+            "queue_lag_ms": histograms[lane, "queue_lag"].stats(),
+            "latency_ms": latency.stats(),
+        }
+    return stats
+
+@task_prerun.connect
+def record_task_start(task_id: str | None = None, task=None, **kwargs) -> None:
+    if task_id is None or task is None:
+        return
+    # A countdown or ETA is a requested delay, so deferred messages only lag
+    # from the moment they were due
+    published_at = max(
+        (at for at in (_published_at(task), _due_at(task)) if at is not None), default=None
+    )
+    queue_lag = time.time() - published_at if published_at is not None else None
+    _started[task_id] = (time.perf_counter(), queue_lag)
+
+@task_postrun.connect
+def record_task_end(task_id: str | None = None, task=None, state: str | None = None, **kwargs) -> None:
+    started = _started.pop(task_id, None) if task_id is not None else None
+    if started is None or task is None:
+        return
+    start, queue_lag = started
+    runtime_ms = (time.perf_counter() - start) * 1000
+    lane = current_lane(task)
+    logger.info(
+        "task_timing",
+        task_name=task.name,
+        queue=(task.request.delivery_info or {}).get("routing_key"),
+        lane=lane,
+        state=state,
+        queue_lag_ms=round(queue_lag * 1000, 1) if queue_lag is not None else None,
+        runtime_ms=round(runtime_ms, 1),
+    )
+    # Deferred and retried runs are counted when they finally run
+    if queue_lag is None or state == "RETRY":
+        return
+    latency_ms = queue_lag * 1000 + runtime_ms
+    try:
+        within_slo = record_lane_timing(lane, queue_lag * 1000, latency_ms)
+    except RedisError as e:
+        logger.warning("lane_metrics_failed", lane=lane, error=str(e))
+        return
+    if not within_slo:
+        logger.warning(
+            "lane_slo_missed",
+            task_name=task.name,
+            lane=lane,
+            latency_ms=round(latency_ms, 1),
+            slo_ms=lane_slo_ms(lane),
+        )
+
+def log_stage(stage: str, started_at: float, **fields) -> None:
+    """Log the wall time of a pipeline stage that began at a `time.time()` timestamp."""
+    logger.info(
+        "pipeline_stage_completed",
+        stage=stage,
+        wall_ms=round((time.time() - started_at) * 1000, 1),
+        **fields,
+    )
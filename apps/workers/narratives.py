@@ -0,0 +1,157 @@
+"""Narrative clustering state kept in Postgres for the narrative task."""
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
+import numpy as np
+from sqlalchemy import bindparam, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from structlog import get_logger
+
+from apps.api.core.config import settings
+from apps.api.models.activity import Activity
+from apps.api.models.narrative import Narrative, NarrativeClusterState
+from libs.ai.narratives import Clustering, cluster_incremental, recluster
+
+logger = get_logger(__name__)
+
+def _matrix(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    return np.asarray(vectors, dtype=np.float32).reshape(len(vectors), settings.EMBEDDING_DIMENSIONS)
+
+async def update_narratives(
+    session: AsyncSession,
+    user_id: UUID,
+    since: datetime | None = None,
+) -> list[dict]:
+    """Cluster a user's new activities into narratives and return the narratives that changed.
+
+    Normally only activities embedded since the last run, plus recent ones that
+    fit no narrative yet, are considered. Every NARRATIVE_RECLUSTER_INTERVAL_DAYS
+    the recent history is clustered from scratch instead.
+    """
+    now = datetime.utcnow()
+    state = await session.get(NarrativeClusterState, user_id)
+    if state is None:
+        state = NarrativeClusterState(user_id=user_id)
+        session.add(state)
+    full = state.reclustered_at is None or (
+        now - state.reclustered_at >= timedelta(days=settings.NARRATIVE_RECLUSTER_INTERVAL_DAYS)
+    )
+
+    narratives = list(
+        (
+            await session.execute(
+                select(Narrative).where(Narrative.user_id == user_id, Narrative.centroid.is_not(None))
+            )
+        ).scalars().all()
+    )
+    centroids = _matrix([narrative.centroid for narrative in narratives])
+
+    query = select(Activity.id, Activity.embedding, Activity.embedded_at).where(
+        Activity.user_id == user_id,
+        Activity.embedding.is_not(None),
+    )
+    if full:
+        query = query.order_by(Activity.occurred_at.desc()).limit(settings.NARRATIVE_MAX_ACTIVITIES)
+    else:
+        watermark = since or state.watermark or datetime.min
+        query = query.where(
+            Activity.narrative_id.is_(None),
+            or_(
+                Activity.embedded_at > watermark,
+                Activity.occurred_at >= now - timedelta(days=settings.NARRATIVE_RESIDUE_WINDOW_DAYS),
+            ),
+        )
+    rows = (await session.execute(query)).all()
+    vectors = _matrix([row.embedding for row in rows])
+
+    params = dict(
+        threshold=settings.NARRATIVE_SIMILARITY_THRESHOLD,
+        min_cluster_size=settings.NARRATIVE_CLUSTER_MIN_SIZE,
+        min_samples=settings.NARRATIVE_CLUSTER_MIN_SAMPLES,
+    )
+    if full:
+        clustering = recluster(vectors, centroids, **params)
+    else:
+        sizes = np.array([narrative.size for narrative in narratives], dtype=np.int64)
+        clustering = cluster_incremental(vectors, centroids, sizes, **params)
+
+    targets = _apply(session, user_id, narratives, clustering, retire_unmatched=full)
+    labels = clustering.labels
+    assignments = [
+        {
+            "activity_id": row.id,
+            "narrative_id": targets[label].id if label >= 0 else None,
+            "narrative_assigned_at": now,
+        }
+        for row, label in zip(rows, labels, strict=True)
+        # Incremental runs leave the residue HDBSCAN could not place untouched
+        if full or label >= 0
+    ]
+    if assignments:
+        await session.flush()  # New narratives must exist before activities reference them
+        activities = Activity.__table__
+        # narrative_assigned_at queues the activity for its narrative's next summary;
+        # updated_at is what members see as the item's last change, so it stays
+        await session.execute(
+            update(activities)
+            .where(activities.c.id == bindparam("activity_id"))
+            .values(
+                narrative_id=bindparam("narrative_id"),
+                narrative_assigned_at=bindparam("narrative_assigned_at"),
+                updated_at=activities.c.updated_at,
+            ),
+            assignments,
+        )
+
+    if rows:
+        state.watermark = max(state.watermark or datetime.min, *(row.embedded_at for row in rows))
+    if full:
+        state.reclustered_at = now
+    await session.commit()
+
+    changed = {int(label) for label in labels if label >= 0}
+    logger.info(
+        "narratives_updated",
+        user_id=user_id,
+        mode="full" if full else "incremental",
+        activities=len(rows),
+        assigned=int((labels >= 0).sum()),
+        created=clustering.created,
+        narratives=len(targets),
+    )
+    return [
+        {
+            "id": str(targets[index].id),
+            "size": targets[index].size,
+            "created": bool(clustering.origins[index] < 0),
+        }
+        for index in sorted(changed)
+    ]
+
+def _apply(
+    session: AsyncSession,
+    user_id: UUID,
+    narratives: list[Narrative],
+    clustering: Clustering,
+    retire_unmatched: bool,
+) -> list[Narrative]:
+    """Write centroids and sizes back, creating narratives for new clusters."""
+    targets = []
+    for centroid, size, origin in zip(clustering.centroids, clustering.sizes, clustering.origins, strict=True):
+        if origin >= 0:
+            narrative = narratives[origin]
+        else:
+            narrative = Narrative(id=uuid4(), user_id=user_id)
+            session.add(narrative)
+        narrative.centroid = centroid.tolist()
+        narrative.size = int(size)
+        targets.append(narrative)
+
+    if retire_unmatched:
+        kept = {int(origin) for origin in clustering.origins if origin >= 0}
+        for index, narrative in enumerate(narratives):
+            if index not in kept:
+                narrative.centroid = None
+                narrative.size = 0
+    return targets
@@ -0,0 +1,235 @@
+"""Rolling narrative summaries and newsletter generation.
+
+Each narrative keeps a summary that is only updated with activities that
+arrived since it was last summarized, so raw activity text is sent to the model
+once. Newsletter prompts are then packed from those summaries to a fixed token
+budget, which keeps prompt size flat however long a member's history gets.
+"""
+import asyncio
+import json
+from collections.abc import Sequence
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from structlog import get_logger
+
+from apps.api.core.config import settings
+from apps.api.core.storage import get_blob_store
+from apps.api.models.activity import Activity
+from apps.api.models.narrative import Narrative
+from apps.api.models.newsletter import Newsletter
+from apps.api.models.user import User
+from apps.workers.llm import get_llm_gateway
+from libs.ai.llm import ChatRequest
+from libs.ai.prompts import PackedPrompt, Section, pack_sections, truncate_tokens
+from libs.newsletter.render import build_artifacts, render_page
+from libs.storage.blobs import BlobInfo
+
+logger = get_logger(__name__)
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You maintain a running summary of one thread of a professional's work. "
+    "Update the summary with the new activity, keeping what still matters and dropping "
+    "stale detail. Never include private information. "
+    'Reply with JSON of the form {"title": "...", "summary": "..."}.'
+)
+
+NEWSLETTER_SYSTEM_PROMPT = (
+    "You write a short weekly newsletter about a professional's work for their network, "
+    "in their voice. Use only the threads provided. Reply in Markdown, starting with a "
+    "'# ' title line."
+)
+
+# New activities fetched per narrative before packing them to the input budget
+_SUMMARY_ACTIVITY_LIMIT = 50
+
+def _activity_line(row) -> str:
+    model = settings.OPENAI_MODEL
+    content = truncate_tokens(row.content or "", settings.NARRATIVE_SUMMARY_ACTIVITY_TOKENS, model)
+    return f"- [{row.provider}/{row.kind}] {row.title or ''}{': ' + content if content else ''}"
+
+async def refresh_summaries(session: AsyncSession, narratives: Sequence[Narrative]) -> int:
+    """Fold activities assigned since each narrative's last summary into it; returns how many changed."""
+    if not narratives:
+        return 0
+    ranked = (
+        select(
+            Activity.narrative_id,
+            Activity.provider,
+            Activity.kind,
+            Activity.title,
+            Activity.content,
+            Activity.narrative_assigned_at,
+            func.row_number()
+            .over(partition_by=Activity.narrative_id, order_by=Activity.narrative_assigned_at.desc())
+            .label("rank"),
+        )
+        .where(
+            Activity.is_private.is_(False),
+            or_(
+                *(
+                    and_(
+                        Activity.narrative_id == narrative.id,
+                        Activity.narrative_assigned_at > (narrative.summarized_at or datetime.min),
+                    )
+                    for narrative in narratives
+                )
+            ),
+        )
+        .subquery()
+    )
+    result = await session.execute(select(ranked).where(ranked.c.rank <= _SUMMARY_ACTIVITY_LIMIT))
+    fresh: dict[UUID, list] = {}
+    for row in result.all():
+        fresh.setdefault(row.narrative_id, []).append(row)
+
+    stale = [narrative for narrative in narratives if narrative.id in fresh]
+    if not stale:
+        return 0
+
+    requests = []
+    for narrative in stale:
+        rows = fresh[narrative.id]
+        activity = pack_sections(
+            [Section(key=str(i), text=_activity_line(row), priority=-i) for i, row in enumerate(rows)],
+            settings.NARRATIVE_SUMMARY_INPUT_TOKENS,
+            settings.OPENAI_MODEL,
+            separator="\n",
+        )
+        requests.append(
+            ChatRequest.build(
+                settings.OPENAI_MODEL,
+                system=SUMMARY_SYSTEM_PROMPT,
+                user="\n".join(
+                    [
+                        f"Current title: {narrative.title or '(none)'}",
+                        f"Current summary: {narrative.summary or '(none)'}",
+                        "",
+                        "New activity:",
+                        activity.text,
+                    ]
+                ),
+                max_tokens=settings.NARRATIVE_SUMMARY_MAX_TOKENS + 50,
+                json_output=True,
+            )
+        )
+
+    responses = await get_llm_gateway().complete_many(requests)
+    updated = 0
+    for narrative, response in zip(stale, responses, strict=True):
+        try:
+            parsed = json.loads(response.content)
+            summary = str(parsed["summary"]).strip()
+        except (ValueError, KeyError, TypeError):
+            logger.warning("narrative_summary_invalid", narrative_id=narrative.id)
+            continue
+        narrative.summary = truncate_tokens(summary, settings.NARRATIVE_SUMMARY_MAX_TOKENS, settings.OPENAI_MODEL)
+        if parsed.get("title"):
+            narrative.title = str(parsed["title"]).strip()
+        narrative.summarized_at = max(row.narrative_assigned_at for row in fresh[narrative.id])
+        updated += 1
+    await session.commit()
+    return updated
+
+def build_newsletter_request(user: User, narratives: Sequence[Narrative]) -> tuple[ChatRequest, PackedPrompt]:
+    """Pack narrative summaries, largest first, into the newsletter prompt budget."""
+    sections = [Section(key="member", text=f"Member: {user.display_name or 'this member'}", required=True)]
+    sections.extend(
+        Section(
+            key=str(narrative.id),
+            text=f"## {narrative.title or 'Untitled thread'}\n{narrative.summary}",
+            priority=narrative.size,
+            min_tokens=50,
+        )
+        for narrative in narratives
+        if narrative.summary
+    )
+    packed = pack_sections(sections, settings.NEWSLETTER_PROMPT_TOKEN_BUDGET, settings.OPENAI_MODEL)
+    request = ChatRequest.build(
+        settings.OPENAI_MODEL,
+        system=NEWSLETTER_SYSTEM_PROMPT,
+        user=packed.text,
+        temperature=0.7,
+        max_tokens=settings.NEWSLETTER_MAX_OUTPUT_TOKENS,
+    )
+    return request, packed
+
+def _title(content: str) -> str | None:
+    first = content.lstrip().split("\n", 1)[0]
+    if not first.startswith("# "):
+        return None
+    return first[2:].strip() or None
+
+async def publish_newsletter(newsletter: Newsletter) -> None:
+    """Render an issue once and upload its immutable, pre-compressed variants."""
+    page = render_page(newsletter.title or "Newsletter", newsletter.content or "")
+    digest, artifacts = build_artifacts(f"newsletters/{newsletter.user_id}", page)
+    store = get_blob_store()
+    cache_control = f"public, max-age={settings.NEWSLETTER_ARTIFACT_MAX_AGE_SECONDS}, immutable"
+    for artifact in artifacts:
+        # Keys are content hashes, so an existing blob already holds these bytes
+        if not await asyncio.to_thread(store.exists, artifact.key):
+            await asyncio.to_thread(
+                store.put,
+                artifact.key,
+                artifact.data,
+                BlobInfo(
+                    content_type="text/html; charset=utf-8",
+                    content_encoding=artifact.encoding,
+                    cache_control=cache_control,
+                ),
+            )
+    newsletter.artifact_key = artifacts[0].key
+    newsletter.etag = digest
+    newsletter.encodings = [artifact.encoding for artifact in artifacts if artifact.encoding]
+    newsletter.published_at = datetime.utcnow()
+
+async def generate_newsletter(
+    session: AsyncSession,
+    user_id: UUID,
+    narrative_ids: list[UUID] | None = None,
+) -> dict:
+    """Refresh stale summaries, then write and store a newsletter issue from them."""
+    user = await session.get(User, user_id)
+    if user is None:
+        return {}
+    query = select(Narrative).where(Narrative.user_id == user_id)
+    if narrative_ids:
+        query = query.where(Narrative.id.in_(narrative_ids))
+    else:
+        query = query.where(Narrative.centroid.is_not(None))
+    query = query.order_by(Narrative.size.desc()).limit(settings.NEWSLETTER_MAX_NARRATIVES)
+    narratives = list((await session.execute(query)).scalars().all())
+
+    summarized = await refresh_summaries(session, narratives)
+    if not any(narrative.summary for narrative in narratives):
+        logger.info("newsletter_skipped_no_summaries", user_id=user_id)
+        return {}
+
+    request, packed = build_newsletter_request(user, narratives)
+    response = await get_llm_gateway().complete(request)
+    newsletter = Newsletter(user_id=user_id, title=_title(response.content), content=response.content)
+    session.add(newsletter)
+    await publish_newsletter(newsletter)
+    await session.commit()
+
+    logger.info(
+        "newsletter_generated",
+        user_id=user_id,
+        newsletter_id=newsletter.id,
+        summaries_updated=summarized,
+        prompt_tokens=packed.tokens,
+        narratives_included=len(packed.included) - 1,
+        narratives_truncated=len(packed.truncated),
+        narratives_dropped=len(packed.dropped),
+        cached=response.cached,
+    )
+    return {
+        "id": str(newsletter.id),
+        "title": newsletter.title,
+        "narrative_ids": packed.included[1:],
+        "prompt_tokens": packed.tokens,
+        "artifact_key": newsletter.artifact_key,
+    }
@@ -0,0 +1,67 @@
+"""Per-queue worker profiles.
+
+Ingestion is I/O-bound, so it runs in a large thread pool; each thread already
+gets its own event loop and connections from `apps.workers.db`. AI work is
+CPU- and model-bound, so it runs in a small prefork pool whose parent loads
+the embedding model before forking, letting children share its pages
+copy-on-write. Select a profile with WORKER_PROFILE and run one deployment per
+profile so either side can scale on its own queue depth.
+"""
+from dataclasses import dataclass
+
+from apps.api.core.config import settings
+
+
+@dataclass(frozen=True)
+class WorkerProfile:
+    name: str
+    queues: tuple[str, ...]
+    pool: str
+    concurrency: int
+    # Reserved messages sit outside the priority lanes, so a worker holding
+    # prefetched backfills would run them ahead of newly queued interactive work
+    prefetch_multiplier: int = 1
+    preload_model: bool = False
+
+    def worker_args(self) -> list[str]:
+        """Arguments for `celery worker`."""
+        return [
+            "worker",
+            "--loglevel=info",
+            f"--hostname={self.name}@%h",
+            f"--pool={self.pool}",
+            f"--concurrency={self.concurrency}",
+            f"--prefetch-multiplier={self.prefetch_multiplier}",
+            f"--queues={','.join(self.queues)}",
+        ]
+
+def get_profile(name: str | None = None) -> WorkerProfile:
+    """Return a profile by name, defaulting to WORKER_PROFILE."""
+    profiles = {
+        "ingestion": WorkerProfile(
+            name="ingestion",
+            queues=("ingestion", "default"),
+            # Threads rather than gevent: tasks run asyncio on per-thread loops
+            pool="threads",
+            concurrency=settings.WORKER_INGESTION_CONCURRENCY,
+        ),
+        "ai": WorkerProfile(
+            name="ai",
+            queues=("ai",),
+            pool="prefork",
+            concurrency=settings.WORKER_AI_CONCURRENCY,
+            preload_model=True,
+        ),
+        # Everything in one pool, for development and small deployments
+        "all": WorkerProfile(
+            name="all",
+            queues=("default", "ingestion", "ai"),
+            pool="prefork",
+            concurrency=settings.WORKER_AI_CONCURRENCY,
+            preload_model=True,
+        ),
+    }
+    name = name or settings.WORKER_PROFILE
+    if name not in profiles:
+        raise ValueError(f"Unknown worker profile {name!r}; expected one of {sorted(profiles)}")
+    return profiles[name]
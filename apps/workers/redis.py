@@ -0,0 +1,48 @@
+"""Redis clients for worker code.
+
+The synchronous client is thread-safe and shared by the whole process; its
+pool notices a fork and reconnects in the child. Like the database engine in
+`apps.workers.db`, an asyncio client's pooled connections belong to the event
+loop that opened them, so each worker thread gets its own client and the state
+is reset after fork.
+"""
+import os
+import threading
+from functools import cache
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+from apps.api.core.config import settings
+
+# Takes one of a limited set of leases held in a sorted set, scored by expiry,
+# so holders that die without releasing free their lease when it expires
+ACQUIRE_LEASE = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZSCORE', KEYS[1], ARGV[2]) or redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[3]) then
+    redis.call('ZADD', KEYS[1], ARGV[4], ARGV[2])
+    redis.call('EXPIRE', KEYS[1], ARGV[5])
+    return 1
+end
+return 0
+"""
+
+_local = threading.local()
+
+def _reset_after_fork() -> None:
+    # Only the forking thread survives, so clearing its state resets the child
+    _local.__dict__.clear()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+@cache
+def get_redis() -> Redis:
+    """Return this process's synchronous client."""
+    return Redis.from_url(str(settings.REDIS_URL))
+
+def get_async_redis() -> AsyncRedis:
+    """Return this thread's asyncio client, for use on its worker event loop."""
+    client = getattr(_local, "client", None)
+    if client is None:
+        client = _local.client = AsyncRedis.from_url(str(settings.REDIS_URL))
+    return client
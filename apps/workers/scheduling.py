@@ -0,0 +1,111 @@
+"""Priority lanes and per-user fair share for worker tasks.
+
+Every task message is sent in one of three lanes, carried as its message
+priority. The Redis transport keeps a sub-list per priority and workers pop
+them in priority order, so on each queue interactive work is taken before
+incremental syncs, and those before backfills. A task's lane comes from an
+explicit `lane=` option, else from the task that sent it (so a whole backfill
+pipeline stays in the backfill lane), else from the task class.
+
+Fair share caps how many non-interactive tasks one member runs at once. A
+task that finds its member's slots taken is re-sent a little later, so one
+member's large backfill cannot occupy every worker.
+"""
+import bisect
+import time
+
+from celery import Task, current_task
+from celery.exceptions import Retry
+from structlog import get_logger
+
+from apps.api.core.config import settings
+from apps.workers.redis import ACQUIRE_LEASE, get_redis
+
+logger = get_logger(__name__)
+
+# Redis pops lower priorities first
+LANES = {"interactive": 0, "incremental": 3, "backfill": 6}
+DEFAULT_LANE = "incremental"
+
+_PRIORITIES = sorted(LANES.values())
+_LANE_NAMES = {priority: lane for lane, priority in LANES.items()}
+
+# Shared by the workers and the API's producer so both use the same sub-lists
+BROKER_TRANSPORT_OPTIONS = {"priority_steps": _PRIORITIES, "sep": ":"}
+# Message header carrying the publish time that queue lag is measured from
+PUBLISHED_AT_HEADER = "published_at"
+
+def lane_for(priority: int | None) -> str:
+    """Name the lane a message priority is served in; unset priorities sort first."""
+    if priority is None:
+        return _LANE_NAMES[_PRIORITIES[0]]
+    return _LANE_NAMES[_PRIORITIES[max(bisect.bisect_right(_PRIORITIES, priority) - 1, 0)]]
+
+def lane_slo_ms(lane: str) -> int:
+    return getattr(settings, f"LANE_{lane.upper()}_SLO_MS")
+
+def lane_queue_key(queue: str, lane: str) -> str:
+    """Redis list holding a queue's messages for one lane, as kombu names it."""
+    priority = LANES[lane]
+    return f"{queue}{BROKER_TRANSPORT_OPTIONS['sep']}{priority}" if priority else queue
+
+def current_lane(task: Task) -> str:
+    return lane_for((task.request.delivery_info or {}).get("priority"))
+
+def defer(task: Task, countdown: int) -> Retry:
+    """Re-send the running task after `countdown` seconds without counting it as a retry.
+
+    The message keeps its id, lane and workflow options, so chords still
+    complete. Raise the returned exception to end the current run.
+    """
+    request = task.request
+    signature = task.signature_from_request(request, countdown=countdown, retries=request.retries)
+    signature.apply_async()
+    return Retry(f"Deferred for {countdown}s", when=countdown, sig=signature)
+
+class LanedTask(Task):
+    """Base for every task; resolves the lane of each message it sends."""
+    abstract = True
+    lane = DEFAULT_LANE
+
+    def apply_async(self, args=None, kwargs=None, task_id=None, lane=None, **options):
+        if lane is not None:
+            options["priority"] = LANES[lane]
+        elif options.get("priority") is None:
+            parent = (current_task.request.delivery_info or {}) if current_task else {}
+            priority = parent.get("priority")
+            options["priority"] = LANES[self.lane] if priority is None else priority
+        return super().apply_async(args, kwargs, task_id=task_id, **options)
+
+class FairShareTask(Task):
+    """Base task whose first argument is a user id; see the module docstring."""
+    abstract = True
+
+    def __call__(self, *args, **kwargs):
+        user_id = args[0] if args else kwargs.get("user_id")
+        if user_id is None or self.request.called_directly or current_lane(self) == "interactive":
+            # Interactive work is small and a member is waiting on it
+            return super().__call__(*args, **kwargs)
+
+        redis = get_redis()
+        key = f"fairshare:{user_id}"
+        slot = self.request.id
+        now = time.time()
+        acquired = redis.eval(
+            ACQUIRE_LEASE,
+            1,
+            key,
+            now,
+            slot,
+            settings.FAIR_SHARE_SLOTS,
+            now + settings.FAIR_SHARE_SLOT_SECONDS,
+            settings.FAIR_SHARE_SLOT_SECONDS,
+        )
+        if not acquired:
+            logger.info("task_deferred_fair_share", task_name=self.name, user_id=str(user_id))
+            raise defer(self, settings.FAIR_SHARE_RETRY_SECONDS)
+
+        try:
+            return super().__call__(*args, **kwargs)
+        finally:
+            redis.zrem(key, slot)
@@ -0,0 +1,175 @@
+"""Task and result serializers with size and timing metrics.
+
+`task-json` and `task-msgpack` encode task messages. msgpack is smaller and
+faster, and UUIDs and datetimes round-trip through extension types. It needs the
+optional `msgpack` package, so JSON stays the default.
+
+`result-json` and `result-msgpack` encode results the same way. An encoded
+result larger than CELERY_RESULT_OFFLOAD_BYTES goes to blob storage, and only
+a pointer to it is stored in Redis. Redis expires the pointer with the result;
+`purge_offloaded_results` deletes the blobs once every pointer to them has.
+"""
+import hashlib
+import time
+from collections.abc import Callable
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any
+from uuid import UUID
+
+from kombu.serialization import register
+from kombu.utils import json as kombu_json
+
+from apps.api.core.config import settings
+from apps.api.core.metrics import Histogram
+from libs.storage.blobs import BlobInfo, BlobStore, GCSBlobStore, LocalBlobStore
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+# msgpack extension type codes
+_EXT_UUID = 1
+_EXT_DATETIME = 2
+_EXT_DATE = 3
+
+# Marks a result that was offloaded to blob storage
+_OFFLOADED = "__offloaded__"
+RESULT_PREFIX = "celery-results/"
+# Blobs outlive their pointers by this much, covering the store-to-Redis gap
+_PURGE_GRACE_SECONDS = 3600
+
+_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+class CodecStats:
+    """Encoded sizes and encode/decode times for one serializer in this process."""
+
+    def __init__(self) -> None:
+        self.bytes = Histogram(_SIZE_BUCKETS)
+        self.encode_ms = Histogram()
+        self.decode_ms = Histogram()
+        self.offloaded = 0
+
+    def stats(self) -> dict:
+        return {
+            "bytes": self.bytes.stats(),
+            "encode_ms": self.encode_ms.stats(),
+            "decode_ms": self.decode_ms.stats(),
+            "offloaded": self.offloaded,
+        }
+
+_stats: dict[str, CodecStats] = {}
+
+def serialization_stats() -> dict[str, dict]:
+    return {name: stats.stats() for name, stats in _stats.items()}
+
+def _ext_default(obj: Any) -> Any:
+    if isinstance(obj, UUID):
+        return msgpack.ExtType(_EXT_UUID, obj.bytes)
+    if isinstance(obj, datetime):
+        return msgpack.ExtType(_EXT_DATETIME, obj.isoformat().encode())
+    if isinstance(obj, date):
+        return msgpack.ExtType(_EXT_DATE, obj.isoformat().encode())
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+def _ext_hook(code: int, data: bytes) -> Any:
+    if code == _EXT_UUID:
+        return UUID(bytes=data)
+    if code == _EXT_DATETIME:
+        return datetime.fromisoformat(data.decode())
+    if code == _EXT_DATE:
+        return date.fromisoformat(data.decode())
+    return msgpack.ExtType(code, data)
+
+def msgpack_dumps(obj: Any) -> bytes:
+    return msgpack.packb(obj, default=_ext_default, use_bin_type=True)
+
+def msgpack_loads(data: bytes) -> Any:
+    return msgpack.unpackb(data, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+
+def json_dumps(obj: Any) -> str:
+    # kombu's encoder tags UUIDs, datetimes and dates so they decode back to their types
+    return kombu_json.dumps(obj)
+
+def json_loads(data: str | bytes) -> Any:
+    return kombu_json.loads(data)
+
+@lru_cache
+def get_result_store() -> BlobStore:
+    """Return the store for offloaded results; the local one stands in for GCS in development."""
+    if settings.CELERY_RESULT_STORAGE_BACKEND == "local":
+        return LocalBlobStore(settings.CELERY_RESULT_LOCAL_STORAGE_PATH)
+    return GCSBlobStore(settings.CELERY_RESULT_STORAGE_BUCKET)
+
+def purge_offloaded_results() -> int:
+    """Delete offloaded results older than the result expiry; returns how many.
+
+    Storing an identical result rewrites its blob, so a blob this old has no
+    live pointer left.
+    """
+    cutoff = time.time() - settings.CELERY_RESULT_EXPIRES_SECONDS - _PURGE_GRACE_SECONDS
+    return get_result_store().delete_older_than(RESULT_PREFIX, cutoff)
+
+def _metered(
+    name: str,
+    dumps: Callable[[Any], str | bytes],
+    loads: Callable[[str | bytes], Any],
+    offload: bool = False,
+) -> tuple[Callable[[Any], str | bytes], Callable[[str | bytes], Any]]:
+    stats = _stats.setdefault(name, CodecStats())
+
+    def encode(obj: Any) -> str | bytes:
+        started = time.perf_counter()
+        data = dumps(obj)
+        size = len(data)
+        if offload and size > settings.CELERY_RESULT_OFFLOAD_BYTES:
+            raw = data.encode() if isinstance(data, str) else data
+            # Content-addressed, so identical results share one blob
+            key = f"{RESULT_PREFIX}{hashlib.sha256(raw).hexdigest()}"
+            get_result_store().put(key, raw, BlobInfo())
+            data = dumps({_OFFLOADED: key, "bytes": size})
+            stats.offloaded += 1
+        stats.encode_ms.observe((time.perf_counter() - started) * 1000)
+        stats.bytes.observe(size)
+        return data
+
+    def decode(data: str | bytes) -> Any:
+        started = time.perf_counter()
+        obj = loads(data)
+        if offload and isinstance(obj, dict) and _OFFLOADED in obj:
+            raw = get_result_store().get(obj[_OFFLOADED])
+            if raw is None:
+                raise LookupError(f"Offloaded result {obj[_OFFLOADED]} is missing from storage")
+            obj = loads(raw)
+        stats.decode_ms.observe((time.perf_counter() - started) * 1000)
+        return obj
+
+    return encode, decode
+
+def _codecs() -> list[tuple[str, Callable, Callable, str]]:
+    codecs = [("json", json_dumps, json_loads, "utf-8")]
+    if msgpack is not None:
+        codecs.append(("msgpack", msgpack_dumps, msgpack_loads, "binary"))
+    return codecs
+
+def accepted(role: str) -> list[str]:
+    """Serializer names to accept for a role; plain json covers messages sent before a switch."""
+    return ["json", *(f"{role}-{fmt}" for fmt, *_ in _codecs())]
+
+def register_serializers() -> None:
+    """Register the task and result serializers with kombu."""
+    if settings.CELERY_SERIALIZER == "msgpack" and msgpack is None:
+        raise RuntimeError("CELERY_SERIALIZER is msgpack but the msgpack package is not installed")
+
+    for fmt, dumps, loads, encoding in _codecs():
+        for role in ("task", "result"):
+            encoder, decoder = _metered(f"{role}-{fmt}", dumps, loads, offload=role == "result")
+            register(
+                f"{role}-{fmt}",
+                encoder,
+                decoder,
+                # kombu picks the decoder by content type, so each serializer needs its own
+                content_type=f"application/x-{role}+{fmt}",
+                content_encoding=encoding,
+            )
@@ -1,11 +1,15 @@
 """Celery tasks for alpha.me."""
 
 from apps.workers.tasks.ai import (
+    apply_match_feedback,
+    collect_clarifier_batch,
     find_matches,
+    find_matches_batch,
     generate_clarifier_questions,
     generate_newsletter,
     generate_narratives,
     process_match_feedback,
+    submit_clarifier_batch,
     update_user_embeddings,
 )
 from apps.workers.tasks.ingestion import (
@@ -16,14 +20,25 @@ from apps.workers.tasks.ingestion import (
     ingest_web_mentions,
     process_activity_embeddings,
 )
+from apps.workers.tasks.orchestration import (
+    finish_user_ingestion,
+    finish_user_pipeline,
+    ingest_shard,
+    purge_offloaded_results,
+    schedule_ingestion,
+)
 
 __all__ = [
     # AI tasks
+    "apply_match_feedback",
+    "collect_clarifier_batch",
     "find_matches",
+    "find_matches_batch",
     "generate_clarifier_questions",
     "generate_newsletter",
     "generate_narratives",
     "process_match_feedback",
+    "submit_clarifier_batch",
     "update_user_embeddings",
     # Ingestion tasks
     "ingest_calendar_activities",
@@ -32,4 +47,10 @@ __all__ = [
     "ingest_twitter_activities",
     "ingest_web_mentions",
     "process_activity_embeddings",
+    # Orchestration tasks
+    "finish_user_ingestion",
+    "finish_user_pipeline",
+    "ingest_shard",
+    "purge_offloaded_results",
+    "schedule_ingestion",
 ] 
\ No newline at end of file
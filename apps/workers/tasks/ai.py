@@ -1,16 +1,34 @@
 from datetime import datetime
-from typing import List
 from uuid import UUID
 
-from celery import Task
+from celery import group
 from structlog import get_logger
 
 from apps.api.core.config import settings
 from apps.workers.celery_app import celery_app
+from apps.workers.clarifier import build_clarifier_request, parse_questions
+from apps.workers.coalesce import CoalescingTask
+from apps.workers.db import run_async, worker_session
+from apps.workers.embeddings import refresh_user_embedding
+from apps.workers.feedback import (
+    ack_pending,
+    apply_feedback,
+    applying,
+    claim_flush,
+    has_pending,
+    peek_pending,
+    queue_feedback,
+    release_flush,
+)
+from apps.workers.llm import get_llm_gateway
+from apps.workers.matching import find_batch_matches, record_feedback, store_recommendations
+from apps.workers.narratives import update_narratives
+from apps.workers.newsletters import generate_newsletter as write_newsletter
+from apps.workers.scheduling import FairShareTask, LanedTask
 
 logger = get_logger(__name__)
 
-class BaseAITask(Task):
+class BaseAITask(LanedTask):
     """Base task class for AI processing tasks."""
     abstract = True
     queue = "ai"
@@ -28,38 +46,82 @@ class BaseAITask(Task):
             exc_info=exc,
         )
 
-@celery_app.task(base=BaseAITask)
-def generate_narratives(user_id: UUID, since: datetime | None = None) -> List[dict]:
+class UserAITask(FairShareTask, CoalescingTask, BaseAITask):
+    """AI task for one user; calls coalesce, runs never overlap and share the member's slots."""
+    abstract = True
+
+class SinceUserAITask(UserAITask):
+    abstract = True
+    coalesce_since_arg = "since"
+
+@celery_app.task(base=SinceUserAITask)
+def generate_narratives(user_id: UUID, since: datetime | None = None) -> list[dict]:
     """Generate narratives from user activities."""
     logger.info(
         "generating_narratives",
         user_id=user_id,
         since=since,
     )
-    # TODO: Implement narrative generation
-    raise NotImplementedError("Narrative generation not implemented yet")
+    if isinstance(since, str):
+        since = datetime.fromisoformat(since)
+    return run_async(_generate_narratives(UUID(str(user_id)), since))
 
-@celery_app.task(base=BaseAITask)
-def generate_newsletter(user_id: UUID, narrative_ids: List[UUID] | None = None) -> dict:
+async def _generate_narratives(user_id: UUID, since: datetime | None) -> list[dict]:
+    async with worker_session() as session:
+        return await update_narratives(session, user_id, since)
+
+# The weekly batch must not hold up match refreshes
+@celery_app.task(base=BaseAITask, lane="backfill")
+def generate_newsletter(user_id: UUID, narrative_ids: list[UUID] | None = None) -> dict:
     """Generate newsletter from narratives."""
     logger.info(
         "generating_newsletter",
         user_id=user_id,
         narrative_count=len(narrative_ids) if narrative_ids else None,
     )
-    # TODO: Implement newsletter generation
-    raise NotImplementedError("Newsletter generation not implemented yet")
+    return run_async(
+        _generate_newsletter(
+            UUID(str(user_id)),
+            [UUID(str(id_)) for id_ in narrative_ids] if narrative_ids else None,
+        )
+    )
 
-@celery_app.task(base=BaseAITask)
-def find_matches(user_id: UUID, batch_size: int | None = None) -> List[dict]:
+async def _generate_newsletter(user_id: UUID, narrative_ids: list[UUID] | None) -> dict:
+    async with worker_session() as session:
+        return await write_newsletter(session, user_id, narrative_ids)
+
+@celery_app.task(base=UserAITask, lane="interactive")
+def find_matches(user_id: UUID, batch_size: int | None = None) -> list[dict]:
     """Find potential matches for a user."""
     logger.info(
         "finding_matches",
         user_id=user_id,
         batch_size=batch_size or settings.MATCH_BATCH_SIZE,
     )
-    # TODO: Implement matchmaking
-    raise NotImplementedError("Matchmaking not implemented yet")
+    user_id = UUID(str(user_id))
+    return run_async(_find_matches([user_id]))[user_id]
+
+@celery_app.task(base=BaseAITask, lane="backfill")
+def find_matches_batch(user_ids: list[UUID], batch_size: int | None = None) -> dict:
+    """Find potential matches for many users, scoring `batch_size` users at a time."""
+    batch_size = batch_size or settings.MATCH_BATCH_SIZE
+    logger.info(
+        "finding_matches_batch",
+        user_count=len(user_ids),
+        batch_size=batch_size,
+    )
+    ids = [UUID(str(user_id)) for user_id in user_ids]
+    matched = 0
+    for start in range(0, len(ids), batch_size):
+        results = run_async(_find_matches(ids[start:start + batch_size]))
+        matched += sum(len(matches) for matches in results.values())
+    return {"users": len(ids), "matches": matched}
+
+async def _find_matches(user_ids: list[UUID]) -> dict[UUID, list[dict]]:
+    async with worker_session() as session:
+        results = await find_batch_matches(session, user_ids)
+        await store_recommendations(session, results)
+        return results
 
 @celery_app.task(base=BaseAITask)
 def process_match_feedback(match_id: UUID, rating: int, notes: str | None = None) -> None:
@@ -69,25 +131,101 @@ def process_match_feedback(match_id: UUID, rating: int, notes: str | None = None
         match_id=match_id,
         rating=rating,
     )
-    # TODO: Implement feedback processing
-    raise NotImplementedError("Feedback processing not implemented yet")
+    if not run_async(_process_match_feedback(UUID(str(match_id)), rating, notes)):
+        return
+    # Ratings are applied to the ranking models in one batch per window
+    if queue_feedback(match_id, rating):
+        apply_match_feedback.apply_async(
+            countdown=settings.MATCH_FEEDBACK_WINDOW_SECONDS, lane="incremental"
+        )
+
+async def _process_match_feedback(match_id: UUID, rating: int, notes: str | None) -> bool:
+    async with worker_session() as session:
+        return await record_feedback(session, match_id, rating, notes)
 
 @celery_app.task(base=BaseAITask)
+def apply_match_feedback() -> dict:
+    """Apply queued match ratings to the score weights and member preferences."""
+    # Released first, so ratings arriving from now on schedule the next window
+    release_flush()
+    with applying() as leased:
+        if not leased:
+            # Another flush is still applying a batch; come back next window
+            if claim_flush():
+                apply_match_feedback.apply_async(
+                    countdown=settings.MATCH_FEEDBACK_WINDOW_SECONDS, lane="incremental"
+                )
+            return {"ratings": 0}
+        events = peek_pending(settings.MATCH_FEEDBACK_BATCH_SIZE)
+        summary = run_async(_apply_match_feedback(events))
+        ack_pending(len(events))
+    if has_pending() and claim_flush():
+        apply_match_feedback.apply_async(lane="incremental")
+    return summary
+
+async def _apply_match_feedback(events: list[dict]) -> dict:
+    async with worker_session() as session:
+        return await apply_feedback(session, events)
+
+@celery_app.task(base=UserAITask)
 def update_user_embeddings(user_id: UUID) -> None:
     """Update user embeddings based on recent activities."""
     logger.info(
         "updating_user_embeddings",
         user_id=user_id,
     )
-    # TODO: Implement embedding updates
-    raise NotImplementedError("Embedding updates not implemented yet")
+    run_async(_update_user_embeddings(UUID(str(user_id))))
+
+async def _update_user_embeddings(user_id: UUID) -> None:
+    async with worker_session() as session:
+        await refresh_user_embedding(session, user_id)
 
 @celery_app.task(base=BaseAITask)
-def generate_clarifier_questions(narrative_id: UUID) -> List[dict]:
+def generate_clarifier_questions(narrative_id: UUID) -> list[dict]:
     """Generate clarifying questions for a narrative."""
     logger.info(
         "generating_clarifier_questions",
         narrative_id=narrative_id,
     )
-    # TODO: Implement question generation
-    raise NotImplementedError("Question generation not implemented yet") 
\ No newline at end of file
+    return run_async(_generate_clarifier_questions(UUID(str(narrative_id))))
+
+async def _generate_clarifier_questions(narrative_id: UUID) -> list[dict]:
+    async with worker_session() as session:
+        request = await build_clarifier_request(session, narrative_id)
+    if request is None:
+        return []
+    return parse_questions(await get_llm_gateway().complete(request))
+
+@celery_app.task(base=BaseAITask, lane="backfill")
+def submit_clarifier_batch(narrative_ids: list[UUID]) -> str | None:
+    """Submit clarifier prompts for many narratives through the offline batch API.
+
+    Once the batch is collected the responses are in the LLM cache, so the
+    per-narrative tasks it then fans out to return without calling the model.
+    """
+    narrative_ids = [UUID(str(id_)) for id_ in narrative_ids]
+    batch_id = run_async(_submit_clarifier_batch(narrative_ids))
+    logger.info("clarifier_batch_submitted", batch_id=batch_id, narrative_count=len(narrative_ids))
+    if batch_id is None:
+        group(generate_clarifier_questions.si(str(id_)) for id_ in narrative_ids).apply_async()
+    else:
+        collect_clarifier_batch.apply_async(
+            (batch_id, [str(id_) for id_ in narrative_ids]),
+            countdown=settings.LLM_BATCH_POLL_SECONDS,
+        )
+    return batch_id
+
+async def _submit_clarifier_batch(narrative_ids: list[UUID]) -> str | None:
+    async with worker_session() as session:
+        requests = [await build_clarifier_request(session, id_) for id_ in narrative_ids]
+    return await get_llm_gateway().submit_batch([request for request in requests if request is not None])
+
+@celery_app.task(base=BaseAITask, bind=True, max_retries=None, lane="backfill")
+def collect_clarifier_batch(self, batch_id: str, narrative_ids: list[UUID]) -> int:
+    """Poll a clarifier batch until it finishes, then generate from the warmed cache."""
+    collected = run_async(get_llm_gateway().collect_batch(batch_id))
+    if collected is None:
+        raise self.retry(countdown=settings.LLM_BATCH_POLL_SECONDS)
+    logger.info("clarifier_batch_collected", batch_id=batch_id, response_count=collected)
+    group(generate_clarifier_questions.si(str(id_)) for id_ in narrative_ids).apply_async()
+    return collected 
\ No newline at end of file
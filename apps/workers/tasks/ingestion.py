@@ -1,21 +1,46 @@
 from datetime import datetime
-from typing import List
 from uuid import UUID
 
-from celery import Task
+import httpx
+from celery.utils.time import get_exponential_backoff_interval
 from structlog import get_logger
 
 from apps.api.core.config import settings
 from apps.workers.celery_app import celery_app
+from apps.workers.db import run_async, worker_session
+from apps.workers.embeddings import embed_activities
+from apps.workers.ingest import run_ingestion
+from apps.workers.scheduling import FairShareTask, LanedTask
+from libs.connectors.http import RetryableFetchError
 
 logger = get_logger(__name__)
 
-class BaseIngestionTask(Task):
+class BaseIngestionTask(LanedTask):
     """Base task class for ingestion tasks."""
     abstract = True
     queue = "ingestion"
+    # These run as chord headers, whose callbacks need the stored results
+    ignore_result = False
     max_retries = 3
-    default_retry_delay = 300  # 5 minutes
+    # Throttling and transient failures retry with exponential backoff and full
+    # jitter, so a provider outage does not bring every task back at once
+    autoretry_for = (httpx.TransportError,)
+    retry_backoff = settings.INGESTION_RETRY_BACKOFF_SECONDS
+    retry_backoff_max = settings.INGESTION_RETRY_BACKOFF_MAX_SECONDS
+    retry_jitter = True
+
+    def __call__(self, *args, **kwargs):
+        try:
+            return super().__call__(*args, **kwargs)
+        except RetryableFetchError as exc:
+            # A throttled provider says when to come back; never retry sooner
+            backoff = get_exponential_backoff_interval(
+                factor=self.retry_backoff,
+                retries=self.request.retries,
+                maximum=self.retry_backoff_max,
+                full_jitter=self.retry_jitter,
+            )
+            raise self.retry(exc=exc, countdown=max(exc.retry_after or 0, backoff)) from exc
 
     def on_failure(self, exc, task_id, args, kwargs, einfo):
         """Log task failure."""
@@ -28,67 +53,77 @@ class BaseIngestionTask(Task):
             exc_info=exc,
         )
 
-@celery_app.task(base=BaseIngestionTask)
-def ingest_gmail_activities(user_id: UUID, since: datetime | None = None) -> List[dict]:
+class UserIngestionTask(FairShareTask, BaseIngestionTask):
+    """Ingestion task for one user; counts against the member's fair share."""
+    abstract = True
+
+def _ingest(provider: str, user_id: UUID, since: datetime | str | None) -> dict:
+    """Stream a provider into Postgres and report counts and the resume cursor."""
+    if isinstance(since, str):
+        since = datetime.fromisoformat(since)
+    result = run_async(run_ingestion(provider, UUID(str(user_id)), since, worker_session))
+    return {"user_id": str(user_id), **result.as_dict()}
+
+@celery_app.task(base=UserIngestionTask)
+def ingest_gmail_activities(user_id: UUID, since: datetime | None = None) -> dict:
     """Ingest Gmail activities for a user."""
     logger.info(
         "ingesting_gmail_activities",
         user_id=user_id,
         since=since,
     )
-    # TODO: Implement Gmail ingestion
-    raise NotImplementedError("Gmail ingestion not implemented yet")
+    return _ingest("gmail", user_id, since)
 
-@celery_app.task(base=BaseIngestionTask)
-def ingest_calendar_activities(user_id: UUID, since: datetime | None = None) -> List[dict]:
+@celery_app.task(base=UserIngestionTask)
+def ingest_calendar_activities(user_id: UUID, since: datetime | None = None) -> dict:
     """Ingest Google Calendar activities for a user."""
     logger.info(
         "ingesting_calendar_activities",
         user_id=user_id,
         since=since,
     )
-    # TODO: Implement Calendar ingestion
-    raise NotImplementedError("Calendar ingestion not implemented yet")
+    return _ingest("calendar", user_id, since)
 
-@celery_app.task(base=BaseIngestionTask)
-def ingest_twitter_activities(user_id: UUID, since: datetime | None = None) -> List[dict]:
+@celery_app.task(base=UserIngestionTask)
+def ingest_twitter_activities(user_id: UUID, since: datetime | None = None) -> dict:
     """Ingest Twitter activities for a user."""
     logger.info(
         "ingesting_twitter_activities",
         user_id=user_id,
         since=since,
     )
-    # TODO: Implement Twitter ingestion
-    raise NotImplementedError("Twitter ingestion not implemented yet")
+    return _ingest("twitter", user_id, since)
 
-@celery_app.task(base=BaseIngestionTask)
-def ingest_github_activities(user_id: UUID, since: datetime | None = None) -> List[dict]:
+@celery_app.task(base=UserIngestionTask)
+def ingest_github_activities(user_id: UUID, since: datetime | None = None) -> dict:
     """Ingest GitHub activities for a user."""
     logger.info(
         "ingesting_github_activities",
         user_id=user_id,
         since=since,
     )
-    # TODO: Implement GitHub ingestion
-    raise NotImplementedError("GitHub ingestion not implemented yet")
+    return _ingest("github", user_id, since)
 
-@celery_app.task(base=BaseIngestionTask)
-def ingest_web_mentions(user_id: UUID, since: datetime | None = None) -> List[dict]:
+@celery_app.task(base=UserIngestionTask)
+def ingest_web_mentions(user_id: UUID, since: datetime | None = None) -> dict:
     """Ingest web mentions for a user using Exa search."""
     logger.info(
         "ingesting_web_mentions",
         user_id=user_id,
         since=since,
     )
-    # TODO: Implement web mention ingestion
-    raise NotImplementedError("Web mention ingestion not implemented yet")
+    return _ingest("web", user_id, since)
 
-@celery_app.task(base=BaseIngestionTask)
-def process_activity_embeddings(activity_ids: List[UUID]) -> None:
+# Model-bound, so it runs with the AI workers that preload the embedding model
+@celery_app.task(base=BaseIngestionTask, queue="ai")
+def process_activity_embeddings(activity_ids: list[UUID]) -> None:
     """Process embeddings for a batch of activities."""
     logger.info(
         "processing_activity_embeddings",
         activity_count=len(activity_ids),
     )
-    # TODO: Implement embedding processing
-    raise NotImplementedError("Embedding processing not implemented yet") 
\ No newline at end of file
+    run_async(_process_activity_embeddings([UUID(str(id_)) for id_ in activity_ids]))
+
+async def _process_activity_embeddings(activity_ids: list[UUID]) -> None:
+    async with worker_session() as session:
+        await embed_activities(session, activity_ids) 
\ No newline at end of file
@@ -0,0 +1,170 @@
+import time
+from datetime import datetime, timedelta
+from uuid import UUID
+
+from celery import chord, group
+from sqlalchemy import String, cast, func, select
+from structlog import get_logger
+
+from apps.api.core.config import settings
+from apps.api.models.activity import Activity
+from apps.api.models.ingestion import IngestionWatermark
+from apps.api.models.user import User, user_integrations
+from apps.workers.celery_app import celery_app
+from apps.workers.db import run_async, worker_session
+from apps.workers.monitoring import log_stage
+from apps.workers.scheduling import DEFAULT_LANE
+from apps.workers.serialization import purge_offloaded_results as purge_results
+from apps.workers.tasks.ai import update_user_embeddings
+from apps.workers.tasks.ingestion import (
+    ingest_calendar_activities,
+    ingest_github_activities,
+    ingest_gmail_activities,
+    ingest_twitter_activities,
+    ingest_web_mentions,
+    process_activity_embeddings,
+)
+from libs.connectors.base import registered_providers
+
+logger = get_logger(__name__)
+
+INGESTION_TASKS = {
+    "gmail": ingest_gmail_activities,
+    "calendar": ingest_calendar_activities,
+    "twitter": ingest_twitter_activities,
+    "github": ingest_github_activities,
+    "web": ingest_web_mentions,
+}
+
+@celery_app.task
+def schedule_ingestion() -> int:
+    """Start one ingestion run per shard, spread across the beat period."""
+    shards = settings.INGESTION_SHARDS
+    spread = settings.INGESTION_INTERVAL_SECONDS / shards
+    for shard in range(shards):
+        ingest_shard.apply_async((shard, shards), countdown=round(shard * spread))
+    logger.info("ingestion_scheduled", shards=shards)
+    return shards
+
+@celery_app.task
+def purge_offloaded_results() -> int:
+    """Delete offloaded task results whose pointers have expired from Redis."""
+    deleted = purge_results()
+    logger.info("offloaded_results_purged", deleted=deleted)
+    return deleted
+
+@celery_app.task
+def ingest_shard(shard: int, shard_count: int) -> int:
+    """Fan out ingestion for every member in a shard as one chord per member.
+
+    Each member's providers run as a group; the chord callback then embeds
+    whatever that member has pending in a few large batches. Providers that
+    have never synced, or are far behind, run in the backfill lane, and so
+    does the embedding work that follows them.
+    """
+    started_at = time.time()
+    plan = run_async(_plan_shard(shard, shard_count))
+    for user_id, providers in plan.items():
+        pipeline_lane = "backfill" if "backfill" in providers.values() else DEFAULT_LANE
+        chord(
+            group(
+                INGESTION_TASKS[provider].si(str(user_id)).set(lane=lane)
+                for provider, lane in providers.items()
+            ),
+            finish_user_ingestion.s(str(user_id), started_at).set(lane=pipeline_lane),
+        ).apply_async()
+    log_stage(
+        "dispatch",
+        started_at,
+        shard=shard,
+        users=len(plan),
+        tasks=sum(len(providers) for providers in plan.values()),
+    )
+    return len(plan)
+
+async def _plan_shard(shard: int, shard_count: int) -> dict[UUID, dict[str, str]]:
+    """Map each member in the shard to their providers and the lane each syncs in."""
+    connectors = registered_providers()
+    providers = [provider for provider in INGESTION_TASKS if provider in connectors]
+    if not providers:
+        return {}
+
+    # Mask the sign bit so the modulo is never negative
+    in_shard = func.hashtext(cast(User.id, String)).op("&")(0x7FFFFFFF) % shard_count == shard
+    plan: dict[UUID, dict[str, str]] = {}
+    async with worker_session() as session:
+        watermarks = await session.execute(
+            select(IngestionWatermark.user_id, IngestionWatermark.provider, IngestionWatermark.since)
+            .join(User, User.id == IngestionWatermark.user_id)
+            .where(User.is_active.is_(True), in_shard)
+        )
+        synced = {(user_id, provider): since for user_id, provider, since in watermarks.all()}
+        behind = datetime.utcnow() - timedelta(seconds=settings.INGESTION_BACKFILL_AFTER_SECONDS)
+
+        def lane(user_id: UUID, provider: str) -> str:
+            if (user_id, provider) not in synced:
+                return "backfill"
+            since = synced[user_id, provider]
+            return "backfill" if since is not None and since < behind else DEFAULT_LANE
+
+        connected = await session.execute(
+            select(user_integrations.c.user_id, user_integrations.c.provider)
+            .join(User, User.id == user_integrations.c.user_id)
+            .where(
+                User.is_active.is_(True),
+                in_shard,
+                user_integrations.c.provider.in_(
+                    [p for p in providers if connectors[p].requires_integration]
+                ),
+            )
+        )
+        for user_id, provider in connected.all():
+            plan.setdefault(user_id, {})[provider] = lane(user_id, provider)
+
+        searched = [p for p in providers if not connectors[p].requires_integration]
+        if searched:
+            members = await session.execute(select(User.id).where(User.is_active.is_(True), in_shard))
+            for user_id in members.scalars().all():
+                plan.setdefault(user_id, {}).update((p, lane(user_id, p)) for p in searched)
+    return plan
+
+@celery_app.task
+def finish_user_ingestion(results: list[dict], user_id: str, started_at: float) -> int:
+    """Embed a member's pending activities in batches, then refresh their profile embedding.
+
+    Pending rows are looked up rather than passed along, so anything left over
+    from an earlier failed run is picked up too.
+    """
+    log_stage(
+        "ingest",
+        started_at,
+        user_id=user_id,
+        providers=len(results),
+        ingested=sum(result["ingested"] for result in results),
+    )
+    activity_ids = run_async(_pending_activity_ids(UUID(user_id)))
+    if not activity_ids:
+        return 0
+
+    size = settings.EMBEDDING_TASK_BATCH_SIZE
+    batches = [activity_ids[start:start + size] for start in range(0, len(activity_ids), size)]
+    chord(
+        group(process_activity_embeddings.si(batch) for batch in batches),
+        update_user_embeddings.si(user_id) | finish_user_pipeline.si(user_id, started_at, time.time()),
+    ).apply_async()
+    return len(activity_ids)
+
+async def _pending_activity_ids(user_id: UUID) -> list[str]:
+    async with worker_session() as session:
+        result = await session.execute(
+            select(Activity.id)
+            .where(Activity.user_id == user_id, Activity.embedding.is_(None))
+            .order_by(Activity.occurred_at.desc())
+        )
+        return [str(id_) for id_ in result.scalars().all()]
+
+@celery_app.task
+def finish_user_pipeline(user_id: str, started_at: float, embed_started_at: float) -> None:
+    """Report the embedding stage and the member's end-to-end pipeline time."""
+    log_stage("embed", embed_started_at, user_id=user_id)
+    log_stage("pipeline", started_at, user_id=user_id)
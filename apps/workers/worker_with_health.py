@@ -2,50 +2,171 @@
 """
 Worker with HTTP health check server for Cloud Run compatibility.
 Runs both Celery worker and a simple HTTP server for health checks.
+
+The worker's pool, concurrency and queues come from the WORKER_PROFILE
+profile (see apps/workers/profiles.py). Readiness reports in-flight tasks and
+the depth of the profile's queues, which autoscaling can target.
 """
-import asyncio
+import json
 import threading
 import time
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import ClassVar
 import structlog
-from celery import Celery
+from celery.signals import worker_ready, worker_shutting_down
+from celery.worker import state as worker_state
+from kombu.exceptions import ChannelError
+from apps.api.core.config import settings
 from apps.workers.celery_app import celery_app
+from apps.workers.monitoring import lane_stats
+from apps.workers.profiles import get_profile
+from apps.workers.scheduling import LANES, lane_queue_key
+from apps.workers.serialization import serialization_stats
+
+profile = get_profile()
 
 logger = structlog.get_logger()
 
+# Set once the consumer is started and cleared on shutdown, in the worker's main process
+_consumer_ready = threading.Event()
+
+@worker_ready.connect
+def _mark_ready(**kwargs):
+    _consumer_ready.set()
+
+@worker_shutting_down.connect
+def _mark_shutting_down(**kwargs):
+    _consumer_ready.clear()
+
+def _probe_broker():
+    """Check the broker and return this profile's queue and lane depths and the lane SLOs."""
+    depths = {}
+    lanes = {}
+    with celery_app.connection_for_read() as conn:
+        conn.ensure_connection(max_retries=1, timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS)
+        channel = conn.default_channel
+        for queue in profile.queues:
+            try:
+                depths[queue] = channel.queue_declare(queue=queue, passive=True).message_count
+            except ChannelError:
+                # Redis only has a key for queues holding messages
+                depths[queue] = 0
+            lanes[queue] = {lane: channel.client.llen(lane_queue_key(queue, lane)) for lane in LANES}
+    # Kept in the same Redis as the broker
+    return {'queues': depths, 'lanes': lanes, 'lane_slos': lane_stats()}
+
+def _probe_consumer():
+    if not _consumer_ready.is_set():
+        raise RuntimeError('consumer not started')
+
+class ReadinessCheck:
+    """Broker and consumer probes run concurrently, cached for a few seconds."""
+
+    probes: ClassVar[dict] = {'broker': _probe_broker, 'consumer': _probe_consumer}
+
+    def __init__(self, timeout, ttl):
+        self.timeout = timeout
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=len(self.probes), thread_name_prefix='health')
+        self._lock = threading.Lock()
+        self._result = None
+        self._expires_at = 0.0
+
+    def services(self):
+        """Return each probe's status and the details the probes reported."""
+        # Concurrent requests wait on the lock and reuse the fresh result
+        with self._lock:
+            if self._result is not None and time.monotonic() < self._expires_at:
+                return self._result
+            futures = {name: self._executor.submit(probe) for name, probe in self.probes.items()}
+            wait(futures.values(), timeout=self.timeout)
+            result = {}
+            details = {}
+            for name, future in futures.items():
+                if not future.done():
+                    result[name] = 'timeout'
+                elif future.exception() is not None:
+                    logger.error('health_check_failed', service=name, error=str(future.exception()))
+                    result[name] = 'unhealthy'
+                else:
+                    result[name] = 'healthy'
+                    details.update(future.result() or {})
+            self._result = result, details
+            self._expires_at = time.monotonic() + self.ttl
+            return self._result
+
+readiness = ReadinessCheck(
+    timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS,
+    ttl=settings.HEALTH_CACHE_TTL_SECONDS,
+)
+
 class HealthHandler(BaseHTTPRequestHandler):
-    """Simple HTTP handler for health checks."""
+    """HTTP handler for liveness and readiness checks."""
     
     def do_GET(self):
-        if self.path in ['/health', '/healthz', '/']:
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(b'{"status": "healthy", "service": "worker"}')
+        if self.path in ['/health/live', '/healthz', '/']:
+            # Liveness: the process is serving; no I/O
+            self._send(200, {'status': 'alive', 'service': 'worker'})
+        elif self.path in ['/health/ready', '/health']:
+            services, details = readiness.services()
+            healthy = all(state == 'healthy' for state in services.values())
+            self._send(
+                200 if healthy else 503,
+                {
+                    'status': 'healthy' if healthy else 'degraded',
+                    'service': 'worker',
+                    'profile': profile.name,
+                    'services': services,
+                    # Tracked by the consumer in this process, for every pool type
+                    'in_flight': {
+                        'active': len(worker_state.active_requests),
+                        'reserved': len(worker_state.reserved_requests),
+                        'concurrency': profile.concurrency,
+                    },
+                    'queues': details.get('queues', {}),
+                    # Waiting messages per priority lane, and SLO attainment across all workers
+                    'lanes': details.get('lanes', {}),
+                    'lane_slos': details.get('lane_slos', {}),
+                    'serialization': serialization_stats(),
+                },
+            )
         else:
             self.send_response(404)
             self.end_headers()
     
+    def _send(self, code, body):
+        self.send_response(code)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(body).encode())
+    
     def log_message(self, format, *args):
         # Suppress default HTTP server logs
         pass
 
-def run_health_server(port=8080):
+def run_health_server(port=settings.WORKER_HEALTH_PORT):
     """Run a simple HTTP health check server."""
-    server = HTTPServer(('0.0.0.0', port), HealthHandler)
+    server = ThreadingHTTPServer(('0.0.0.0', port), HealthHandler)
     logger.info(f"Health server starting on port {port}")
     server.serve_forever()
 
+def preload_model():
+    """Load the embedding model in the parent so prefork children share it copy-on-write."""
+    # Imported here so profiles that never preload skip the model stack
+    from apps.workers.embeddings import get_embedding_service  # noqa: PLC0415
+
+    started = time.perf_counter()
+    get_embedding_service().load()
+    logger.info("Embedding model preloaded", model=settings.EMBEDDING_MODEL, seconds=round(time.perf_counter() - started, 2))
+
 def run_celery_worker():
     """Run the Celery worker."""
-    logger.info("Starting Celery worker")
-    # Run celery worker with proper arguments
-    celery_app.worker_main([
-        'worker',
-        '--loglevel=info',
-        '--concurrency=2',
-        '--queues=default,ingestion,ai'
-    ])
+    logger.info("Starting Celery worker", profile=profile.name, pool=profile.pool, concurrency=profile.concurrency)
+    if profile.preload_model:
+        preload_model()
+    # Run celery worker with the profile's pool and queues
+    celery_app.worker_main(profile.worker_args())
 
 def main():
     """Main entry point that runs both HTTP server and Celery worker."""
@@ -0,0 +1,106 @@
+"""Load-test the API in process through its ASGI interface.
+
+Boots the app from `create_application`, runs its startup hooks, and sends
+requests through httpx's ASGI transport, so results measure the application,
+the database in DATABASE_URL and the Redis in REDIS_URL without socket or
+server overhead. Synthetic members are seeded before the run and deleted
+after it. Prints p50/p95/p99 latency and throughput per profile as JSON.
+
+    python -m benchmarks.bench_api_load --members 200 --requests 2000 --concurrency 32 -o api.json
+"""
+import argparse
+import asyncio
+from collections.abc import Callable
+
+import httpx
+
+from apps.api.core.database import async_session_factory, close_db
+from apps.api.main import create_application
+from apps.api.routers.auth import create_token
+from benchmarks.harness import SyntheticMembers, cleanup_members, report, run_load, seed_members
+
+# name -> (path, authenticated)
+PROFILES: dict[str, tuple[str, bool]] = {
+    "health_live": ("/v1/health/live", False),
+    "health_ready": ("/v1/health/ready", False),
+    "authenticated": ("/v1/integration", True),
+    "deltas": ("/v1/deltas?limit=100", True),
+    "matches": ("/v1/match", True),
+}
+
+def _request(client: httpx.AsyncClient, path: str, headers: list[dict] | None) -> Callable:
+    async def call(index: int) -> None:
+        response = await client.get(path, headers=headers[index % len(headers)] if headers else None)
+        response.raise_for_status()
+
+    return call
+
+async def run(  # noqa: PLR0913 - options are keyword-only
+    profiles: list[str],
+    *,
+    members: int,
+    activities: int,
+    matches: int,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    seed: int,
+) -> dict:
+    synthetic = SyntheticMembers(seed)
+    async with async_session_factory() as session:
+        ids = await seed_members(
+            session,
+            synthetic,
+            members,
+            activities_per_member=activities,
+            matches_per_member=matches,
+            embedded=True,
+        )
+
+    app = create_application()
+    headers = [{"Authorization": f"Bearer {create_token(str(user_id))[0]}"} for user_id in ids]
+    results = {}
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                for name in profiles:
+                    path, authenticated = PROFILES[name]
+                    call = _request(client, path, headers if authenticated else None)
+                    await run_load(call, warmup, concurrency)
+                    results[name] = await run_load(call, requests, concurrency)
+    finally:
+        async with async_session_factory() as session:
+            await cleanup_members(session, ids)
+        await close_db()
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--activities", type=int, default=50, help="Activities per member")
+    parser.add_argument("--matches", type=int, default=20, help="Ranked matches per member")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per profile")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", "-o", help="Write the JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    results = asyncio.run(
+        run(
+            args.profiles,
+            members=args.members,
+            activities=args.activities,
+            matches=args.matches,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            warmup=args.warmup,
+            seed=args.seed,
+        )
+    )
+    report("api_load", vars(args), results, args.output)
+
+if __name__ == "__main__":
+    main()
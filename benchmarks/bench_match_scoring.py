@@ -0,0 +1,95 @@
+"""Benchmark vectorized batch match scoring against the pair-by-pair loop.
+
+Scores one batch of users against synthetic member pools and prints JSON.
+The naive loop is timed on a few users and extrapolated to the full batch,
+since running it in full at 100k members takes minutes.
+
+    python -m benchmarks.bench_match_scoring --members 1000 10000 100000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from libs.ai.scoring import exclusion_mask, score_batch, score_pairs_naive, tag_matrix
+
+TAGS = ["ai", "fintech", "climate", "bio", "saas", "infra", "crypto", "health", "edu", "robotics"]
+
+def synthetic_members(count: int, dims: int, rng: np.random.Generator) -> tuple[np.ndarray, list, np.ndarray]:
+    vectors = rng.normal(size=(count, dims)).astype(np.float32)
+    tags = [list(rng.choice(TAGS, size=rng.integers(1, 4), replace=False)) for _ in range(count)]
+    bias = rng.uniform(-1, 1, size=count).astype(np.float32)
+    return vectors, tags, bias
+
+def run(  # noqa: PLR0913
+    members: int,
+    batch_size: int,
+    dims: int,
+    k: int,
+    *,
+    naive_users: int,
+    seed: int,
+) -> dict:
+    rng = np.random.default_rng(seed)
+    vectors, tags, bias = synthetic_members(members, dims, rng)
+    user_rows = rng.choice(members, size=batch_size, replace=False)
+    user_ids = [int(row) for row in user_rows]
+
+    tag_rows, _ = tag_matrix(tags)
+    start = time.perf_counter()
+    mask = exclusion_mask(user_ids, range(members))
+    score_batch(
+        vectors[user_rows],
+        vectors,
+        k=k,
+        user_tags=tag_rows[user_rows],
+        candidate_tags=tag_rows,
+        candidate_bias=bias,
+        mask=mask,
+    )
+    vectorized = time.perf_counter() - start
+
+    sample = user_rows[:naive_users]
+    start = time.perf_counter()
+    score_pairs_naive(
+        vectors[sample],
+        vectors,
+        k=k,
+        user_tags=[tags[row] for row in sample],
+        candidate_tags=tags,
+        candidate_bias=bias,
+        excluded=[{int(row)} for row in sample],
+    )
+    naive = (time.perf_counter() - start) / len(sample) * batch_size
+
+    return {
+        "members": members,
+        "batch_size": batch_size,
+        "dims": dims,
+        "k": k,
+        "vectorized_seconds": round(vectorized, 4),
+        "naive_seconds_extrapolated": round(naive, 4),
+        "naive_users_timed": len(sample),
+        "speedup": round(naive / vectorized, 1) if vectorized else None,
+        "pairs_per_second": round(batch_size * members / vectorized) if vectorized else None,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--dims", type=int, default=768)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--naive-users", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = [
+        run(members, args.batch_size, args.dims, args.k, naive_users=args.naive_users, seed=args.seed)
+        for members in args.members
+    ]
+    print(json.dumps({"benchmark": "match_scoring", "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
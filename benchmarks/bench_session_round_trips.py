@@ -0,0 +1,113 @@
+"""Count database round trips per request for each session dependency.
+
+Drives the FastAPI session dependencies the way a request does, against the
+database in DATABASE_URL, and counts the statements asyncpg sends (BEGIN,
+queries, COMMIT/ROLLBACK and pool pre-pings) per request. Prints JSON.
+
+    python -m benchmarks.bench_session_round_trips --requests 200
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections.abc import AsyncGenerator, Awaitable, Callable
+
+from sqlalchemy import event, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.api.core.database import async_session_factory, engine, get_db, get_read_db, read_engine
+
+SessionDependency = Callable[[], AsyncGenerator[AsyncSession, None]]
+
+class StatementCounter:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, record) -> None:
+        self.count += 1
+
+async def legacy_get_db() -> AsyncGenerator[AsyncSession, None]:
+    """The previous dependency: always commits, then closes twice."""
+    async with async_session_factory() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+async def set_transaction_read_only() -> AsyncGenerator[AsyncSession, None]:
+    """A read-only session made with a separate SET TRANSACTION statement."""
+    async with async_session_factory() as session:
+        await session.execute(text("SET TRANSACTION READ ONLY"))
+        yield session
+
+async def read(session: AsyncSession) -> None:
+    # Stands in for the auth lookup and one route query
+    await session.execute(select(literal(1)))
+    await session.execute(select(literal(2)))
+
+async def write(session: AsyncSession) -> None:
+    await session.execute(select(literal(1)))
+    await session.execute(text("SELECT pg_advisory_xact_lock(0)"))
+
+async def request(dependency: SessionDependency, work: Callable[[AsyncSession], Awaitable[None]]) -> None:
+    generator = dependency()
+    session = await generator.__anext__()
+    await work(session)
+    try:
+        await generator.__anext__()
+    except StopAsyncIteration:
+        pass
+
+async def run(requests: int, warmup: int) -> list[dict]:
+    counter = StatementCounter()
+
+    def _log_statements(dbapi_connection, connection_record) -> None:
+        dbapi_connection.driver_connection.add_query_logger(counter)
+
+    for db_engine in {engine, read_engine}:
+        event.listen(db_engine.sync_engine, "connect", _log_statements)
+
+    scenarios = [
+        ("legacy_get_db", legacy_get_db, read),
+        ("get_db", get_db, read),
+        ("set_transaction_read_only", set_transaction_read_only, read),
+        ("get_read_db", get_read_db, read),
+        ("legacy_get_db_write", legacy_get_db, write),
+        ("get_db_write", get_db, write),
+    ]
+    results = []
+    for name, dependency, work in scenarios:
+        for _ in range(warmup):
+            await request(dependency, work)
+        counter.count = 0
+        started = time.perf_counter()
+        for _ in range(requests):
+            await request(dependency, work)
+        elapsed = time.perf_counter() - started
+        results.append(
+            {
+                "scenario": name,
+                "requests": requests,
+                "round_trips_per_request": round(counter.count / requests, 2),
+                "mean_ms": round(elapsed / requests * 1000, 3),
+            }
+        )
+    for db_engine in {engine, read_engine}:
+        await db_engine.dispose()
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.requests, args.warmup))
+    print(json.dumps({"benchmark": "session_round_trips", "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Benchmark the worker pipeline: ingestion, embeddings, narratives and matches.
+
+Synthetic members are seeded, then each stage runs as a phase over all of
+them through the same functions the Celery tasks call, from a pool of threads
+that each have their own event loop and engine, as the threaded worker pool
+does. Provider APIs are replaced by a `bench` connector yielding faker
+activities, the embedding model by a feature-hashing encoder unless --model
+is given, and the LLM by the stub backend. Postgres and Redis are the ones in
+DATABASE_URL and REDIS_URL. Prints p50/p95/p99 latency per item and
+throughput per stage as JSON.
+
+    python -m benchmarks.bench_worker_pipeline --members 100 --activities 200 --threads 8 -o pipeline.json
+"""
+import argparse
+import hashlib
+import re
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import select
+
+from apps.api.core.config import settings
+from apps.api.models.activity import Activity
+from apps.workers import embeddings
+from apps.workers.db import run_async, worker_session
+from apps.workers.embeddings import embed_activities, refresh_user_embedding
+from apps.workers.ingest import run_ingestion
+from apps.workers.matching import find_batch_matches, store_recommendations
+from apps.workers.narratives import update_narratives
+from benchmarks.harness import SyntheticMembers, cleanup_members, report, seed_members, summarize
+from libs.ai.embeddings import EmbeddingService
+from libs.connectors.base import ActivityRecord, Connector, Page, Watermark, register_connector
+
+T = TypeVar("T")
+
+_TOKEN = re.compile(r"\w+")
+
+class HashingEncoder:
+    """Bag-of-words feature hashing with the model's `encode` signature.
+
+    Texts sharing words get similar vectors, so clustering and matching have
+    realistic structure to work on without loading a model.
+    """
+
+    def __init__(self, dims: int) -> None:
+        self.dims = dims
+
+    def encode(self, texts: Sequence[str], **kwargs: Any) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dims), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in _TOKEN.findall(text.lower()):
+                digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                vectors[row, value % self.dims] += 1.0 if value >> 63 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+@register_connector
+class BenchConnector(Connector):
+    """Yields a fixed number of synthetic activities per member."""
+
+    provider = "bench"
+    requires_integration = False
+    synthetic: SyntheticMembers | None = None
+    activities = 0
+
+    async def pages(self, watermark: Watermark) -> AsyncIterator[Page]:
+        offset = int(watermark.cursor or 0)
+        while offset < self.activities:
+            count = min(self.page_size, self.activities - offset)
+            records = []
+            for index in range(offset, offset + count):
+                fields = self.synthetic.activity(index)
+                fields["external_id"] = f"{self.user_id}-{index}"
+                records.append(ActivityRecord(**fields))
+            offset += count
+            yield Page(activities=records, cursor=str(offset))
+
+def run_phase(
+    pool: ThreadPoolExecutor,
+    items: Sequence[T],
+    stage: Callable[[T], Awaitable[object]],
+) -> dict:
+    """Run a stage once per item on the worker threads and summarize per-item latency."""
+
+    def timed(item: T) -> float:
+        started = time.perf_counter()
+        run_async(stage(item))
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    futures = [pool.submit(timed, item) for item in items]
+    samples, errors = [], []
+    for future in futures:
+        try:
+            samples.append(future.result())
+        except Exception as e:
+            errors.append(e)
+    return summarize(samples, time.perf_counter() - started, errors)
+
+async def ingest(user_id: UUID) -> None:
+    await run_ingestion("bench", user_id, None, worker_session)
+
+async def embed(user_id: UUID) -> None:
+    async with worker_session() as session:
+        pending = (
+            await session.execute(
+                select(Activity.id).where(Activity.user_id == user_id, Activity.embedding.is_(None))
+            )
+        ).scalars().all()
+    size = settings.EMBEDDING_TASK_BATCH_SIZE
+    for start in range(0, len(pending), size):
+        async with worker_session() as session:
+            await embed_activities(session, pending[start:start + size])
+
+async def narrate(user_id: UUID) -> None:
+    async with worker_session() as session:
+        await update_narratives(session, user_id)
+
+async def profile(user_id: UUID) -> None:
+    async with worker_session() as session:
+        await refresh_user_embedding(session, user_id)
+
+async def match(user_ids: list[UUID]) -> None:
+    async with worker_session() as session:
+        await store_recommendations(session, await find_batch_matches(session, user_ids))
+
+async def _seed(synthetic: SyntheticMembers, members: int) -> list[UUID]:
+    async with worker_session() as session:
+        return await seed_members(session, synthetic, members)
+
+async def _cleanup(ids: list[UUID]) -> None:
+    async with worker_session() as session:
+        await cleanup_members(session, ids)
+
+def run(members: int, activities: int, threads: int, model: bool, seed: int) -> dict:
+    settings.LLM_BACKEND = "stub"
+    # Uncached, so repeated runs encode the same synthetic texts again
+    embeddings._shared.service = EmbeddingService(
+        settings.EMBEDDING_MODEL,
+        max_batch_size=settings.EMBEDDING_BATCH_SIZE,
+        device=settings.EMBEDDING_DEVICE,
+        encoder=None if model else HashingEncoder(settings.EMBEDDING_DIMENSIONS),
+    )
+
+    synthetic = SyntheticMembers(seed)
+    BenchConnector.synthetic = synthetic
+    BenchConnector.activities = activities
+    ids = run_async(_seed(synthetic, members))
+    batches = [ids[start:start + settings.MATCH_BATCH_SIZE] for start in range(0, len(ids), settings.MATCH_BATCH_SIZE)]
+
+    results = {}
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="bench-worker") as pool:
+            results["ingest"] = run_phase(pool, ids, ingest)
+            results["embed"] = run_phase(pool, ids, embed)
+            results["narratives"] = run_phase(pool, ids, narrate)
+            results["user_embeddings"] = run_phase(pool, ids, profile)
+            results["matches"] = run_phase(pool, batches, match)
+        results["pipeline"] = {
+            "members": members,
+            "activities": members * activities,
+            "elapsed_seconds": round(time.perf_counter() - started, 3),
+            "embedding": embeddings.get_embedding_service().stats.as_dict(),
+        }
+    finally:
+        run_async(_cleanup(ids))
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=100)
+    parser.add_argument("--activities", type=int, default=200, help="Activities ingested per member")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--model", action="store_true", help="Embed with EMBEDDING_MODEL instead of feature hashing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", "-o", help="Write the JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    results = run(args.members, args.activities, args.threads, args.model, args.seed)
+    report("worker_pipeline", vars(args), results, args.output)
+
+if __name__ == "__main__":
+    main()
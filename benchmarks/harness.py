@@ -0,0 +1,215 @@
+"""Shared pieces of the end-to-end benchmarks.
+
+Load runners, latency summaries and synthetic members. Members are generated
+with faker and written straight to the database in DATABASE_URL, tagged with
+a run id so `cleanup_members` removes exactly what a run created.
+"""
+import asyncio
+import json
+import random
+import subprocess
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
+import numpy as np
+from faker import Faker
+from sqlalchemy import delete, insert, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.api.core.config import settings
+from apps.api.models import (
+    Activity,
+    IngestionWatermark,
+    Match,
+    Narrative,
+    NarrativeClusterState,
+    User,
+)
+
+TAGS = ["ai", "fintech", "climate", "bio", "saas", "infra", "crypto", "health", "edu", "robotics"]
+
+def summarize(samples_ms: Sequence[float], elapsed: float, errors: Sequence[Exception] = ()) -> dict:
+    """Latency percentiles and throughput for one load profile."""
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    summary = {
+        "count": len(samples),
+        "errors": len(errors),
+        "first_error": repr(errors[0]) if errors else None,
+        "elapsed_seconds": round(elapsed, 3),
+    }
+    if not len(samples):
+        return summary
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        **summary,
+        "throughput_per_second": round(len(samples) / elapsed, 1) if elapsed else None,
+        "mean_ms": round(float(samples.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(samples.max()), 3),
+    }
+
+async def run_load(
+    call: Callable[[int], Awaitable[object]],
+    total: int,
+    concurrency: int,
+) -> dict:
+    """Make `total` calls from `concurrency` concurrent workers and summarize their latency.
+
+    Each call gets its sequence number. A call that raises counts as an error
+    and is left out of the latency figures; the first error is reported.
+    """
+    samples: list[float] = []
+    errors: list[Exception] = []
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal next_index
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                await call(index)
+            except Exception as e:
+                errors.append(e)
+                continue
+            samples.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    return summarize(samples, time.perf_counter() - started, errors)
+
+def git_revision() -> str | None:
+    """Commit the benchmark ran against, so results can be compared between commits."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def report(benchmark: str, parameters: dict, results: dict, output: str | None = None) -> None:
+    """Print the results as JSON, or write them to `output`.
+
+    The app logs to stdout, so a file keeps the results separate from request logs.
+    """
+    document = json.dumps(
+        {
+            "benchmark": benchmark,
+            "revision": git_revision(),
+            "finished_at": datetime.utcnow().isoformat(),
+            "parameters": parameters,
+            "results": results,
+        },
+        indent=2,
+    )
+    if output is None:
+        print(document)
+        return
+    with open(output, "w") as f:
+        f.write(document + "\n")
+
+class SyntheticMembers:
+    """Seeded fake members and activities for one benchmark run."""
+
+    def __init__(self, seed: int = 0) -> None:
+        self.run_id = uuid4().hex[:8]
+        self.faker = Faker()
+        self.faker.seed_instance(seed)
+        self.random = random.Random(seed)
+        self.rng = np.random.default_rng(seed)
+
+    def member(self, index: int) -> dict:
+        return {
+            "id": uuid4(),
+            "email": f"bench-{self.run_id}-{index}@{self.faker.domain_name()}",
+            "clerk_id": f"bench-{self.run_id}-{index}",
+            "display_name": self.faker.name(),
+            "bio": self.faker.catch_phrase(),
+            "location": self.faker.city(),
+            "website": self.faker.url(),
+            "tags": self.random.sample(TAGS, self.random.randint(1, 3)),
+            "is_active": True,
+        }
+
+    def activity(self, index: int) -> dict:
+        """Fields of an activity; callers add the user and provider."""
+        return {
+            "external_id": f"{self.run_id}-{index}",
+            "kind": self.random.choice(["post", "email", "event", "commit"]),
+            "title": self.faker.sentence(nb_words=8),
+            "content": self.faker.paragraph(nb_sentences=4),
+            "url": self.faker.url(),
+            "occurred_at": self.faker.date_time_between(start_date="-90d", end_date="now"),
+        }
+
+    def embedding(self) -> list[float]:
+        vector = self.rng.normal(size=settings.EMBEDDING_DIMENSIONS).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+async def seed_members(  # noqa: PLR0913 - seeding options are keyword-only
+    session: AsyncSession,
+    synthetic: SyntheticMembers,
+    count: int,
+    *,
+    activities_per_member: int = 0,
+    matches_per_member: int = 0,
+    embedded: bool = False,
+) -> list[UUID]:
+    """Insert members, and optionally activities and ranked matches, in a few statements."""
+    members = [synthetic.member(index) for index in range(count)]
+    if embedded:
+        for member in members:
+            member["embedding"] = synthetic.embedding()
+    await session.execute(insert(User), members)
+    ids = [member["id"] for member in members]
+
+    if activities_per_member:
+        rows = []
+        for user_id in ids:
+            for _ in range(activities_per_member):
+                rows.append(
+                    {"user_id": user_id, "provider": "bench", **synthetic.activity(len(rows))}
+                )
+        await session.execute(insert(Activity), rows)
+
+    if matches_per_member and count > 1:
+        now = datetime.utcnow()
+        rows = []
+        for user_id in ids:
+            others = synthetic.random.sample([i for i in ids if i != user_id], min(matches_per_member, count - 1))
+            for rank, matched_user_id in enumerate(others):
+                rows.append(
+                    {
+                        "user_id": user_id,
+                        "matched_user_id": matched_user_id,
+                        "score": round(1 - rank * 0.05, 3),
+                        "rank": rank,
+                        "reasons": {},
+                        "created_at": now - timedelta(minutes=rank),
+                    }
+                )
+        await session.execute(insert(Match), rows)
+
+    await session.commit()
+    return ids
+
+async def cleanup_members(session: AsyncSession, ids: Sequence[UUID]) -> None:
+    """Delete everything a run created for its members."""
+    ids = list(ids)
+    await session.execute(
+        delete(Match).where(or_(Match.user_id.in_(ids), Match.matched_user_id.in_(ids)))
+    )
+    await session.execute(delete(Activity).where(Activity.user_id.in_(ids)))
+    await session.execute(delete(Narrative).where(Narrative.user_id.in_(ids)))
+    await session.execute(delete(NarrativeClusterState).where(NarrativeClusterState.user_id.in_(ids)))
+    await session.execute(delete(IngestionWatermark).where(IngestionWatermark.user_id.in_(ids)))
+    await session.execute(delete(User).where(User.id.in_(ids)))
+    await session.commit()
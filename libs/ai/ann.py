@@ -0,0 +1,300 @@
+"""Approximate nearest-neighbour candidate generation over embeddings.
+
+Production searches use pgvector (HNSW or IVFFlat) through `PgVectorIndex`;
+`InMemoryIndex` is an IVF-flat index with the same recall/latency knob for
+local runs and tests.
+"""
+import time
+from collections.abc import Collection, Hashable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+from sqlalchemy import Float, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """A neighbour returned by an index, scored by cosine similarity."""
+    id: Any
+    score: float
+
+@dataclass
+class SearchReport:
+    """Latency and, when measured, recall of one candidate search."""
+    backend: str
+    k: int
+    returned: int
+    latency_ms: float
+    exact_latency_ms: float | None = None
+    recall: float | None = None
+    params: dict = field(default_factory=dict)
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length so dot products are cosine similarities."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def recall_at_k(approximate: Sequence[Candidate], exact: Sequence[Candidate]) -> float:
+    """Fraction of the exact top-k that the approximate search also returned."""
+    if not exact:
+        return 1.0
+    found = {candidate.id for candidate in approximate}
+    return sum(candidate.id in found for candidate in exact) / len(exact)
+
+def _top_k(ids: np.ndarray, scores: np.ndarray, k: int, min_score: float) -> list[Candidate]:
+    keep = scores >= min_score
+    ids, scores = ids[keep], scores[keep]
+    if len(scores) > k:
+        top = np.argpartition(-scores, k - 1)[:k]
+        ids, scores = ids[top], scores[top]
+    order = np.argsort(-scores, kind="stable")
+    return [Candidate(id=ids[i], score=float(scores[i])) for i in order]
+
+class InMemoryIndex:
+    """IVF-flat cosine index held in process memory.
+
+    Vectors are partitioned into `n_lists` spherical k-means cells and a query
+    scans only the `n_probe` nearest cells. Raising `n_probe` trades latency for
+    recall; `n_probe >= n_lists` is an exact search.
+    """
+
+    backend = "memory"
+
+    def __init__(
+        self,
+        n_lists: int | None = None,
+        n_probe: int = 8,
+        train_iterations: int = 10,
+        seed: int = 0,
+    ) -> None:
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_iterations = train_iterations
+        self.seed = seed
+        self._ids = np.empty(0, dtype=object)
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._positions: dict[Hashable, int] = {}
+        self._centroids = np.empty((0, 0), dtype=np.float32)
+        self._lists: list[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def params(self) -> dict:
+        """Search parameters, for reporting alongside latency and recall."""
+        return {"n_lists": len(self._lists), "n_probe": self.n_probe}
+
+    def build(self, ids: Sequence[Hashable], vectors: np.ndarray) -> "InMemoryIndex":
+        """Index `vectors`, whose rows correspond to `ids`."""
+        self._ids = np.array(list(ids), dtype=object)
+        self._vectors = normalize(vectors)
+        self._positions = {id_: position for position, id_ in enumerate(self._ids)}
+
+        count = len(self._ids)
+        n_lists = min(self.n_lists or max(1, int(np.sqrt(count))), max(count, 1))
+        if count == 0 or n_lists == 1:
+            self._centroids = normalize(self._vectors.mean(axis=0, keepdims=True))
+            self._lists = [np.arange(count)]
+            return self
+
+        self._centroids = self._train(n_lists)
+        assignment = np.argmax(self._vectors @ self._centroids.T, axis=1)
+        self._lists = [np.flatnonzero(assignment == cell) for cell in range(n_lists)]
+        return self
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        min_score: float = -1.0,
+        exclude: Sequence[Collection[Hashable]] | None = None,
+    ) -> list[list[Candidate]]:
+        """Return up to `k` candidates scoring at least `min_score` for each query row."""
+        queries = normalize(np.atleast_2d(queries))
+        n_probe = min(self.n_probe, len(self._lists))
+        if n_probe >= len(self._lists):
+            return self.exact_search(queries, k, min_score, exclude)
+
+        coarse = queries @ self._centroids.T
+        probes = np.argpartition(-coarse, n_probe - 1, axis=1)[:, :n_probe]
+        results = []
+        for row, query in enumerate(queries):
+            positions = np.concatenate([self._lists[cell] for cell in probes[row]])
+            results.append(_top_k(*self._score(query, positions, exclude, row), k, min_score))
+        return results
+
+    def exact_search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        min_score: float = -1.0,
+        exclude: Sequence[Collection[Hashable]] | None = None,
+    ) -> list[list[Candidate]]:
+        """Brute-force search, used as ground truth when measuring recall."""
+        queries = normalize(np.atleast_2d(queries))
+        positions = np.arange(len(self._ids))
+        return [
+            _top_k(*self._score(query, positions, exclude, row), k, min_score)
+            for row, query in enumerate(queries)
+        ]
+
+    def vectors_for(self, ids: Sequence[Hashable]) -> np.ndarray:
+        """Return the normalized stored vectors for `ids`."""
+        return self._vectors[[self._positions[id_] for id_ in ids]]
+
+    def _score(
+        self,
+        query: np.ndarray,
+        positions: np.ndarray,
+        exclude: Sequence[Collection[Hashable]] | None,
+        row: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Ids and similarities of the vectors at `positions`, less the row's exclusions."""
+        if exclude is not None and exclude[row]:
+            excluded = [self._positions[id_] for id_ in exclude[row] if id_ in self._positions]
+            positions = np.setdiff1d(positions, excluded, assume_unique=True)
+        return self._ids[positions], self._vectors[positions] @ query
+
+    def _train(self, n_lists: int) -> np.ndarray:
+        """Spherical k-means on a sample of the indexed vectors."""
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(len(self._vectors), n_lists * 256)
+        sample = self._vectors[rng.choice(len(self._vectors), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        for _ in range(self.train_iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=n_lists)
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = normalize(sums)
+        return centroids
+
+class PgVectorIndex:
+    """Candidate search against a pgvector column.
+
+    Uses whichever ANN index exists on the column. `ef_search` tunes HNSW and
+    `probes` tunes IVFFlat; both are set per transaction.
+    """
+
+    backend = "pgvector"
+
+    def __init__(  # noqa: PLR0913 - search tuning options are keyword-only
+        self,
+        session: AsyncSession,
+        id_column: Any,
+        embedding_column: Any,
+        filters: Sequence[Any] = (),
+        *,
+        ef_search: int = 40,
+        probes: int = 10,
+    ) -> None:
+        self.session = session
+        self.id_column = id_column
+        self.embedding_column = embedding_column
+        self.filters = list(filters)
+        self.ef_search = ef_search
+        self.probes = probes
+
+    @property
+    def params(self) -> dict:
+        """Search parameters, for reporting alongside latency and recall."""
+        return {"ef_search": self.ef_search, "probes": self.probes}
+
+    async def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        min_score: float = -1.0,
+        exclude: Collection[Hashable] = (),
+        exact: bool = False,
+    ) -> list[Candidate]:
+        """Return up to `k` candidates scoring at least `min_score` for one query.
+
+        An HNSW scan yields at most `hnsw.ef_search` rows before the filters
+        apply, so the search breadth never starts below `k`.
+        """
+        ef_search = max(int(self.ef_search), int(k))
+        await self.session.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+        await self.session.execute(text(f"SET LOCAL ivfflat.probes = {int(self.probes)}"))
+        if not exact:
+            return await self._search(query, k, min_score, exclude)
+
+        # Disabling index scans forces the exact sequential plan used as recall
+        # ground truth; later queries in the transaction need them back. A
+        # failed search aborts the transaction, which discards the setting anyway.
+        await self.session.execute(text("SET LOCAL enable_indexscan = off"))
+        candidates = await self._search(query, k, min_score, exclude)
+        await self.session.execute(text("SET LOCAL enable_indexscan TO DEFAULT"))
+        return candidates
+
+    async def _search(
+        self,
+        query: np.ndarray,
+        k: int,
+        min_score: float,
+        exclude: Collection[Hashable],
+    ) -> list[Candidate]:
+        vector = literal(to_pgvector(normalize(query)), type_=self.embedding_column.type)
+        distance = self.embedding_column.op("<=>", return_type=Float)(vector)
+        stmt = (
+            select(self.id_column, (1 - distance).label("score"))
+            .where(self.embedding_column.is_not(None), *self.filters)
+            .order_by(distance)
+            .limit(k)
+        )
+        if exclude:
+            stmt = stmt.where(self.id_column.not_in(list(exclude)))
+
+        rows = (await self.session.execute(stmt)).all()
+        return [
+            Candidate(id=row[0], score=float(row[1]))
+            for row in rows
+            if row[1] >= min_score
+        ]
+
+def to_pgvector(vector: np.ndarray) -> str:
+    """Format a vector as a pgvector text literal."""
+    return "[" + ",".join(f"{value:.7g}" for value in np.ravel(vector)) + "]"
+
+async def timed_search(  # noqa: PLR0913
+    index: InMemoryIndex | PgVectorIndex,
+    query: np.ndarray,
+    k: int,
+    min_score: float,
+    exclude: Collection[Hashable] = (),
+    *,
+    measure_recall: bool = False,
+) -> tuple[list[Candidate], SearchReport]:
+    """Run a candidate search and report its latency, plus recall when requested."""
+    start = time.perf_counter()
+    if isinstance(index, InMemoryIndex):
+        candidates = index.search(query, k, min_score, [exclude])[0]
+    else:
+        candidates = await index.search(query, k, min_score, exclude)
+    report = SearchReport(
+        backend=index.backend,
+        k=k,
+        returned=len(candidates),
+        latency_ms=(time.perf_counter() - start) * 1000,
+        params=index.params,
+    )
+
+    if measure_recall:
+        start = time.perf_counter()
+        if isinstance(index, InMemoryIndex):
+            exact = index.exact_search(query, k, min_score, [exclude])[0]
+        else:
+            exact = await index.search(query, k, min_score, exclude, exact=True)
+        report.exact_latency_ms = (time.perf_counter() - start) * 1000
+        report.recall = recall_at_k(candidates, exact)
+
+    return candidates, report
@@ -0,0 +1,152 @@
+"""Process-resident text embedding service.
+
+The sentence-transformers model is loaded once per process. Callers batch their
+own texts (the embedding task takes a batch of activity ids), each call is one
+forward pass, and embeddings are cached by content hash so identical texts are
+never encoded twice.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+import numpy as np
+
+_WHITESPACE = re.compile(r"\s+")
+
+def content_hash(text: str, model_name: str) -> str:
+    """Hash of whitespace-normalized text, scoped to the model that embeds it."""
+    normalized = _WHITESPACE.sub(" ", text).strip()
+    return hashlib.sha256(f"{model_name}\0{normalized}".encode()).hexdigest()
+
+class EmbeddingCache(Protocol):
+    """Storage for embeddings keyed by content hash."""
+
+    def get_many(self, hashes: Sequence[str]) -> list[np.ndarray | None]: ...
+
+    def set_many(self, items: dict[str, np.ndarray]) -> None: ...
+
+class RedisEmbeddingCache:
+    """Embedding cache holding float32 vectors as raw bytes in Redis."""
+
+    def __init__(self, redis: Any, prefix: str = "emb:", ttl_seconds: int | None = None) -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+
+    def get_many(self, hashes: Sequence[str]) -> list[np.ndarray | None]:
+        if not hashes:
+            return []
+        values = self.redis.mget([self.prefix + h for h in hashes])
+        return [np.frombuffer(value, dtype=np.float32) if value else None for value in values]
+
+    def set_many(self, items: dict[str, np.ndarray]) -> None:
+        if not items:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for h, vector in items.items():
+            pipe.set(self.prefix + h, np.asarray(vector, dtype=np.float32).tobytes(), ex=self.ttl_seconds)
+        pipe.execute()
+
+@dataclass
+class EmbeddingStats:
+    """Counters for sizing batches and the cache."""
+    requested: int = 0
+    cache_hits: int = 0
+    encoded: int = 0
+    batches: int = 0
+    encode_seconds: float = 0.0
+
+    @property
+    def texts_per_second(self) -> float:
+        return self.encoded / self.encode_seconds if self.encode_seconds else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "requested": self.requested,
+            "cache_hits": self.cache_hits,
+            "encoded": self.encoded,
+            "batches": self.batches,
+            "encode_seconds": round(self.encode_seconds, 3),
+            "texts_per_second": round(self.texts_per_second, 1),
+            "mean_batch_size": round(self.encoded / self.batches, 1) if self.batches else 0.0,
+        }
+
+class EmbeddingService:
+    """Embeds texts with a shared model, one forward pass per call."""
+
+    def __init__(
+        self,
+        model_name: str,
+        *,
+        cache: EmbeddingCache | None = None,
+        max_batch_size: int = 64,
+        device: str | None = None,
+        encoder: Any = None,
+    ) -> None:
+        self.model_name = model_name
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.device = device
+        self.stats = EmbeddingStats()
+        self._model = encoder
+        self._model_lock = threading.Lock()
+        # Threads of a threaded pool take turns, as the model already uses every core
+        self._encode_lock = threading.Lock()
+
+    def load(self) -> Any:
+        """Load the model if it is not loaded yet; safe to call before forking."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    # Heavy, and only needed by processes that encode
+                    from sentence_transformers import SentenceTransformer  # noqa: PLC0415
+
+                    self._model = SentenceTransformer(self.model_name, device=self.device)
+        return self._model
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Return one normalized float32 row per text, in input order."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        self.stats.requested += len(texts)
+        hashes = [content_hash(text, self.model_name) for text in texts]
+        found: dict[str, np.ndarray] = {}
+        if self.cache is not None:
+            unique = list(dict.fromkeys(hashes))
+            for h, vector in zip(unique, self.cache.get_many(unique), strict=True):
+                if vector is not None:
+                    found[h] = vector
+        self.stats.cache_hits += sum(h in found for h in hashes)
+
+        missing = {h: text for h, text in zip(hashes, texts, strict=True) if h not in found}
+        if missing:
+            vectors = self._encode(list(missing.values()))
+            encoded = dict(zip(missing, vectors, strict=True))
+            if self.cache is not None:
+                self.cache.set_many(encoded)
+            found.update(encoded)
+
+        return np.stack([found[h] for h in hashes]).astype(np.float32, copy=False)
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        model = self.load()
+        with self._encode_lock:
+            start = time.perf_counter()
+            vectors = np.asarray(
+                model.encode(
+                    texts,
+                    batch_size=self.max_batch_size,
+                    normalize_embeddings=True,
+                    convert_to_numpy=True,
+                ),
+                dtype=np.float32,
+            )
+            self.stats.encode_seconds += time.perf_counter() - start
+            self.stats.encoded += len(texts)
+            self.stats.batches += 1
+        return vectors
@@ -0,0 +1,84 @@
+"""Online learning from match ratings.
+
+Ratings update two lightweight models incrementally instead of retraining:
+
+- a preference vector per member, nudged towards candidates they rated well and
+  away from ones they rated badly, which shifts their query embedding;
+- the global weights of the score components, moved towards the components
+  that separate well-rated matches from badly-rated ones.
+
+Both updates cost O(1) per rating and are applied to batches of ratings.
+"""
+import numpy as np
+
+from libs.ai.ann import normalize
+from libs.ai.scoring import ScoringWeights
+
+FEATURES = ("similarity", "tag_overlap", "feedback")
+
+# Ratings are 1-5; the midpoint is neutral
+_RATING_MIDPOINT = 3.0
+_RATING_HALF_RANGE = 2.0
+
+def reward(rating: int | float) -> float:
+    """Map a 1-5 rating onto [-1, 1]."""
+    return float(np.clip((rating - _RATING_MIDPOINT) / _RATING_HALF_RANGE, -1.0, 1.0))
+
+def weights_to_array(weights: ScoringWeights) -> np.ndarray:
+    return np.array([getattr(weights, name) for name in FEATURES], dtype=np.float32)
+
+def array_to_weights(values: np.ndarray) -> ScoringWeights:
+    return ScoringWeights(**{name: float(value) for name, value in zip(FEATURES, values, strict=True)})
+
+def pair_components(
+    user_vectors: np.ndarray,
+    candidate_vectors: np.ndarray,
+    user_tags: np.ndarray,
+    candidate_tags: np.ndarray,
+    candidate_bias: np.ndarray,
+) -> np.ndarray:
+    """Score components (one row per aligned user/candidate pair) in FEATURES order."""
+    similarity = np.einsum("ij,ij->i", normalize(user_vectors), normalize(candidate_vectors))
+    intersection = (user_tags * candidate_tags).sum(axis=1)
+    union = user_tags.sum(axis=1) + candidate_tags.sum(axis=1) - intersection
+    overlap = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+    return np.column_stack([similarity, overlap, np.asarray(candidate_bias, dtype=np.float32)])
+
+def update_weights(  # noqa: PLR0913 - step options are keyword-only
+    weights: np.ndarray,
+    components: np.ndarray,
+    rewards: np.ndarray,
+    *,
+    prior: np.ndarray,
+    learning_rate: float,
+    l2: float,
+) -> np.ndarray:
+    """One gradient step on a batch of rated pairs.
+
+    Components are centred on the batch mean, so a weight only moves when its
+    component is higher in liked matches than in disliked ones. The L2 term
+    pulls weights back towards the configured prior, and weights stay in
+    [0, 2 * max(prior)].
+    """
+    if len(rewards) == 0:
+        return weights
+    centred = components - components.mean(axis=0, keepdims=True)
+    gradient = (np.asarray(rewards)[:, None] * centred).mean(axis=0) - l2 * (weights - prior)
+    return np.clip(weights + learning_rate * gradient, 0.0, 2.0 * float(prior.max())).astype(np.float32)
+
+def update_preference(
+    preference: np.ndarray | None,
+    candidate_vectors: np.ndarray,
+    rewards: np.ndarray,
+    learning_rate: float,
+) -> np.ndarray:
+    """Move a member's preference vector by their rated candidates; its norm stays at most 1."""
+    step = (np.asarray(rewards)[:, None] * normalize(candidate_vectors)).sum(axis=0)
+    current = np.zeros(step.shape, dtype=np.float32) if preference is None else np.asarray(preference, dtype=np.float32)
+    updated = current + learning_rate * step
+    norm = float(np.linalg.norm(updated))
+    return (updated / norm if norm > 1.0 else updated).astype(np.float32)
+
+def personalize(embeddings: np.ndarray, preferences: np.ndarray, weight: float) -> np.ndarray:
+    """Query vectors shifted towards each member's learned preferences."""
+    return normalize(normalize(embeddings) + weight * np.asarray(preferences, dtype=np.float32))
@@ -0,0 +1,368 @@
+"""Gateway for chat completions.
+
+Requests are keyed by a hash of everything that affects the output, so
+responses are cached across task retries and regenerations. Identical prompts
+already in flight on a gateway share one upstream call, and a short claim in
+the cache extends that to every gateway sharing it: whoever holds the claim
+calls the backend while the others wait for its response to land in the cache.
+Concurrency to the backend is bounded, and large offline runs can go through
+the provider's batch API and land in the same cache.
+"""
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass, replace
+from http import HTTPStatus
+from typing import Any, Protocol
+from uuid import uuid4
+
+# How often a gateway waiting on another's claim checks the cache
+_CLAIM_POLL_SECONDS = 0.1
+
+# Deletes the claim only if this caller still holds it
+_RELEASE_CLAIM = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass(frozen=True)
+class ChatRequest:
+    """A chat completion request."""
+    messages: tuple[tuple[str, str], ...]  # (role, content) pairs
+    model: str
+    temperature: float = 0.0
+    max_tokens: int | None = None
+    json_output: bool = False
+
+    @classmethod
+    def build(cls, model: str, system: str | None = None, user: str = "", **kwargs: Any) -> "ChatRequest":
+        messages = ((("system", system),) if system else ()) + (("user", user),)
+        return cls(messages=messages, model=model, **kwargs)
+
+    def key(self) -> str:
+        payload = json.dumps(
+            [self.model, self.messages, self.temperature, self.max_tokens, self.json_output],
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def to_openai(self) -> dict:
+        body: dict[str, Any] = {
+            "model": self.model,
+            "messages": [{"role": role, "content": content} for role, content in self.messages],
+            "temperature": self.temperature,
+        }
+        if self.max_tokens is not None:
+            body["max_tokens"] = self.max_tokens
+        if self.json_output:
+            body["response_format"] = {"type": "json_object"}
+        return body
+
+@dataclass(frozen=True)
+class ChatResponse:
+    """The text of a completion and its token usage."""
+    content: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached: bool = False
+
+    def to_json(self) -> str:
+        return json.dumps({k: v for k, v in asdict(self).items() if k != "cached"})
+
+    @classmethod
+    def from_json(cls, value: str | bytes) -> "ChatResponse":
+        return cls(**json.loads(value))
+
+class LLMBackend(Protocol):
+    """A completion provider; batch methods are optional."""
+
+    async def complete(self, request: ChatRequest) -> ChatResponse: ...
+
+class LLMCache(Protocol):
+    """Async storage for responses keyed by request hash.
+
+    `claim` returns False while another caller is computing the response for
+    `key`; the claim lapses on `release` or after a timeout.
+    """
+
+    async def get(self, key: str) -> ChatResponse | None: ...
+
+    async def set(self, key: str, response: ChatResponse) -> None: ...
+
+    async def claim(self, key: str) -> bool: ...
+
+    async def release(self, key: str) -> None: ...
+
+class MemoryLLMCache:
+    """In-process LRU response cache."""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, ChatResponse] = OrderedDict()
+
+    async def get(self, key: str) -> ChatResponse | None:
+        response = self._data.get(key)
+        if response is not None:
+            self._data.move_to_end(key)
+        return response
+
+    async def set(self, key: str, response: ChatResponse) -> None:
+        self._data[key] = response
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def claim(self, key: str) -> bool:
+        # The gateway already coalesces in-process calls
+        return True
+
+    async def release(self, key: str) -> None:
+        pass
+
+class RedisLLMCache:
+    """Response cache in Redis, shared by every worker.
+
+    Claims are keys set with NX that expire after `claim_seconds`, so a worker
+    that dies mid-call only delays the others until then.
+    """
+
+    def __init__(
+        self,
+        redis: Any,
+        prefix: str = "llm:",
+        ttl_seconds: int | None = None,
+        claim_seconds: float = 120.0,
+    ) -> None:
+        self.redis = redis
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self.claim_seconds = claim_seconds
+        self._holder = uuid4().hex
+
+    async def get(self, key: str) -> ChatResponse | None:
+        value = await self.redis.get(self.prefix + key)
+        return ChatResponse.from_json(value) if value else None
+
+    async def set(self, key: str, response: ChatResponse) -> None:
+        await self.redis.set(self.prefix + key, response.to_json(), ex=self.ttl_seconds)
+
+    async def claim(self, key: str) -> bool:
+        claim_ms = int(self.claim_seconds * 1000)
+        return bool(await self.redis.set(f"{self.prefix}claim:{key}", self._holder, nx=True, px=claim_ms))
+
+    async def release(self, key: str) -> None:
+        await self.redis.eval(_RELEASE_CLAIM, 1, f"{self.prefix}claim:{key}", self._holder)
+
+class OpenAIBackend:
+    """Chat completions and the batch API through the async OpenAI client."""
+
+    def __init__(self, api_key: str, timeout: float = 60.0, client: Any = None) -> None:
+        if client is None:
+            # Imported here so the stub backend works without the SDK installed
+            from openai import AsyncOpenAI  # noqa: PLC0415
+
+            client = AsyncOpenAI(api_key=api_key, timeout=timeout)
+        self.client = client
+
+    async def complete(self, request: ChatRequest) -> ChatResponse:
+        completion = await self.client.chat.completions.create(**request.to_openai())
+        return _from_completion(completion.model_dump())
+
+    async def submit_batch(self, requests: Sequence[ChatRequest]) -> str:
+        lines = "\n".join(
+            json.dumps(
+                {
+                    "custom_id": request.key(),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": request.to_openai(),
+                }
+            )
+            for request in requests
+        )
+        upload = await self.client.files.create(file=("batch.jsonl", lines.encode()), purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=upload.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
+
+    async def batch_results(self, batch_id: str) -> dict[str, ChatResponse] | None:
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status in ("validating", "in_progress", "finalizing"):
+            return None
+        if batch.output_file_id is None:
+            return {}
+        output = await self.client.files.content(batch.output_file_id)
+        results = {}
+        for line in output.text.splitlines():
+            item = json.loads(line)
+            response = item.get("response") or {}
+            if response.get("status_code") == HTTPStatus.OK:
+                results[item["custom_id"]] = _from_completion(response["body"])
+        return results
+
+def _from_completion(body: dict) -> ChatResponse:
+    usage = body.get("usage") or {}
+    return ChatResponse(
+        content=body["choices"][0]["message"]["content"] or "",
+        model=body["model"],
+        prompt_tokens=usage.get("prompt_tokens", 0),
+        completion_tokens=usage.get("completion_tokens", 0),
+    )
+
+class StubBackend:
+    """Deterministic offline backend for tests and local runs."""
+
+    def __init__(self, responder: Callable[[ChatRequest], str] | None = None, latency: float = 0.0) -> None:
+        self.responder = responder or self._default
+        self.latency = latency
+        self.calls = 0
+        self._batches: dict[str, dict[str, ChatResponse]] = {}
+
+    @staticmethod
+    def _default(request: ChatRequest) -> str:
+        if request.json_output:
+            return json.dumps({"stub": request.key()[:12]})
+        return f"stub response {request.key()[:12]}"
+
+    async def complete(self, request: ChatRequest) -> ChatResponse:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        content = self.responder(request)
+        return ChatResponse(
+            content=content,
+            model=request.model,
+            prompt_tokens=sum(len(text.split()) for _, text in request.messages),
+            completion_tokens=len(content.split()),
+        )
+
+    async def submit_batch(self, requests: Sequence[ChatRequest]) -> str:
+        batch_id = f"stub-batch-{len(self._batches)}"
+        self._batches[batch_id] = {request.key(): await self.complete(request) for request in requests}
+        return batch_id
+
+    async def batch_results(self, batch_id: str) -> dict[str, ChatResponse] | None:
+        return self._batches.get(batch_id, {})
+
+@dataclass
+class GatewayStats:
+    """Counters for cache and coalescing effectiveness."""
+    requests: int = 0
+    cache_hits: int = 0
+    coalesced: int = 0
+    calls: int = 0
+    batched: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+class LLMGateway:
+    """Bounded, cached and coalescing access to an LLM backend."""
+
+    def __init__(self, backend: Any, cache: LLMCache | None = None, max_concurrency: int = 8) -> None:
+        self.backend = backend
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.stats = GatewayStats()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    async def complete(self, request: ChatRequest) -> ChatResponse:
+        """Return the cached response, join an identical in-flight call, or call the backend."""
+        key = request.key()
+        self.stats.requests += 1
+        if self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                self.stats.cache_hits += 1
+                return replace(cached, cached=True)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await self._call(key, request)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved so an unawaited future does not warn
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _call(self, key: str, request: ChatRequest) -> ChatResponse:
+        if self.cache is None:
+            return await self._call_backend(request)
+        # Another gateway holds the claim: wait for its response rather than calling too
+        while not await self.cache.claim(key):
+            await asyncio.sleep(_CLAIM_POLL_SECONDS)
+            cached = await self.cache.get(key)
+            if cached is not None:
+                self.stats.coalesced += 1
+                return replace(cached, cached=True)
+        try:
+            # The previous holder may have stored its response just before releasing
+            cached = await self.cache.get(key)
+            if cached is not None:
+                self.stats.coalesced += 1
+                return replace(cached, cached=True)
+            response = await self._call_backend(request)
+            await self.cache.set(key, response)
+        finally:
+            await self.cache.release(key)
+        return response
+
+    async def _call_backend(self, request: ChatRequest) -> ChatResponse:
+        async with self._semaphore:
+            response = await self.backend.complete(request)
+        self.stats.calls += 1
+        self.stats.prompt_tokens += response.prompt_tokens
+        self.stats.completion_tokens += response.completion_tokens
+        return response
+
+    async def complete_many(self, requests: Sequence[ChatRequest]) -> list[ChatResponse]:
+        """Complete requests concurrently, in input order."""
+        return list(await asyncio.gather(*(self.complete(request) for request in requests)))
+
+    async def submit_batch(self, requests: Sequence[ChatRequest]) -> str | None:
+        """Submit uncached requests to the backend's batch API; None when all are cached."""
+        pending: dict[str, ChatRequest] = {}
+        for request in requests:
+            key = request.key()
+            if key in pending or (self.cache is not None and await self.cache.get(key) is not None):
+                continue
+            pending[key] = request
+        if not pending:
+            return None
+        self.stats.batched += len(pending)
+        return await self.backend.submit_batch(list(pending.values()))
+
+    async def collect_batch(self, batch_id: str) -> int | None:
+        """Move a finished batch's responses into the cache; None while it is still running."""
+        results = await self.backend.batch_results(batch_id)
+        if results is None:
+            return None
+        if self.cache is not None:
+            for key, response in results.items():
+                await self.cache.set(key, response)
+        return len(results)
@@ -0,0 +1,127 @@
+"""Incremental clustering of activity embeddings into narratives.
+
+Each narrative keeps a centroid and a size. New activities are first assigned
+to the nearest centroid they are similar enough to, and only the residue that
+fits no narrative goes through HDBSCAN, so a run costs O(new activities)
+instead of re-clustering the whole history. A periodic full re-cluster
+corrects drift and maps its clusters back onto existing narratives so their
+ids stay stable.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from libs.ai.ann import normalize
+
+
+@dataclass
+class Clustering:
+    """Outcome of a clustering run.
+
+    `labels` index into `centroids` (or are -1 for unclustered activities), and
+    `origins` gives, per centroid, the index of the existing narrative it
+    continues, or -1 for a new narrative.
+    """
+    labels: np.ndarray
+    centroids: np.ndarray
+    sizes: np.ndarray
+    origins: np.ndarray
+
+    @property
+    def created(self) -> int:
+        return int((self.origins < 0).sum())
+
+def assign(vectors: np.ndarray, centroids: np.ndarray, threshold: float) -> tuple[np.ndarray, np.ndarray]:
+    """Label each vector with its most similar centroid, or -1 below the threshold."""
+    if len(vectors) == 0 or len(centroids) == 0:
+        return np.full(len(vectors), -1, dtype=np.int64), np.zeros(len(vectors), dtype=np.float32)
+    similarities = normalize(vectors) @ normalize(centroids).T
+    labels = similarities.argmax(axis=1)
+    scores = similarities[np.arange(len(vectors)), labels]
+    return np.where(scores >= threshold, labels, -1), scores
+
+def cluster(vectors: np.ndarray, min_cluster_size: int, min_samples: int) -> np.ndarray:
+    """Run HDBSCAN over normalized vectors; euclidean distance then ranks like cosine."""
+    if len(vectors) < min_cluster_size:
+        return np.full(len(vectors), -1, dtype=np.int64)
+    # Imported here because most incremental runs never reach HDBSCAN
+    import hdbscan  # noqa: PLC0415
+
+    clusterer = hdbscan.HDBSCAN(min_cluster_size=min_cluster_size, min_samples=min_samples)
+    return clusterer.fit_predict(normalize(vectors)).astype(np.int64)
+
+def cluster_centroids(vectors: np.ndarray, labels: np.ndarray, count: int) -> tuple[np.ndarray, np.ndarray]:
+    """Normalized mean vector and member count for labels 0..count-1."""
+    sizes = np.bincount(labels[labels >= 0], minlength=count)[:count]
+    sums = np.zeros((count, vectors.shape[1]), dtype=np.float32)
+    np.add.at(sums, labels[labels >= 0], normalize(vectors[labels >= 0]))
+    return normalize(sums), sizes
+
+def match_clusters(new_centroids: np.ndarray, old_centroids: np.ndarray, threshold: float) -> np.ndarray:
+    """Pair each new centroid with at most one existing centroid, most similar pairs first."""
+    origins = np.full(len(new_centroids), -1, dtype=np.int64)
+    if len(new_centroids) == 0 or len(old_centroids) == 0:
+        return origins
+    similarities = normalize(new_centroids) @ normalize(old_centroids).T
+    taken = np.zeros(len(old_centroids), dtype=bool)
+    for flat in np.argsort(similarities, axis=None)[::-1]:
+        new, old = divmod(int(flat), len(old_centroids))
+        if similarities[new, old] < threshold:
+            break
+        if origins[new] < 0 and not taken[old]:
+            origins[new] = old
+            taken[old] = True
+    return origins
+
+def cluster_incremental(  # noqa: PLR0913 - clustering options are keyword-only
+    vectors: np.ndarray,
+    centroids: np.ndarray,
+    sizes: np.ndarray,
+    *,
+    threshold: float,
+    min_cluster_size: int,
+    min_samples: int,
+) -> Clustering:
+    """Assign vectors to existing narratives and cluster only the residue."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    existing = len(centroids)
+    centroids = np.asarray(centroids, dtype=np.float32).reshape(existing, vectors.shape[1])
+    labels, _ = assign(vectors, centroids, threshold)
+
+    residue = np.flatnonzero(labels < 0)
+    residue_labels = cluster(vectors[residue], min_cluster_size, min_samples)
+    created = int(residue_labels.max()) + 1 if len(residue_labels) else 0
+    labels[residue] = np.where(residue_labels >= 0, residue_labels + existing, -1)
+
+    # Fold the newly assigned members into the running means
+    new_centroids, new_sizes = cluster_centroids(vectors[residue], residue_labels, created)
+    sums = normalize(centroids) * np.asarray(sizes)[:, None]
+    assigned = labels[(labels >= 0) & (labels < existing)]
+    np.add.at(sums, assigned, normalize(vectors[(labels >= 0) & (labels < existing)]))
+    updated_sizes = np.asarray(sizes) + np.bincount(assigned, minlength=existing)[:existing]
+
+    return Clustering(
+        labels=labels,
+        centroids=np.vstack([normalize(sums), new_centroids]),
+        sizes=np.concatenate([updated_sizes, new_sizes]).astype(np.int64),
+        origins=np.concatenate([np.arange(existing), np.full(created, -1)]).astype(np.int64),
+    )
+
+def recluster(
+    vectors: np.ndarray,
+    centroids: np.ndarray,
+    threshold: float,
+    min_cluster_size: int,
+    min_samples: int,
+) -> Clustering:
+    """Cluster every vector from scratch, keeping narratives whose cluster survives."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    labels = cluster(vectors, min_cluster_size, min_samples)
+    count = int(labels.max()) + 1 if len(labels) else 0
+    new_centroids, new_sizes = cluster_centroids(vectors, labels, count)
+    return Clustering(
+        labels=labels,
+        centroids=new_centroids,
+        sizes=new_sizes.astype(np.int64),
+        origins=match_clusters(new_centroids, centroids, threshold),
+    )
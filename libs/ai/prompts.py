@@ -0,0 +1,116 @@
+"""Token counting and budgeted prompt assembly.
+
+Token counts come from tiktoken when it is installed and from a
+characters-per-token estimate otherwise. Counts are memoized by text, so
+sections that did not change since the last run cost nothing to re-measure.
+"""
+import math
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+# Average characters per token for English prose with the GPT tokenizers
+CHARS_PER_TOKEN = 4
+
+_ELLIPSIS = "…"
+
+@lru_cache(maxsize=16)
+def _encoding(model: str) -> Any:
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str, model: str = "") -> int:
+    """Number of tokens in text for a model."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def truncate_tokens(text: str, max_tokens: int, model: str = "") -> str:
+    """Cut text to at most max_tokens, preferring a whitespace boundary."""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    # Leave room for the ellipsis so the result stays within max_tokens
+    limit = max_tokens - count_tokens(_ELLIPSIS, model)
+    if limit <= 0:
+        return ""
+    encoding = _encoding(model)
+    if encoding is not None:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:limit])
+    else:
+        cut = text[: limit * CHARS_PER_TOKEN]
+    boundary = cut.rfind(" ")
+    return (cut[:boundary] if boundary > len(cut) // 2 else cut).rstrip() + _ELLIPSIS
+
+@dataclass
+class Section:
+    """A piece of prompt context; higher priority is packed first."""
+    key: str
+    text: str
+    priority: float = 0.0
+    required: bool = False
+    min_tokens: int = 0  # Optional sections may be truncated down to this, but no further
+
+@dataclass
+class PackedPrompt:
+    """Sections that fit the budget, joined in their original order."""
+    text: str
+    tokens: int
+    included: list[str] = field(default_factory=list)
+    truncated: list[str] = field(default_factory=list)
+    dropped: list[str] = field(default_factory=list)
+
+def pack_sections(
+    sections: Sequence[Section],
+    budget: int,
+    model: str = "",
+    separator: str = "\n\n",
+) -> PackedPrompt:
+    """Fit sections into a token budget.
+
+    Required sections are always kept. The rest are added by priority; one that
+    does not fit is truncated if at least `min_tokens` of it fits, and dropped
+    otherwise.
+    """
+    separator_tokens = count_tokens(separator, model)
+    used = sum(count_tokens(s.text, model) + separator_tokens for s in sections if s.required)
+    chosen: dict[str, str] = {s.key: s.text for s in sections if s.required}
+    truncated: list[str] = []
+    dropped: list[str] = []
+
+    for section in sorted((s for s in sections if not s.required), key=lambda s: -s.priority):
+        cost = count_tokens(section.text, model) + separator_tokens
+        remaining = budget - used
+        if cost <= remaining:
+            chosen[section.key] = section.text
+            used += cost
+        elif section.min_tokens and remaining - separator_tokens >= section.min_tokens:
+            text = truncate_tokens(section.text, remaining - separator_tokens, model)
+            chosen[section.key] = text
+            used += count_tokens(text, model) + separator_tokens
+            truncated.append(section.key)
+        else:
+            dropped.append(section.key)
+
+    ordered = [s.key for s in sections if s.key in chosen]
+    text = separator.join(chosen[key] for key in ordered)
+    return PackedPrompt(
+        text=text,
+        tokens=count_tokens(text, model),
+        included=ordered,
+        truncated=truncated,
+        dropped=dropped,
+    )
@@ -0,0 +1,179 @@
+"""Vectorized match scoring for a batch of users against a candidate pool.
+
+Scores combine cosine similarity of normalized embeddings, Jaccard overlap of
+tags and a per-candidate feedback bias, all computed as matrix operations.
+Top-k per user is selected with `argpartition`, and candidates are processed
+in chunks so memory stays bounded for large pools.
+"""
+from collections.abc import Hashable, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+from libs.ai.ann import normalize
+
+
+@dataclass(frozen=True)
+class ScoringWeights:
+    """Relative weight of each score component."""
+    similarity: float = 1.0
+    tag_overlap: float = 0.15
+    feedback: float = 0.1
+
+DEFAULT_WEIGHTS = ScoringWeights()
+
+@dataclass
+class ScoredBatch:
+    """Top-k candidate positions and scores per user row.
+
+    Rows with fewer than k eligible candidates are padded with index -1 and
+    score -inf.
+    """
+    indices: np.ndarray
+    scores: np.ndarray
+
+    def rows(self) -> list[list[tuple[int, float]]]:
+        """Return each row's (candidate position, score) pairs, best first."""
+        return [
+            [(int(i), float(s)) for i, s in zip(row_indices, row_scores, strict=True) if i >= 0]
+            for row_indices, row_scores in zip(self.indices, self.scores, strict=True)
+        ]
+
+def tag_matrix(
+    tag_lists: Sequence[Sequence[str]],
+    vocabulary: dict[str, int] | None = None,
+) -> tuple[np.ndarray, dict[str, int]]:
+    """One-hot encode tag lists against a shared vocabulary."""
+    if vocabulary is None:
+        vocabulary = {}
+        for tags in tag_lists:
+            for tag in tags:
+                vocabulary.setdefault(tag.lower(), len(vocabulary))
+
+    matrix = np.zeros((len(tag_lists), len(vocabulary)), dtype=np.float32)
+    for row, tags in enumerate(tag_lists):
+        columns = [vocabulary[tag.lower()] for tag in tags if tag.lower() in vocabulary]
+        matrix[row, columns] = 1.0
+    return matrix, vocabulary
+
+def exclusion_mask(
+    user_ids: Sequence[Hashable],
+    candidate_ids: Sequence[Hashable],
+    excluded: Sequence[set] | None = None,
+) -> np.ndarray:
+    """Boolean (users x candidates) mask of pairs that must not be recommended.
+
+    Always masks a user against themself; `excluded[row]` adds per-user ids such
+    as members already matched or declined.
+    """
+    positions = {id_: position for position, id_ in enumerate(candidate_ids)}
+    mask = np.zeros((len(user_ids), len(candidate_ids)), dtype=bool)
+    for row, user_id in enumerate(user_ids):
+        blocked = {user_id} | (excluded[row] if excluded is not None else set())
+        columns = [positions[id_] for id_ in blocked if id_ in positions]
+        mask[row, columns] = True
+    return mask
+
+def _jaccard(user_tags: np.ndarray, candidate_tags: np.ndarray) -> np.ndarray:
+    intersection = user_tags @ candidate_tags.T
+    union = user_tags.sum(axis=1)[:, None] + candidate_tags.sum(axis=1)[None, :] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+def _select_top_k(scores: np.ndarray, columns: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Keep the k highest scores per row along with their candidate columns."""
+    if scores.shape[1] > k:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, top, axis=1)
+        columns = np.take_along_axis(columns, top, axis=1)
+    return scores, columns
+
+def score_batch(  # noqa: PLR0913 - scoring inputs are keyword-only
+    user_vectors: np.ndarray,
+    candidate_vectors: np.ndarray,
+    k: int,
+    *,
+    min_score: float = -np.inf,
+    user_tags: np.ndarray | None = None,
+    candidate_tags: np.ndarray | None = None,
+    candidate_bias: np.ndarray | None = None,
+    mask: np.ndarray | None = None,
+    weights: ScoringWeights = DEFAULT_WEIGHTS,
+    chunk_size: int = 50_000,
+) -> ScoredBatch:
+    """Score every user row against every candidate row and keep the top k.
+
+    `candidate_bias` is a feedback-derived adjustment in [-1, 1] per candidate and
+    `mask` marks (user, candidate) pairs to skip.
+    """
+    users = normalize(np.atleast_2d(user_vectors))
+    candidates = normalize(np.atleast_2d(candidate_vectors))
+    batch, pool = len(users), len(candidates)
+    k = max(0, min(k, pool))
+    if k == 0:
+        return ScoredBatch(
+            indices=np.empty((batch, 0), dtype=np.int64),
+            scores=np.empty((batch, 0), dtype=np.float32),
+        )
+
+    best_scores = np.full((batch, 0), -np.inf, dtype=np.float32)
+    best_columns = np.empty((batch, 0), dtype=np.int64)
+
+    for start in range(0, pool, chunk_size):
+        stop = min(start + chunk_size, pool)
+        scores = weights.similarity * (users @ candidates[start:stop].T)
+        if user_tags is not None and candidate_tags is not None and weights.tag_overlap:
+            scores += weights.tag_overlap * _jaccard(user_tags, candidate_tags[start:stop])
+        if candidate_bias is not None and weights.feedback:
+            scores += weights.feedback * candidate_bias[None, start:stop]
+        if mask is not None:
+            scores[mask[:, start:stop]] = -np.inf
+        scores[scores < min_score] = -np.inf
+
+        columns = np.broadcast_to(np.arange(start, stop), scores.shape)
+        best_scores, best_columns = _select_top_k(
+            np.concatenate([best_scores, scores], axis=1),
+            np.concatenate([best_columns, columns], axis=1),
+            k,
+        )
+
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    best_columns = np.take_along_axis(best_columns, order, axis=1)
+    best_columns[~np.isfinite(best_scores)] = -1
+    return ScoredBatch(indices=best_columns, scores=best_scores)
+
+def score_pairs_naive(  # noqa: PLR0913 - mirrors score_batch
+    user_vectors: np.ndarray,
+    candidate_vectors: np.ndarray,
+    k: int,
+    *,
+    min_score: float = -np.inf,
+    user_tags: Sequence[Sequence[str]] | None = None,
+    candidate_tags: Sequence[Sequence[str]] | None = None,
+    candidate_bias: Sequence[float] | None = None,
+    excluded: Sequence[set] | None = None,
+    weights: ScoringWeights = DEFAULT_WEIGHTS,
+) -> list[list[tuple[int, float]]]:
+    """Pair-by-pair reference implementation, kept for benchmarks and checks."""
+    results = []
+    for row, user in enumerate(user_vectors):
+        user_norm = float(np.linalg.norm(user)) or 1.0
+        row_scores = []
+        for column, candidate in enumerate(candidate_vectors):
+            if excluded is not None and column in excluded[row]:
+                continue
+            candidate_norm = float(np.linalg.norm(candidate)) or 1.0
+            score = weights.similarity * float(np.dot(user, candidate)) / (user_norm * candidate_norm)
+            if user_tags is not None and candidate_tags is not None:
+                mine = {tag.lower() for tag in user_tags[row]}
+                theirs = {tag.lower() for tag in candidate_tags[column]}
+                union = mine | theirs
+                if union:
+                    score += weights.tag_overlap * len(mine & theirs) / len(union)
+            if candidate_bias is not None:
+                score += weights.feedback * candidate_bias[column]
+            if score >= min_score:
+                row_scores.append((column, score))
+        row_scores.sort(key=lambda pair: pair[1], reverse=True)
+        results.append(row_scores[:k])
+    return results
@@ -0,0 +1,162 @@
+"""Base interface for streaming activity connectors.
+
+A connector yields pages of activities from a provider as an async generator,
+each page carrying the cursor to resume after it. `stream_ingest` drives a
+connector page by page into a sink, so memory use is bounded by page size no
+matter how large the account is.
+"""
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any, ClassVar, Protocol, TypeVar
+from uuid import UUID
+
+import httpx
+
+from libs.connectors.http import FetchEngine
+
+
+@dataclass
+class ActivityRecord:
+    """A provider item normalized into the shape of an `activities` row."""
+    external_id: str
+    kind: str
+    occurred_at: datetime
+    title: str | None = None
+    content: str | None = None
+    url: str | None = None
+    is_private: bool = False
+    metadata: dict = field(default_factory=dict)
+
+@dataclass
+class Page:
+    """A batch of activities and the cursor that resumes after them."""
+    activities: list[ActivityRecord]
+    cursor: str | None = None
+
+@dataclass
+class Watermark:
+    """Where the last ingestion for a (user, provider) stopped."""
+    cursor: str | None = None
+    since: datetime | None = None  # Latest occurred_at ingested so far
+
+@dataclass
+class IngestionResult:
+    """What a task reports back instead of the activities themselves."""
+    provider: str
+    ingested: int = 0
+    pages: int = 0
+    cursor: str | None = None
+    since: datetime | None = None
+
+    def as_dict(self) -> dict:
+        return {
+            "provider": self.provider,
+            "ingested": self.ingested,
+            "pages": self.pages,
+            "cursor": self.cursor,
+            "since": self.since.isoformat() if self.since else None,
+        }
+
+class Connector(ABC):
+    """Fetches a user's activities from one provider."""
+
+    provider: ClassVar[str]
+    page_size: ClassVar[int] = 100
+    requires_integration: ClassVar[bool] = True  # False for sources searched on the user's behalf
+
+    def __init__(
+        self,
+        user_id: UUID,
+        credentials: dict[str, Any],
+        http: FetchEngine | None = None,
+    ) -> None:
+        self.user_id = user_id
+        self.credentials = credentials
+        self.http = http
+
+    async def fetch(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request through the shared engine under this provider's and user's limits."""
+        if self.http is None:
+            raise RuntimeError(f"{self.provider} connector was created without a fetch engine")
+        return await self.http.request(self.provider, method, url, user_id=self.user_id, **kwargs)
+
+    @abstractmethod
+    def pages(self, watermark: Watermark) -> AsyncIterator[Page]:
+        """Yield pages of activities newer than the watermark, oldest first where possible."""
+
+    async def aclose(self) -> None:  # noqa: B027 - optional hook, most connectors hold nothing
+        """Release any clients held by the connector."""
+
+class ActivitySink(Protocol):
+    """Persists pages and their watermark atomically."""
+
+    async def load_watermark(self, user_id: UUID, provider: str) -> Watermark: ...
+
+    async def write(self, user_id: UUID, provider: str, page: Page, watermark: Watermark) -> int: ...
+
+_connectors: dict[str, type[Connector]] = {}
+
+C = TypeVar("C", bound=type[Connector])
+
+def register_connector(cls: C) -> C:
+    """Class decorator registering a connector under its provider name."""
+    _connectors[cls.provider] = cls
+    return cls
+
+def get_connector(provider: str) -> type[Connector]:
+    """Return the connector class for a provider."""
+    try:
+        return _connectors[provider]
+    except KeyError:
+        raise NotImplementedError(f"{provider} connector not implemented yet") from None
+
+def registered_providers() -> dict[str, type[Connector]]:
+    """Return every registered connector class by provider name."""
+    return dict(_connectors)
+
+def naive_utc(value: datetime) -> datetime:
+    """Convert to the naive UTC datetimes stored in Postgres."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
+
+async def stream_ingest(
+    connector: Connector,
+    sink: ActivitySink,
+    since: datetime | None = None,
+    on_page: Callable[[Page, int], Any] | None = None,
+) -> IngestionResult:
+    """Stream a connector into a sink, persisting the watermark after every page.
+
+    An explicit `since` overrides the stored watermark's time and restarts
+    pagination from the beginning of that window.
+    """
+    provider = connector.provider
+    watermark = await sink.load_watermark(connector.user_id, provider)
+    if since is not None:
+        since = naive_utc(since)
+    if since is not None and (watermark.since is None or since < watermark.since):
+        watermark = Watermark(cursor=None, since=since)
+
+    result = IngestionResult(provider=provider, cursor=watermark.cursor, since=watermark.since)
+    try:
+        async for page in connector.pages(watermark):
+            # Providers may return aware datetimes; rows and watermarks are naive UTC
+            for activity in page.activities:
+                activity.occurred_at = naive_utc(activity.occurred_at)
+            latest = max((a.occurred_at for a in page.activities), default=None)
+            watermark = Watermark(
+                cursor=page.cursor or watermark.cursor,
+                since=max(filter(None, (watermark.since, latest)), default=None),
+            )
+            written = await sink.write(connector.user_id, provider, page, watermark)
+            result.ingested += written
+            result.pages += 1
+            result.cursor, result.since = watermark.cursor, watermark.since
+            if on_page is not None:
+                on_page(page, written)
+    finally:
+        await connector.aclose()
+    return result
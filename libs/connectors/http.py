@@ -0,0 +1,346 @@
+"""Shared async HTTP layer for connectors.
+
+Each provider gets its own pooled `httpx.AsyncClient` (HTTP/2 when the `h2`
+package is installed), a concurrency limit, a per-user concurrency limit, and
+token buckets that follow the provider's rate-limit headers. Throttled and
+transient failures are retried with exponential backoff and full jitter.
+"""
+import asyncio
+import importlib.util
+import random
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Hashable, Mapping
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+from typing import Any
+
+import httpx
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+# Reset headers above this are epoch timestamps rather than seconds from now
+_EPOCH_THRESHOLD = 10 ** 9
+
+class FetchError(Exception):
+    """A provider request failed with a non-success status."""
+
+    def __init__(self, provider: str, status_code: int, retry_after: float | None = None) -> None:
+        super().__init__(f"{provider} request failed with status {status_code}")
+        self.provider = provider
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class RetryableFetchError(FetchError):
+    """A throttled or transient failure that outlasted the in-process retries."""
+
+@dataclass
+class RateLimit:
+    """Rate-limit state reported by a response."""
+    remaining: int | None = None
+    reset_after: float | None = None  # Seconds until the window resets
+    retry_after: float | None = None
+
+    @classmethod
+    def from_headers(cls, headers: Mapping[str, str], now: float | None = None) -> "RateLimit":
+        """Parse GitHub/Twitter style `X-RateLimit-*`, IETF `RateLimit-*` and `Retry-After`."""
+        now = time.time() if now is None else now
+        limit = cls()
+
+        remaining = _first(headers, "x-ratelimit-remaining", "x-rate-limit-remaining", "ratelimit-remaining")
+        if remaining is not None:
+            try:
+                limit.remaining = int(float(remaining))
+            except ValueError:
+                pass
+
+        reset = _first(headers, "x-ratelimit-reset", "x-rate-limit-reset", "ratelimit-reset")
+        if reset is not None:
+            try:
+                value = float(reset)
+            except ValueError:
+                value = None
+            if value is not None:
+                limit.reset_after = max(0.0, value - now if value > _EPOCH_THRESHOLD else value)
+
+        retry_after = headers.get("retry-after")
+        if retry_after is not None:
+            try:
+                limit.retry_after = max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    limit.retry_after = max(0.0, parsedate_to_datetime(retry_after).timestamp() - now)
+                except (TypeError, ValueError):
+                    pass
+        return limit
+
+def _first(headers: Mapping[str, str], *names: str) -> str | None:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+class TokenBucket:
+    """Async token bucket whose rate adapts to what the provider reports.
+
+    When a response says how many requests remain in the current window, the
+    remaining budget is spread evenly until the reset instead of being spent in
+    a burst; an exhausted budget or a `Retry-After` pauses the bucket outright.
+    """
+
+    def __init__(self, rate: float, capacity: int, provider: str = "") -> None:
+        self.provider = provider
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, max_wait: float | None = None) -> float:
+        """Take one token, waiting as needed; returns the seconds spent waiting.
+
+        A wait longer than `max_wait` raises `RetryableFetchError` with the
+        remaining wait as `retry_after` instead of sleeping through it, so a
+        long pause does not hold the lock and the caller's slots.
+        """
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    delay = (1 - self.tokens) / self.rate
+                if max_wait is not None and delay > max_wait:
+                    raise RetryableFetchError(self.provider, HTTPStatus.TOO_MANY_REQUESTS, delay)
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for the given number of seconds."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def observe(self, limit: RateLimit) -> None:
+        """Align the bucket with the rate-limit state from a response."""
+        now = time.monotonic()
+        self._refill(now)
+        if limit.retry_after is not None:
+            self.pause(limit.retry_after)
+        if limit.remaining is None:
+            return
+        self.tokens = min(self.tokens, float(limit.remaining))
+        if limit.reset_after is None:
+            return
+        if limit.remaining <= 0:
+            self.pause(limit.reset_after)
+            self.rate = self.max_rate
+        elif limit.reset_after > 0:
+            self.rate = min(self.max_rate, limit.remaining / limit.reset_after)
+        else:
+            self.rate = self.max_rate
+
+@dataclass
+class ProviderLimits:
+    """Connection, concurrency and rate settings for one provider."""
+    base_url: str = ""
+    max_connections: int = 20
+    concurrency: int = 10
+    per_user_concurrency: int = 2
+    rate_per_second: float = 10.0
+    burst: int = 20
+    per_user_rate: bool = True  # Quotas tied to the user's token rather than our API key
+    timeout_seconds: float = 30.0
+    headers: dict[str, str] = field(default_factory=dict)
+
+@dataclass
+class ProviderStats:
+    """Counters for one provider."""
+    requests: int = 0
+    retries: int = 0
+    throttled: int = 0
+    wait_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "wait_seconds": round(self.wait_seconds, 3),
+        }
+
+class FetchEngine:
+    """Pooled, rate-limited HTTP clients shared by every connector on an event loop.
+
+    Buckets and concurrency slots are held in memory, so they only bound the
+    requests made through this engine; subclasses can back `bucket`,
+    `provider_slot` and `user_slot` with state shared between processes.
+    """
+
+    def __init__(  # noqa: PLR0913 - options are keyword-only
+        self,
+        providers: Mapping[str, ProviderLimits],
+        *,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        http2: bool | None = None,
+        max_tracked_buckets: int = 10000,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.providers = dict(providers)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.http2 = HTTP2_AVAILABLE if http2 is None else http2 and HTTP2_AVAILABLE
+        self.max_tracked_buckets = max_tracked_buckets
+        self.transport = transport
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._provider_slots: dict[str, asyncio.Semaphore] = {}
+        self._user_slots: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+        self._buckets: OrderedDict[Hashable, TokenBucket] = OrderedDict()
+        self._stats: dict[str, ProviderStats] = {}
+
+    def limits(self, provider: str) -> ProviderLimits:
+        try:
+            return self.providers[provider]
+        except KeyError:
+            raise ValueError(f"No HTTP limits configured for provider {provider!r}") from None
+
+    def client(self, provider: str) -> httpx.AsyncClient:
+        """Return the provider's pooled client, creating it on first use."""
+        client = self._clients.get(provider)
+        if client is None:
+            limits = self.limits(provider)
+            client = httpx.AsyncClient(
+                base_url=limits.base_url,
+                headers=limits.headers,
+                timeout=limits.timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=limits.max_connections,
+                    max_keepalive_connections=limits.max_connections,
+                ),
+                http2=self.http2,
+                transport=self.transport,
+            )
+            self._clients[provider] = client
+        return client
+
+    def provider_slot(self, provider: str) -> AbstractAsyncContextManager:
+        """Return the slot bounding requests in flight to a provider."""
+        slot = self._provider_slots.get(provider)
+        if slot is None:
+            slot = self._provider_slots[provider] = asyncio.Semaphore(self.limits(provider).concurrency)
+        return slot
+
+    def user_slot(self, provider: str, user_id: Hashable) -> AbstractAsyncContextManager:
+        """Return the slot bounding one user's requests in flight to a provider."""
+        # Held only while requests are in flight, then dropped with the last reference
+        slot = self._user_slots.get((provider, user_id))
+        if slot is None:
+            slot = asyncio.Semaphore(self.limits(provider).per_user_concurrency)
+            self._user_slots[(provider, user_id)] = slot
+        return slot
+
+    def bucket(self, provider: str, user_id: Hashable = None) -> TokenBucket:
+        """Return the token bucket governing requests for a provider (and user)."""
+        limits = self.limits(provider)
+        key = (provider, user_id if limits.per_user_rate else None)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(limits.rate_per_second, limits.burst, provider)
+            while len(self._buckets) > self.max_tracked_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def request(
+        self,
+        provider: str,
+        method: str,
+        url: str,
+        user_id: Hashable = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Send a request within the provider's limits, retrying throttled and transient failures.
+
+        The user's slot is taken first, then a token, then the provider's slot,
+        so requests waiting on one user's quota never hold provider capacity.
+        Raises `RetryableFetchError` when retries are exhausted on a retryable
+        failure or the bucket is paused for longer than `backoff_max`, and
+        `FetchError` for any other non-success status.
+        """
+        client = self.client(provider)
+        bucket = self.bucket(provider, user_id)
+        stats = self._stats.setdefault(provider, ProviderStats())
+
+        async with self.user_slot(provider, user_id):
+            for attempt in range(self.max_retries + 1):
+                stats.wait_seconds += await bucket.acquire(self.backoff_max)
+                stats.requests += 1
+                try:
+                    async with self.provider_slot(provider):
+                        response = await client.request(method, url, **kwargs)
+                except httpx.TransportError:
+                    if attempt == self.max_retries:
+                        raise
+                    stats.retries += 1
+                    await asyncio.sleep(self.backoff(attempt))
+                    continue
+
+                limit = RateLimit.from_headers(response.headers)
+                await bucket.observe(limit)
+                if response.is_success:
+                    return response
+
+                status_code = response.status_code
+                # GitHub reports an exhausted quota as 403 with zero remaining
+                throttled = status_code == HTTPStatus.TOO_MANY_REQUESTS or (
+                    status_code == HTTPStatus.FORBIDDEN and limit.remaining == 0
+                )
+                if throttled:
+                    stats.throttled += 1
+                if not throttled and status_code not in RETRYABLE_STATUS:
+                    raise FetchError(provider, status_code)
+
+                retry_after = limit.retry_after
+                if retry_after is None and throttled:
+                    retry_after = limit.reset_after
+                if attempt == self.max_retries or (retry_after or 0) > self.backoff_max:
+                    raise RetryableFetchError(provider, status_code, retry_after)
+
+                await response.aclose()
+                stats.retries += 1
+                # The bucket already holds back throttled requests until the reset
+                await asyncio.sleep(self.backoff(attempt))
+
+        raise AssertionError("unreachable")
+
+    def stats(self) -> dict:
+        return {provider: stats.as_dict() for provider, stats in self._stats.items()}
+
+    async def aclose(self) -> None:
+        """Close every provider client."""
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.aclose()
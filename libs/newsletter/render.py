@@ -0,0 +1,103 @@
+"""Render newsletters into static, pre-compressed HTML artifacts.
+
+An issue is rendered once; its identity, gzip and (when the `brotli` package is
+installed) brotli variants are stored under keys derived from the content hash,
+so they never change and can be cached indefinitely by browsers and CDNs.
+"""
+import gzip
+import hashlib
+import html
+import re
+from dataclasses import dataclass
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+_LINK = re.compile(r"\[([^\]]+)\]\((https?://[^)\s]+)\)")
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_ITALIC = re.compile(r"(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)")
+
+PAGE_TEMPLATE = """<!doctype html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<style>body{{max-width:40rem;margin:2rem auto;padding:0 1rem;font:17px/1.6 system-ui,sans-serif;color:#1a1a1a}}a{{color:#2454d6}}</style>
+</head>
+<body>
+<article>
+{body}
+</article>
+</body>
+</html>
+"""
+
+def _href(url: str) -> str:
+    # The URL was escaped with the rest of the text, except for its quotes
+    return url.replace('"', "&quot;")
+
+def _inline(text: str) -> str:
+    text = html.escape(text, quote=False)
+    text = _LINK.sub(lambda m: f'<a href="{_href(m.group(2))}">{m.group(1)}</a>', text)
+    text = _BOLD.sub(r"<strong>\1</strong>", text)
+    return _ITALIC.sub(r"<em>\1</em>", text)
+
+def render_markdown(markdown: str) -> str:
+    """Render the Markdown subset the newsletter prompt asks for: headings, lists and paragraphs."""
+    blocks: list[str] = []
+    paragraph: list[str] = []
+    items: list[str] = []
+
+    def flush() -> None:
+        if paragraph:
+            blocks.append(f"<p>{_inline(' '.join(paragraph))}</p>")
+            paragraph.clear()
+        if items:
+            blocks.append("<ul>" + "".join(f"<li>{_inline(item)}</li>" for item in items) + "</ul>")
+            items.clear()
+
+    for line in markdown.splitlines():
+        stripped = line.strip()
+        heading = re.match(r"(#{1,4})\s+(.*)", stripped)
+        if not stripped:
+            flush()
+        elif heading:
+            flush()
+            level = len(heading.group(1))
+            blocks.append(f"<h{level}>{_inline(heading.group(2))}</h{level}>")
+        elif stripped[:2] in ("- ", "* "):
+            if paragraph:
+                flush()
+            items.append(stripped[2:])
+        else:
+            if items:
+                flush()
+            paragraph.append(stripped)
+    flush()
+    return "\n".join(blocks)
+
+def render_page(title: str, markdown: str) -> bytes:
+    return PAGE_TEMPLATE.format(title=html.escape(title), body=render_markdown(markdown)).encode()
+
+@dataclass
+class Artifact:
+    """One stored variant of a rendered page."""
+    key: str
+    data: bytes
+    encoding: str | None  # None for the uncompressed variant
+
+def build_artifacts(prefix: str, page: bytes) -> tuple[str, list[Artifact]]:
+    """Return the page's content hash and its variants keyed under `prefix/<hash>.html`."""
+    digest = hashlib.sha256(page).hexdigest()
+    key = f"{prefix}/{digest[:32]}.html"
+    artifacts = [
+        Artifact(key=key, data=page, encoding=None),
+        # mtime=0 keeps the gzip bytes a pure function of the page
+        Artifact(key=f"{key}.gz", data=gzip.compress(page, compresslevel=9, mtime=0), encoding="gzip"),
+    ]
+    if brotli is not None:
+        artifacts.append(Artifact(key=f"{key}.br", data=brotli.compress(page, quality=11), encoding="br"))
+    return digest, artifacts
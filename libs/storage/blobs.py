@@ -0,0 +1,141 @@
+"""Object storage for immutable artifacts.
+
+`GCSBlobStore` is used in deployed environments; `LocalBlobStore` writes to a
+directory and stands in for it in development and tests.
+"""
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Protocol
+
+
+@dataclass
+class BlobInfo:
+    """HTTP metadata stored alongside a blob."""
+    content_type: str = "application/octet-stream"
+    content_encoding: str | None = None
+    cache_control: str | None = None
+
+class BlobStore(Protocol):
+    """Minimal object store interface."""
+
+    # Whether clients fetching `url()` get the stored Content-Encoding header
+    serves_content_encoding: bool
+
+    def put(self, key: str, data: bytes, info: BlobInfo) -> None: ...
+
+    def get(self, key: str) -> bytes | None: ...
+
+    def exists(self, key: str) -> bool: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def delete_older_than(self, prefix: str, cutoff: float) -> int:
+        """Delete blobs under `prefix` last written before the `cutoff` Unix time."""
+        ...
+
+    def url(self, key: str) -> str: ...
+
+class LocalBlobStore:
+    """Blobs as files under a root directory, with metadata in a sidecar file."""
+
+    serves_content_encoding = False
+
+    def __init__(self, root: str | os.PathLike, base_url: str = "") -> None:
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise ValueError(f"Blob key escapes the storage root: {key!r}")
+        return path
+
+    def put(self, key: str, data: bytes, info: BlobInfo) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename so readers never see a partial blob
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(path)
+        path.with_name(f".{path.name}.meta").write_text(json.dumps(asdict(info)))
+
+    def get(self, key: str) -> bytes | None:
+        path = self._path(key)
+        return path.read_bytes() if path.exists() else None
+
+    def info(self, key: str) -> BlobInfo | None:
+        meta = self._path(key).with_name(f".{Path(key).name}.meta")
+        return BlobInfo(**json.loads(meta.read_text())) if meta.exists() else None
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def delete(self, key: str) -> None:
+        path = self._path(key)
+        path.unlink(missing_ok=True)
+        path.with_name(f".{path.name}.meta").unlink(missing_ok=True)
+
+    def delete_older_than(self, prefix: str, cutoff: float) -> int:
+        deleted = 0
+        root = self.root.resolve()
+        for path in self._path(prefix).rglob("*"):
+            # Sidecars and in-flight writes start with a dot and go with their blob
+            if path.name.startswith(".") or not path.is_file():
+                continue
+            if path.stat().st_mtime < cutoff:
+                self.delete(path.relative_to(root).as_posix())
+                deleted += 1
+        return deleted
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}" if self.base_url else self._path(key).as_uri()
+
+class GCSBlobStore:
+    """Blobs in a Google Cloud Storage bucket."""
+
+    serves_content_encoding = True
+
+    def __init__(self, bucket: str, base_url: str | None = None, client: object = None) -> None:
+        if client is None:
+            # Imported here so the local store works without the SDK installed
+            from google.cloud import storage  # noqa: PLC0415
+
+            client = storage.Client()
+        self.bucket = client.bucket(bucket)
+        self.base_url = (base_url or f"https://storage.googleapis.com/{bucket}").rstrip("/")
+
+    def put(self, key: str, data: bytes, info: BlobInfo) -> None:
+        blob = self.bucket.blob(key)
+        blob.cache_control = info.cache_control
+        blob.content_encoding = info.content_encoding
+        blob.upload_from_string(data, content_type=info.content_type)
+
+    def get(self, key: str) -> bytes | None:
+        blob = self.bucket.blob(key)
+        return blob.download_as_bytes(raw_download=True) if blob.exists() else None
+
+    def exists(self, key: str) -> bool:
+        return self.bucket.blob(key).exists()
+
+    def delete(self, key: str) -> None:
+        self.bucket.blob(key).delete()
+
+    def delete_older_than(self, prefix: str, cutoff: float) -> int:
+        from google.api_core.exceptions import NotFound, PreconditionFailed  # noqa: PLC0415
+
+        deleted = 0
+        for blob in self.bucket.list_blobs(prefix=prefix):
+            if blob.updated.timestamp() >= cutoff:
+                continue
+            try:
+                # A blob rewritten since it was listed has a new generation and stays
+                blob.delete(if_generation_match=blob.generation)
+            except (NotFound, PreconditionFailed):
+                continue
+            deleted += 1
+        return deleted
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
@@ -0,0 +1,65 @@
+import pytest
+
+from apps.api.core import cache
+from apps.api.core.cache import TTLCache, cache_stats
+
+TTL = 60
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+def test_entries_expire_after_their_ttl(clock):
+    users = TTLCache("test_expiry", maxsize=10, ttl=TTL)
+    users.set("a", 1)
+
+    clock[0] += TTL - 1
+    assert users.get("a") == 1
+    clock[0] += 1
+    assert users.get("a") is None
+    assert users.stats()["size"] == 0
+
+def test_entry_ttl_is_capped_by_the_cache_ttl(clock):
+    tokens = TTLCache("test_capped", maxsize=10, ttl=TTL)
+    tokens.set("long", 1, ttl=TTL * 10)
+    tokens.set("short", 2, ttl=1)
+    tokens.set("expired", 3, ttl=0)
+
+    clock[0] += 1
+    assert tokens.get("short") is None
+    assert tokens.get("expired") is None
+    clock[0] += TTL - 2
+    assert tokens.get("long") == 1
+    clock[0] += 1
+    assert tokens.get("long") is None
+
+def test_least_recently_used_entry_is_evicted(clock):
+    lru = TTLCache("test_lru", maxsize=2, ttl=TTL)
+    for key in ("a", "b"):
+        lru.set(key, key.upper())
+    lru.get("a")
+    lru.set("c", "C")
+
+    assert lru.get("b") is None
+    assert lru.get("a") == "A"
+    assert lru.get("c") == "C"
+    assert lru.stats()["evictions"] == 1
+
+def test_stats_count_hits_and_misses(clock):
+    counted = TTLCache("test_stats", maxsize=10, ttl=TTL)
+    counted.set("a", 1)
+    counted.get("a")
+    counted.get("b")
+    counted.pop("a")
+    counted.get("a")
+
+    stats = cache_stats()["test_stats"]
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert stats["hit_ratio"] == pytest.approx(1 / 3)
+
+def test_disabled_cache_stores_nothing():
+    disabled = TTLCache("test_disabled", maxsize=0, ttl=TTL)
+    disabled.set("a", 1)
+    assert disabled.get("a") is None
@@ -0,0 +1,95 @@
+from datetime import datetime
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from apps.api.core.deltas import decode_cursor, encode_cursor, fetch_deltas
+from apps.api.models.activity import Activity
+
+LIMIT = 2
+
+class FakeSession:
+    """Returns canned rows and keeps the statement it was given."""
+
+    def __init__(self, rows: list[Activity]) -> None:
+        self.rows = rows
+        self.statement = None
+
+    async def execute(self, statement):
+        self.statement = statement
+        return self
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+    def sql(self) -> str:
+        return str(self.compiled())
+
+    def compiled(self):
+        return self.statement.compile(dialect=postgresql.dialect())
+
+def _activity(change_xid: int) -> Activity:
+    now = datetime(2024, 5, 1)
+    return Activity(
+        id=uuid4(),
+        provider="github",
+        kind="commit",
+        is_private=False,
+        occurred_at=now,
+        updated_at=now,
+        change_xid=change_xid,
+    )
+
+def test_cursor_round_trips_and_is_url_safe():
+    activity_id = uuid4()
+    cursor = encode_cursor(2 ** 40, activity_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (2 ** 40, activity_id)
+
+@pytest.mark.parametrize(
+    "cursor",
+    ["", "not base64!", encode_cursor(1, uuid4())[:-4], "MTIz", "YWJjfDEyMw"],
+)
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+async def test_first_page_reads_only_settled_rows_in_feed_order():
+    rows = [_activity(10), _activity(11), _activity(12)]
+    db = FakeSession(rows)
+
+    page = await fetch_deltas(db, uuid4(), None, LIMIT)
+
+    assert [item.id for item in page.items] == [row.id for row in rows[:LIMIT]]
+    assert page.has_more
+    assert decode_cursor(page.next_cursor) == (11, rows[1].id)
+    sql = db.sql()
+    assert "activities.change_xid < pg_snapshot_xmin(pg_current_snapshot())" in sql
+    assert "ORDER BY activities.change_xid, activities.id" in sql
+    assert "(activities.change_xid, activities.id) >" not in sql
+
+async def test_next_page_resumes_after_the_cursor():
+    after = (11, UUID(int=7))
+    row = _activity(12)
+    db = FakeSession([row])
+
+    page = await fetch_deltas(db, uuid4(), after, LIMIT)
+
+    assert not page.has_more
+    assert decode_cursor(page.next_cursor) == (row.change_xid, row.id)
+    assert "(activities.change_xid, activities.id) > (%(param_1)s::BIGINT, %(param_2)s::UUID)" in db.sql()
+    assert (db.compiled().params["param_1"], db.compiled().params["param_2"]) == after
+
+async def test_empty_page_keeps_the_position():
+    after = (11, UUID(int=7))
+
+    page = await fetch_deltas(FakeSession([]), uuid4(), after, LIMIT)
+
+    assert page.items == []
+    assert decode_cursor(page.next_cursor) == after
+    assert (await fetch_deltas(FakeSession([]), uuid4(), None, LIMIT)).next_cursor is None
@@ -0,0 +1,51 @@
+import asyncio
+from uuid import uuid4
+
+import fakeredis.aioredis
+import pytest
+
+from apps.api.deps.auth import (
+    UserInvalidations,
+    _invalidate_user_snapshot,
+    _user_columns,
+    user_cache,
+)
+from apps.api.models.user import User
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    user_cache.clear()
+    yield
+    user_cache.clear()
+
+def test_snapshot_leaves_out_the_embeddings():
+    assert "email" in _user_columns
+    assert "embedding" not in _user_columns
+    assert "preference_embedding" not in _user_columns
+
+def test_updating_a_user_drops_its_snapshot():
+    user_id = uuid4()
+    user_cache.set(user_id, {"id": user_id})
+
+    _invalidate_user_snapshot(None, None, User(id=user_id))
+
+    assert user_cache.get(user_id) is None
+
+async def test_invalidations_reach_other_processes():
+    redis = fakeredis.aioredis.FakeRedis()
+    sender, receiver = UserInvalidations(), UserInvalidations()
+    await sender.start(redis)
+    await receiver.start(redis)
+    changed, unchanged = uuid4(), uuid4()
+    user_cache.set(changed, {"id": changed})
+    user_cache.set(unchanged, {"id": unchanged})
+
+    sender.publish([changed])
+    async with asyncio.timeout(2):
+        while user_cache.get(changed) is not None:
+            await asyncio.sleep(0.01)
+
+    assert user_cache.get(unchanged) is not None
+    await sender.stop()
+    await receiver.stop()
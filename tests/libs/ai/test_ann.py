@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from apps.api.models.user import User
+from libs.ai.ann import (
+    Candidate,
+    InMemoryIndex,
+    PgVectorIndex,
+    normalize,
+    recall_at_k,
+    timed_search,
+)
+
+CLUSTERS = 32
+PER_CLUSTER = 64
+DIMENSIONS = 32
+K = 10
+MIN_RECALL = 0.9
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(7)
+    centres = rng.normal(size=(CLUSTERS, DIMENSIONS))
+    vectors = np.repeat(centres, PER_CLUSTER, axis=0) + rng.normal(scale=0.3, size=(CLUSTERS * PER_CLUSTER, DIMENSIONS))
+    queries = centres + rng.normal(scale=0.3, size=centres.shape)
+    return [f"u{i}" for i in range(len(vectors))], vectors, queries
+
+@pytest.fixture(scope="module")
+def index(data):
+    ids, vectors, _ = data
+    return InMemoryIndex(n_lists=CLUSTERS, n_probe=4).build(ids, vectors)
+
+def test_exact_search_is_brute_force_cosine(data, index):
+    ids, vectors, queries = data
+    scores = normalize(vectors) @ normalize(queries[0])
+    expected = [ids[i] for i in np.argsort(-scores)[:K]]
+
+    found = index.exact_search(queries[0], K)[0]
+
+    assert [candidate.id for candidate in found] == expected
+    assert found[0].score == pytest.approx(float(scores.max()), abs=1e-5)
+
+def test_probing_a_few_cells_keeps_recall(data, index):
+    _, _, queries = data
+    approximate = index.search(queries, K)
+    exact = index.exact_search(queries, K)
+
+    recall = np.mean([recall_at_k(a, e) for a, e in zip(approximate, exact, strict=True)])
+    assert recall >= MIN_RECALL
+
+def test_probing_every_cell_is_exact(data):
+    ids, vectors, queries = data
+    full = InMemoryIndex(n_lists=CLUSTERS, n_probe=CLUSTERS).build(ids, vectors)
+
+    for approximate, exact in zip(full.search(queries, K), full.exact_search(queries, K), strict=True):
+        assert recall_at_k(approximate, exact) == 1.0
+
+def test_exclusions_and_min_score_filter_candidates(data, index):
+    _, _, queries = data
+    best = index.exact_search(queries[0], K)[0]
+    excluded = {candidate.id for candidate in best[:3]}
+    threshold = best[K // 2].score
+
+    found = index.search(queries[0], K, min_score=threshold, exclude=[excluded])[0]
+
+    assert found
+    assert not excluded & {candidate.id for candidate in found}
+    assert all(candidate.score >= threshold for candidate in found)
+
+def test_recall_counts_the_exact_neighbours_found():
+    exact = [Candidate("a", 0.9), Candidate("b", 0.8)]
+    assert recall_at_k([Candidate("b", 0.8), Candidate("c", 0.7)], exact) == pytest.approx(0.5)
+    assert recall_at_k([], []) == 1.0
+
+async def test_timed_search_reports_recall(data, index):
+    _, _, queries = data
+    candidates, report = await timed_search(index, queries[1], K, -1.0, measure_recall=True)
+
+    assert report.returned == len(candidates) == K
+    assert report.recall >= MIN_RECALL
+    assert report.params == {"n_lists": CLUSTERS, "n_probe": 4}
+
+class RecordingSession:
+    def __init__(self) -> None:
+        self.sql: list[str] = []
+
+    async def execute(self, statement):
+        self.sql.append(str(statement).splitlines()[0])
+        return self
+
+    def all(self):
+        return []
+
+async def test_pgvector_exact_search_scopes_its_settings():
+    session = RecordingSession()
+    index = PgVectorIndex(session, User.id, User.embedding, ef_search=K)
+
+    await index.search(np.ones(DIMENSIONS), K * 4, exact=True)
+
+    assert session.sql[0] == f"SET LOCAL hnsw.ef_search = {K * 4}"
+    assert session.sql[2] == "SET LOCAL enable_indexscan = off"
+    assert session.sql[-1] == "SET LOCAL enable_indexscan TO DEFAULT"
@@ -0,0 +1,45 @@
+import fakeredis
+import numpy as np
+
+from libs.ai.embeddings import EmbeddingService, RedisEmbeddingCache, content_hash
+
+DIMENSIONS = 4
+
+class CountingEncoder:
+    """Stands in for a sentence-transformers model and records each forward pass."""
+
+    def __init__(self) -> None:
+        self.passes: list[list[str]] = []
+
+    def encode(self, texts, **options):
+        self.passes.append(list(texts))
+        vectors = np.array([[len(text), 1, 0, 0] for text in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def test_hash_ignores_whitespace_but_not_the_model():
+    assert content_hash(" a  b\n", "m") == content_hash("a b", "m")
+    assert content_hash("a b", "m") != content_hash("a b", "other")
+
+def test_each_call_is_one_forward_pass_over_unique_texts():
+    encoder = CountingEncoder()
+    service = EmbeddingService("m", encoder=encoder)
+
+    texts = ["a", "bb", "a", " bb "]
+    vectors = service.embed(texts)
+
+    assert [len(batch) for batch in encoder.passes] == [len({"a", "bb"})]
+    assert vectors.shape == (len(texts), DIMENSIONS)
+    np.testing.assert_array_equal(vectors[0], vectors[2])
+    assert service.stats.batches == 1
+
+def test_cached_texts_are_not_encoded_again():
+    encoder = CountingEncoder()
+    cache = RedisEmbeddingCache(fakeredis.FakeRedis())
+    first = EmbeddingService("m", cache=cache, encoder=encoder).embed(["a", "bb"])
+
+    second = EmbeddingService("m", cache=cache, encoder=encoder)
+    vectors = second.embed(["bb", "ccc"])
+
+    assert encoder.passes == [["a", "bb"], ["ccc"]]
+    np.testing.assert_array_equal(vectors[0], first[1])
+    assert second.stats.cache_hits == 1
@@ -0,0 +1,94 @@
+import asyncio
+
+import fakeredis.aioredis
+
+from libs.ai.llm import (
+    ChatRequest,
+    ChatResponse,
+    LLMGateway,
+    MemoryLLMCache,
+    RedisLLMCache,
+    StubBackend,
+)
+
+LATENCY = 0.05
+CALLERS = 5
+
+def _request(user: str = "hello") -> ChatRequest:
+    return ChatRequest.build("gpt-test", system="be brief", user=user)
+
+def test_key_covers_every_output_setting():
+    request = _request()
+    assert request.key() == _request().key()
+    assert request.key() != _request("bye").key()
+    assert request.key() != ChatRequest.build("gpt-test", system="be brief", user="hello", json_output=True).key()
+
+def test_response_json_drops_the_cached_flag():
+    response = ChatResponse(content="hi", model="gpt-test", prompt_tokens=2, cached=True)
+    assert ChatResponse.from_json(response.to_json()) == ChatResponse(content="hi", model="gpt-test", prompt_tokens=2)
+
+async def test_repeated_requests_are_served_from_the_cache():
+    backend = StubBackend()
+    gateway = LLMGateway(backend, cache=MemoryLLMCache())
+
+    first = await gateway.complete(_request())
+    second = await gateway.complete(_request())
+
+    assert backend.calls == 1
+    assert not first.cached
+    assert second.cached
+    assert second.content == first.content
+    assert gateway.stats.cache_hits == 1
+
+async def test_concurrent_identical_requests_share_one_call():
+    backend = StubBackend(latency=LATENCY)
+    gateway = LLMGateway(backend)
+
+    responses = await gateway.complete_many([_request()] * CALLERS + [_request("bye")])
+
+    assert backend.calls == 2  # noqa: PLR2004
+    assert len({response.content for response in responses[:CALLERS]}) == 1
+    assert gateway.stats.coalesced == CALLERS - 1
+
+async def test_failures_reach_every_waiter_and_are_not_cached():
+    def fail(request):
+        raise RuntimeError("upstream down")
+
+    gateway = LLMGateway(StubBackend(fail, latency=LATENCY), cache=MemoryLLMCache())
+    results = await asyncio.gather(*(gateway.complete(_request()) for _ in range(CALLERS)), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert await gateway.cache.get(_request().key()) is None
+
+async def test_gateways_sharing_a_redis_cache_share_one_call():
+    redis = fakeredis.aioredis.FakeRedis()
+    backend = StubBackend(latency=LATENCY)
+    gateways = [LLMGateway(backend, cache=RedisLLMCache(redis)) for _ in range(CALLERS)]
+
+    responses = await asyncio.gather(*(gateway.complete(_request()) for gateway in gateways))
+
+    assert backend.calls == 1
+    assert sum(response.cached for response in responses) == CALLERS - 1
+    assert await redis.keys("llm:claim:*") == []
+
+async def test_claims_are_only_released_by_their_holder():
+    redis = fakeredis.aioredis.FakeRedis()
+    first, second = RedisLLMCache(redis), RedisLLMCache(redis)
+
+    assert await first.claim("k")
+    assert not await second.claim("k")
+    await second.release("k")
+    assert not await second.claim("k")
+    await first.release("k")
+    assert await second.claim("k")
+
+async def test_batches_skip_cached_requests_and_fill_the_cache():
+    backend = StubBackend()
+    gateway = LLMGateway(backend, cache=MemoryLLMCache())
+    await gateway.complete(_request())
+
+    batch_id = await gateway.submit_batch([_request(), _request("bye"), _request("bye")])
+    assert gateway.stats.batched == 1
+    assert await gateway.collect_batch(batch_id) == 1
+    assert (await gateway.complete(_request("bye"))).cached
+    assert await gateway.submit_batch([_request(), _request("bye")]) is None
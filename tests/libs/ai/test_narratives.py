@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from libs.ai.ann import normalize
+from libs.ai.narratives import (
+    assign,
+    cluster_centroids,
+    cluster_incremental,
+    match_clusters,
+    recluster,
+)
+
+THRESHOLD = 0.8
+MIN_CLUSTER_SIZE = 5
+DIMENSIONS = 8
+
+def _axis(i: int) -> np.ndarray:
+    return np.eye(DIMENSIONS, dtype=np.float32)[i]
+
+def _around(centre: np.ndarray, count: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return normalize(centre + rng.normal(scale=0.05, size=(count, DIMENSIONS)))
+
+def test_assign_labels_only_vectors_similar_enough():
+    centroids = np.stack([_axis(0), _axis(1)])
+    vectors = np.stack([_axis(1), _axis(0) + 0.1 * _axis(2), _axis(2)])
+
+    labels, scores = assign(vectors, centroids, THRESHOLD)
+
+    assert labels.tolist() == [1, 0, -1]
+    assert scores[0] == pytest.approx(1.0)
+    assert assign(vectors, np.empty((0, DIMENSIONS)), THRESHOLD)[0].tolist() == [-1, -1, -1]
+
+def test_centroids_are_normalized_means_of_their_members():
+    vectors = np.stack([_axis(0), _axis(1), _axis(2)])
+    centroids, sizes = cluster_centroids(vectors, np.array([0, 0, -1]), 2)
+
+    assert sizes.tolist() == [2, 0]
+    assert centroids[0] == pytest.approx(normalize(_axis(0) + _axis(1)))
+
+def test_new_activities_join_existing_narratives_without_reclustering():
+    centroids = np.stack([_axis(0), _axis(1)])
+    vectors = np.vstack([_around(_axis(1), 3), _around(_axis(0), 2, seed=1)])
+
+    result = cluster_incremental(
+        vectors, centroids, np.array([10, 4]), threshold=THRESHOLD, min_cluster_size=MIN_CLUSTER_SIZE, min_samples=2
+    )
+
+    assert result.labels.tolist() == [1, 1, 1, 0, 0]
+    assert result.sizes.tolist() == [12, 7]
+    assert result.origins.tolist() == [0, 1]
+    assert result.created == 0
+    # Each centroid stays close to its narrative while taking in the new members
+    assert result.centroids[1] @ _axis(1) > THRESHOLD
+
+def test_a_residue_too_small_to_cluster_stays_unassigned():
+    vectors = np.vstack([_around(_axis(0), 2), _around(_axis(3), MIN_CLUSTER_SIZE - 1)])
+
+    result = cluster_incremental(
+        vectors, _axis(0)[None, :], np.array([1]), threshold=THRESHOLD, min_cluster_size=MIN_CLUSTER_SIZE, min_samples=2
+    )
+
+    assert result.labels.tolist() == [0, 0] + [-1] * (MIN_CLUSTER_SIZE - 1)
+    assert len(result.centroids) == 1
+
+def test_clusters_map_onto_at_most_one_narrative_each():
+    old = np.stack([_axis(0), _axis(1)])
+    new = np.stack([_axis(1), normalize(_axis(1) + 0.2 * _axis(2)), _axis(3)])
+
+    assert match_clusters(new, old, THRESHOLD).tolist() == [1, -1, -1]
+
+def test_recluster_keeps_the_ids_of_surviving_narratives():
+    pytest.importorskip("hdbscan")
+    vectors = np.vstack([_around(_axis(2), 20), _around(_axis(5), 20, seed=1)])
+
+    result = recluster(vectors, np.stack([_axis(5), _axis(7)]), THRESHOLD, MIN_CLUSTER_SIZE, 2)
+
+    assert sorted(result.origins.tolist()) == [-1, 0]
@@ -0,0 +1,50 @@
+import pytest
+
+from libs.ai.prompts import Section, count_tokens, pack_sections, truncate_tokens
+
+BUDGET = 40
+LIMIT = 5
+
+def _words(count: int, word: str = "word") -> str:
+    return " ".join([word] * count)
+
+def test_short_text_is_not_truncated():
+    text = _words(2)
+    assert truncate_tokens(text, count_tokens(text)) == text
+    assert truncate_tokens(text, 0) == ""
+
+@pytest.mark.parametrize("text", [_words(100), "x" * 400])
+def test_truncated_text_stays_within_the_limit(text):
+    cut = truncate_tokens(text, LIMIT)
+    assert cut.endswith("…")
+    assert count_tokens(cut) <= LIMIT
+
+def test_truncation_prefers_a_word_boundary():
+    cut = truncate_tokens(_words(100), LIMIT)
+    assert cut.removesuffix("…").split(" ") == ["word"] * len(cut.split(" "))
+
+def test_required_sections_are_kept_and_order_is_preserved():
+    sections = [
+        Section("intro", _words(10), required=True),
+        Section("low", _words(10), priority=1),
+        Section("high", _words(10), priority=2),
+    ]
+    packed = pack_sections(sections, BUDGET)
+
+    assert packed.included == ["intro", "high"]
+    assert packed.dropped == ["low"]
+    assert packed.text == "\n\n".join([sections[0].text, sections[2].text])
+    assert packed.tokens <= BUDGET
+
+def test_sections_are_truncated_down_to_their_minimum():
+    sections = [
+        Section("intro", _words(20), required=True),
+        Section("long", _words(60), priority=2, min_tokens=LIMIT),
+        Section("too_big", _words(60), priority=1, min_tokens=BUDGET),
+    ]
+    packed = pack_sections(sections, BUDGET)
+
+    assert packed.included == ["intro", "long"]
+    assert packed.truncated == ["long"]
+    assert packed.dropped == ["too_big"]
+    assert packed.tokens <= BUDGET
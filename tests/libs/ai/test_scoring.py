@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from libs.ai.scoring import (
+    ScoringWeights,
+    exclusion_mask,
+    score_batch,
+    score_pairs_naive,
+    tag_matrix,
+)
+
+USERS = 6
+POOL = 40
+K = 5
+TAGS = ["python", "rust", "ml", "design", "Go"]
+
+@pytest.fixture
+def pool():
+    rng = np.random.default_rng(3)
+    user_vectors = rng.normal(size=(USERS, 16))
+    candidate_vectors = rng.normal(size=(POOL, 16))
+    user_tags = [list(rng.choice(TAGS, 2, replace=False)) for _ in range(USERS)]
+    candidate_tags = [list(rng.choice(TAGS, rng.integers(0, 3), replace=False)) for _ in range(POOL)]
+    bias = rng.uniform(-1, 1, POOL)
+    return user_vectors, candidate_vectors, user_tags, candidate_tags, bias
+
+def test_tag_matrix_shares_a_case_insensitive_vocabulary():
+    matrix, vocabulary = tag_matrix([["Python", "ML"], ["python"], []])
+
+    assert vocabulary == {"python": 0, "ml": 1}
+    assert matrix.tolist() == [[1, 1], [1, 0], [0, 0]]
+    assert tag_matrix([["ml", "unknown"]], vocabulary)[0].tolist() == [[0, 1]]
+
+def test_exclusion_mask_blocks_self_and_excluded_ids():
+    mask = exclusion_mask(["a", "b"], ["a", "b", "c"], [{"c"}, set()])
+    assert mask.tolist() == [[True, False, True], [False, True, False]]
+
+@pytest.mark.parametrize("chunk_size", [7, POOL, 50_000])
+def test_batch_scores_match_the_pairwise_reference(pool, chunk_size):
+    user_vectors, candidate_vectors, user_tags, candidate_tags, bias = pool
+    weights = ScoringWeights(similarity=1.0, tag_overlap=0.3, feedback=0.2)
+    excluded = [{row, (row * 7) % POOL} for row in range(USERS)]
+    tags, _ = tag_matrix(user_tags + candidate_tags)
+
+    batch = score_batch(
+        user_vectors,
+        candidate_vectors,
+        K,
+        min_score=0.0,
+        user_tags=tags[:USERS],
+        candidate_tags=tags[USERS:],
+        candidate_bias=bias,
+        mask=exclusion_mask(range(USERS), range(POOL), excluded),
+        weights=weights,
+        chunk_size=chunk_size,
+    )
+    reference = score_pairs_naive(
+        user_vectors,
+        candidate_vectors,
+        K,
+        min_score=0.0,
+        user_tags=user_tags,
+        candidate_tags=candidate_tags,
+        candidate_bias=bias,
+        excluded=excluded,
+        weights=weights,
+    )
+
+    for row, expected in zip(batch.rows(), reference, strict=True):
+        assert [column for column, _ in row] == [column for column, _ in expected]
+        assert [score for _, score in row] == pytest.approx([score for _, score in expected], abs=1e-5)
+
+def test_rows_short_of_k_are_padded(pool):
+    user_vectors, candidate_vectors, *_ = pool
+    batch = score_batch(user_vectors[:1], candidate_vectors[:3], K, mask=np.array([[True, False, False]]))
+
+    assert batch.indices.shape == (1, 3)
+    assert batch.indices[0, -1] == -1
+    assert np.isneginf(batch.scores[0, -1])
+    assert sorted(column for column, _ in batch.rows()[0]) == [1, 2]
+
+def test_empty_pool_returns_empty_rows(pool):
+    user_vectors, *_ = pool
+    batch = score_batch(user_vectors, np.empty((0, 16)), K)
+
+    assert batch.indices.shape == (USERS, 0)
+    assert batch.rows() == [[] for _ in range(USERS)]
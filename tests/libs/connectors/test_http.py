@@ -0,0 +1,118 @@
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+from libs.connectors import http
+from libs.connectors.http import (
+    FetchEngine,
+    FetchError,
+    ProviderLimits,
+    RateLimit,
+    RetryableFetchError,
+    TokenBucket,
+)
+
+NOW = 1_700_000_000.0
+RESET = 60
+RETRY_AFTER = 5
+REMAINING = 6
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(http.time, "monotonic", lambda: now[0])
+    return now
+
+def test_github_headers_give_an_epoch_reset():
+    limit = RateLimit.from_headers(
+        {"x-ratelimit-remaining": "12", "x-ratelimit-reset": str(int(NOW + RESET))}, now=NOW
+    )
+    assert limit == RateLimit(remaining=12, reset_after=RESET)
+
+def test_ietf_headers_give_seconds_until_reset():
+    limit = RateLimit.from_headers({"ratelimit-remaining": "0", "ratelimit-reset": "30"}, now=NOW)
+    assert limit == RateLimit(remaining=0, reset_after=30)
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    assert RateLimit.from_headers({"retry-after": str(RETRY_AFTER)}, now=NOW).retry_after == RETRY_AFTER
+    date = formatdate(NOW + RESET, usegmt=True)
+    assert RateLimit.from_headers({"retry-after": date}, now=NOW).retry_after == pytest.approx(RESET)
+    assert RateLimit.from_headers({"retry-after": formatdate(NOW - RESET, usegmt=True)}, now=NOW).retry_after == 0
+
+def test_malformed_headers_are_ignored():
+    limit = RateLimit.from_headers(
+        {"x-ratelimit-remaining": "many", "x-ratelimit-reset": "soon", "retry-after": "later"}, now=NOW
+    )
+    assert limit == RateLimit()
+
+async def test_bucket_spends_its_burst_then_refills(clock):
+    bucket = TokenBucket(rate=2.0, capacity=2, provider="github")
+    assert await bucket.acquire() == 0
+    assert await bucket.acquire() == 0
+
+    with pytest.raises(RetryableFetchError) as raised:
+        await bucket.acquire(max_wait=0.1)
+    assert raised.value.retry_after == pytest.approx(0.5)
+
+    clock[0] += 0.5
+    assert await bucket.acquire(max_wait=0.1) == 0
+
+async def test_bucket_spreads_the_remaining_quota_until_reset(clock):
+    bucket = TokenBucket(rate=10.0, capacity=10)
+    await bucket.observe(RateLimit(remaining=REMAINING, reset_after=RESET))
+    assert bucket.rate == pytest.approx(REMAINING / RESET)
+    assert bucket.tokens == REMAINING
+
+    await bucket.observe(RateLimit(remaining=0, reset_after=RESET))
+    with pytest.raises(RetryableFetchError) as raised:
+        await bucket.acquire(max_wait=1)
+    assert raised.value.retry_after == pytest.approx(RESET)
+    assert bucket.rate == bucket.max_rate
+
+async def test_bucket_pauses_on_retry_after(clock):
+    bucket = TokenBucket(rate=10.0, capacity=10)
+    await bucket.observe(RateLimit(retry_after=RETRY_AFTER))
+    with pytest.raises(RetryableFetchError):
+        await bucket.acquire(max_wait=1)
+    clock[0] += RETRY_AFTER
+    assert await bucket.acquire(max_wait=1) == 0
+
+def _engine(handler) -> FetchEngine:
+    return FetchEngine(
+        {"github": ProviderLimits(base_url="https://api.github.com", concurrency=1)},
+        max_retries=2,
+        backoff_base=0.0,
+        backoff_max=1.0,
+        transport=httpx.MockTransport(handler),
+    )
+
+async def test_engine_retries_transient_failures():
+    statuses = iter([503, 200])
+    engine = _engine(lambda request: httpx.Response(next(statuses)))
+
+    response = await engine.request("github", "GET", "/user", user_id="u1")
+
+    assert response.status_code == httpx.codes.OK
+    assert engine.stats()["github"]["retries"] == 1
+
+async def test_engine_hands_long_throttles_back_to_the_caller():
+    engine = _engine(lambda request: httpx.Response(429, headers={"retry-after": str(RESET)}))
+
+    with pytest.raises(RetryableFetchError) as raised:
+        await engine.request("github", "GET", "/user", user_id="u1")
+    assert raised.value.retry_after == RESET
+    # The paused bucket refuses the next request without calling the provider
+    started = time.perf_counter()
+    with pytest.raises(RetryableFetchError):
+        await engine.request("github", "GET", "/user", user_id="u1")
+    assert time.perf_counter() - started < 1
+
+async def test_engine_raises_on_client_errors():
+    engine = _engine(lambda request: httpx.Response(404))
+
+    with pytest.raises(FetchError) as raised:
+        await engine.request("github", "GET", "/missing")
+    assert not isinstance(raised.value, RetryableFetchError)
+    assert engine.stats()["github"]["retries"] == 0
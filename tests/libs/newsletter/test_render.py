@@ -0,0 +1,35 @@
+import gzip
+
+from libs.newsletter.render import build_artifacts, render_markdown, render_page
+
+
+def test_markdown_subset_renders_to_html():
+    html = render_markdown("# Week 12\n\nShipped **two** things, *quietly*.\n\n- one\n- two\nAfter the list")
+
+    assert html.splitlines() == [
+        "<h1>Week 12</h1>",
+        "<p>Shipped <strong>two</strong> things, <em>quietly</em>.</p>",
+        "<ul><li>one</li><li>two</li></ul>",
+        "<p>After the list</p>",
+    ]
+
+def test_text_and_links_are_escaped_once():
+    html = render_markdown('Read [Q&A <live>](https://example.com/?a=1&b="2") & more')
+
+    assert html == (
+        '<p>Read <a href="https://example.com/?a=1&amp;b=&quot;2&quot;">Q&amp;A &lt;live&gt;</a> &amp; more</p>'
+    )
+
+def test_only_http_links_become_anchors():
+    assert "<a" not in render_markdown("[run](javascript:alert(1))")
+
+def test_artifacts_are_keyed_by_content():
+    page = render_page("Issue <1>", "Hello")
+    digest, artifacts = build_artifacts("newsletters/u1", page)
+
+    assert b"<title>Issue &lt;1&gt;</title>" in page
+    assert artifacts[0].key == f"newsletters/u1/{digest[:32]}.html"
+    assert artifacts[0].encoding is None
+    assert gzip.decompress(artifacts[1].data) == page
+    # Rendering the same page again yields byte-identical variants
+    assert build_artifacts("newsletters/u1", page)[1] == artifacts
@@ -0,0 +1,120 @@
+from datetime import UTC, datetime
+
+import fakeredis
+import pytest
+from celery import Celery
+from celery.app.task import Task
+from celery.exceptions import Retry
+
+from apps.api.core.config import settings
+from apps.workers import coalesce
+from apps.workers.coalesce import _MERGE, _RELEASE, _TAKE, CoalescingTask, _since_key
+
+PENDING = "coalesce:pending:test:u1"
+LEASE = "coalesce:lease:test:u1"
+WINDOW = 900
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(coalesce, "get_redis", lambda: client)
+    return client
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Record messages handed to the broker instead of sending them."""
+    messages = []
+
+    def apply_async(self, args=None, kwargs=None, task_id=None, **options):
+        messages.append((task_id, tuple(args or ()), options.get("countdown")))
+        return self.AsyncResult(task_id)
+
+    monkeypatch.setattr(Task, "apply_async", apply_async)
+    return messages
+
+@pytest.fixture
+def task():
+    app = Celery("test", broker="memory://", set_as_current=False)
+    runs = []
+
+    @app.task(base=CoalescingTask, bind=True, name="test", coalesce_since_arg="since")
+    def sync(self, user_id, since=None):
+        runs.append(since)
+        return since
+
+    sync.runs = runs
+    return sync
+
+def run(task, task_id, *args):
+    task.push_request(id=task_id, args=args, kwargs={}, retries=0)
+    try:
+        return task(*args)
+    finally:
+        task.pop_request()
+
+def test_merge_folds_calls_into_the_pending_task(redis):
+    assert redis.eval(_MERGE, 1, PENDING, "a", "2024-05-02T00:00:00.000000", WINDOW) is None
+    assert redis.eval(_MERGE, 1, PENDING, "b", "2024-05-03T00:00:00.000000", WINDOW) == b"a"
+    assert redis.eval(_MERGE, 1, PENDING, "c", "2024-05-01T00:00:00.000000", WINDOW) == b"a"
+    assert redis.hget(PENDING, "since") == b"2024-05-01T00:00:00.000000"
+
+    # No since means the full history, which no later range narrows again
+    assert redis.eval(_MERGE, 1, PENDING, "d", "", WINDOW) == b"a"
+    assert redis.eval(_MERGE, 1, PENDING, "e", "2024-04-01T00:00:00.000000", WINDOW) == b"a"
+    assert redis.hgetall(PENDING) == {b"task_id": b"a", b"since": b""}
+    assert 0 < redis.ttl(PENDING) <= WINDOW
+
+def test_merge_sends_a_retry_of_the_pending_task(redis):
+    redis.eval(_MERGE, 1, PENDING, "a", "", WINDOW)
+    redis.expire(PENDING, WINDOW // 2)
+
+    assert redis.eval(_MERGE, 1, PENDING, "a", "", WINDOW) is None
+    assert redis.hget(PENDING, "task_id") == b"a"
+    assert redis.ttl(PENDING) > WINDOW // 2
+
+def test_take_only_claims_the_runs_own_entry(redis):
+    redis.eval(_MERGE, 1, PENDING, "a", "2024-05-01T00:00:00.000000", WINDOW)
+
+    assert redis.eval(_TAKE, 1, PENDING, "b") is None
+    assert redis.exists(PENDING)
+    assert redis.eval(_TAKE, 1, PENDING, "a") == b"2024-05-01T00:00:00.000000"
+    assert not redis.exists(PENDING)
+    assert redis.eval(_TAKE, 1, PENDING, "a") is None
+
+def test_release_only_frees_the_holders_lease(redis):
+    redis.set(LEASE, "a")
+
+    assert redis.eval(_RELEASE, 1, LEASE, "b") == 0
+    assert redis.get(LEASE) == b"a"
+    assert redis.eval(_RELEASE, 1, LEASE, "a") == 1
+    assert not redis.exists(LEASE)
+
+def test_since_key_is_naive_utc():
+    aware = datetime(2024, 5, 1, 12, tzinfo=UTC)
+    assert _since_key(aware) == _since_key(datetime(2024, 5, 1, 12)) == "2024-05-01T12:00:00.000000"
+    assert _since_key("2024-05-01T14:00:00+02:00") == "2024-05-01T12:00:00.000000"
+    assert _since_key(None) == ""
+
+def test_deferred_run_is_resent_and_keeps_absorbing_calls(redis, sent, task):
+    task.apply_async(("u1", "2024-05-02T00:00:00"), task_id="a")
+    assert sent == [("a", ("u1", "2024-05-02T00:00:00"), None)]
+
+    # Another run for the member holds the lease, so this one is re-sent with its id
+    redis.set(LEASE, "other")
+    with pytest.raises(Retry):
+        run(task, "a", "u1", "2024-05-02T00:00:00")
+    assert sent[-1] == ("a", ("u1", "2024-05-02T00:00:00"), settings.COALESCE_RETRY_SECONDS)
+    assert redis.hget(PENDING, "task_id") == b"a"
+    assert task.runs == []
+
+    # A duplicate arriving while it waits is folded into the deferred run
+    sent.clear()
+    result = task.apply_async(("u1", "2024-05-01T00:00:00"), task_id="b")
+    assert result.id == "a"
+    assert sent == []
+
+    redis.delete(LEASE)
+    run(task, "a", "u1", "2024-05-02T00:00:00")
+    assert task.runs == ["2024-05-01T00:00:00.000000"]
+    assert not redis.exists(PENDING)
+    assert not redis.exists(LEASE)
@@ -0,0 +1,33 @@
+import fakeredis
+import pytest
+
+from apps.workers import feedback
+from apps.workers.feedback import ack_pending, applying, peek_pending, queue_feedback
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(feedback, "get_redis", lambda: client)
+    return client
+
+def test_ratings_stay_queued_until_acknowledged(redis):
+    queue_feedback("m1", 5)
+    queue_feedback("m2", 1)
+
+    batch = peek_pending(10)
+    assert [event["match_id"] for event in batch] == ["m1", "m2"]
+    assert peek_pending(10) == batch
+
+    # A rating arriving while the batch is applied survives its acknowledgement
+    queue_feedback("m3", 4)
+    ack_pending(len(batch))
+    assert peek_pending(10) == [{"match_id": "m3", "rating": 4}]
+
+def test_one_worker_applies_at_a_time(redis):
+    with applying() as first:
+        with applying() as second:
+            assert first
+            assert not second
+    with applying() as again:
+        assert again
@@ -0,0 +1,68 @@
+import asyncio
+
+import fakeredis.aioredis
+import httpx
+import pytest
+
+from apps.workers.http import RedisSlots, RedisTokenBucket, SharedFetchEngine
+from libs.connectors.http import ProviderLimits, RateLimit, RetryableFetchError
+
+MAX_WAIT = 0.5
+RESET = 60
+SLOTS = 2
+
+@pytest.fixture
+def redis():
+    return fakeredis.aioredis.FakeRedis()
+
+async def test_buckets_with_one_key_share_their_tokens(redis):
+    first = RedisTokenBucket(redis, "bucket", rate=1.0, capacity=2, provider="github")
+    second = RedisTokenBucket(redis, "bucket", rate=1.0, capacity=2, provider="github")
+
+    assert await first.acquire() == 0
+    assert await second.acquire() == 0
+    with pytest.raises(RetryableFetchError) as raised:
+        await first.acquire(max_wait=MAX_WAIT)
+    assert MAX_WAIT < raised.value.retry_after <= 1
+
+async def test_observed_exhaustion_pauses_every_holder(redis):
+    first = RedisTokenBucket(redis, "bucket", rate=10.0, capacity=10, provider="twitter")
+    second = RedisTokenBucket(redis, "bucket", rate=10.0, capacity=10, provider="twitter")
+
+    await first.observe(RateLimit(remaining=0, reset_after=RESET))
+    with pytest.raises(RetryableFetchError) as raised:
+        await second.acquire(max_wait=RESET // 2)
+    assert RESET - 1 < raised.value.retry_after <= RESET
+
+async def test_slots_admit_up_to_their_limit(redis):
+    held = [RedisSlots(redis, "slots", limit=SLOTS, lease_seconds=30) for _ in range(SLOTS)]
+    for slot in held:
+        await slot.__aenter__()
+
+    waiting = asyncio.create_task(RedisSlots(redis, "slots", limit=SLOTS, lease_seconds=30).__aenter__())
+    await asyncio.sleep(0.1)
+    assert not waiting.done()
+
+    await held[0].__aexit__(None, None, None)
+    await asyncio.wait_for(waiting, 1)
+    assert await redis.zcard("slots") == SLOTS
+
+async def test_engine_releases_slots_after_requests(redis):
+    def handler(request):
+        return httpx.Response(200, headers={"x-ratelimit-remaining": "0", "x-ratelimit-reset": "60"})
+
+    engine = SharedFetchEngine(
+        {"github": ProviderLimits(base_url="https://api.github.com")},
+        redis=redis,
+        backoff_max=1.0,
+        transport=httpx.MockTransport(handler),
+    )
+    await engine.request("github", "GET", "/user", user_id="u1")
+
+    assert await redis.zcard("http:slots:github") == 0
+    assert await redis.zcard("http:slots:github:u1") == 0
+    # The exhausted quota reported to this engine holds back every other engine
+    other = SharedFetchEngine(engine.providers, redis=redis, backoff_max=1.0)
+    with pytest.raises(RetryableFetchError):
+        await other.request("github", "GET", "/user", user_id="u1")
+    await engine.aclose()
@@ -0,0 +1,48 @@
+from uuid import uuid4
+
+from sqlalchemy.dialects import postgresql
+
+from apps.workers.matching import store_recommendations
+
+
+class FakeSession:
+    """Keeps the statements it was given and whether it committed after them."""
+
+    def __init__(self) -> None:
+        self.statements = []
+        self.committed_after = None
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+
+    async def commit(self):
+        self.committed_after = len(self.statements)
+
+def _compiled(statement):
+    return statement.compile(dialect=postgresql.dialect())
+
+async def test_only_ranks_that_are_not_re_proposed_are_cleared():
+    user_id, kept, new = uuid4(), uuid4(), uuid4()
+    session = FakeSession()
+
+    stored = await store_recommendations(
+        session,
+        {user_id: [{"user_id": str(kept), "score": 0.9}, {"user_id": str(new), "score": 0.8}]},
+    )
+
+    assert stored == len({kept, new})
+    clear, upsert = session.statements
+    sql = str(_compiled(clear))
+    assert sql.startswith("UPDATE matches SET rank=")
+    assert "(matches.user_id, matches.matched_user_id) NOT IN" in sql
+    assert [(user_id, kept), (user_id, new)] in _compiled(clear).params.values()
+    assert str(_compiled(upsert)).startswith("INSERT INTO matches")
+    assert session.committed_after == len(session.statements)
+
+async def test_users_without_proposals_lose_every_rank():
+    session = FakeSession()
+
+    assert await store_recommendations(session, {uuid4(): []}) == 0
+    (clear,) = session.statements
+    assert "NOT IN" not in str(_compiled(clear))
+    assert session.committed_after == 1
@@ -0,0 +1,87 @@
+import os
+import time
+from datetime import date, datetime
+from uuid import uuid4
+
+import pytest
+from kombu.exceptions import DecodeError
+from kombu.serialization import dumps, loads
+
+from apps.api.core.config import settings
+from apps.workers import serialization
+from apps.workers.serialization import (
+    RESULT_PREFIX,
+    json_dumps,
+    json_loads,
+    msgpack_dumps,
+    msgpack_loads,
+    purge_offloaded_results,
+    register_serializers,
+)
+from libs.storage.blobs import BlobInfo, LocalBlobStore
+
+OFFLOAD_BYTES = 1024
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = LocalBlobStore(tmp_path)
+    monkeypatch.setattr(serialization, "get_result_store", lambda: store)
+    monkeypatch.setattr(settings, "CELERY_RESULT_OFFLOAD_BYTES", OFFLOAD_BYTES)
+    register_serializers()
+    return store
+
+def _blobs(store: LocalBlobStore) -> list[str]:
+    return [path.name for path in (store.root / RESULT_PREFIX).glob("[!.]*")]
+
+def _value() -> dict:
+    return {
+        "id": uuid4(),
+        "at": datetime(2024, 5, 1, 12, 30),
+        "on": date(2024, 5, 1),
+        "counts": [1, 2, 3],
+        "nested": {"ok": True, "ratio": 0.5, "none": None},
+    }
+
+@pytest.mark.parametrize(("dump", "load"), [(json_dumps, json_loads), (msgpack_dumps, msgpack_loads)])
+def test_codecs_round_trip_uuids_and_dates(dump, load):
+    value = _value()
+    assert load(dump(value)) == value
+
+@pytest.mark.parametrize("name", ["result-json", "result-msgpack"])
+def test_small_results_stay_inline(store, name):
+    value = _value()
+    content_type, encoding, data = dumps(value, serializer=name)
+
+    assert loads(data, content_type, encoding) == value
+    assert not (store.root / RESULT_PREFIX).exists()
+
+@pytest.mark.parametrize("name", ["result-json", "result-msgpack"])
+def test_large_results_are_offloaded(store, name):
+    value = {"items": ["x" * 64] * 64}
+    content_type, encoding, data = dumps(value, serializer=name)
+
+    assert len(data) < OFFLOAD_BYTES
+    assert len(_blobs(store)) == 1
+    assert loads(data, content_type, encoding) == value
+
+def test_missing_offloaded_result_raises(store):
+    content_type, encoding, data = dumps({"items": ["x" * 64] * 64}, serializer="result-json")
+    for name in _blobs(store):
+        store.delete(f"{RESULT_PREFIX}{name}")
+
+    with pytest.raises(DecodeError, match="missing from storage"):
+        loads(data, content_type, encoding)
+
+def test_purge_deletes_only_expired_results(store):
+    store.put(f"{RESULT_PREFIX}old", b"old", BlobInfo())
+    store.put(f"{RESULT_PREFIX}new", b"new", BlobInfo())
+    store.put("newsletters/old.html", b"kept", BlobInfo())
+    expired = time.time() - settings.CELERY_RESULT_EXPIRES_SECONDS * 2
+    for key in (f"{RESULT_PREFIX}old", "newsletters/old.html"):
+        os.utime(store.root / key, (expired, expired))
+
+    assert purge_offloaded_results() == 1
+    assert not store.exists(f"{RESULT_PREFIX}old")
+    assert store.info(f"{RESULT_PREFIX}old") is None
+    assert store.exists(f"{RESULT_PREFIX}new")
+    assert store.exists("newsletters/old.html")